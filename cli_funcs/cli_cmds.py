@@ -4,6 +4,7 @@ from qgp.qgp_communication import qgp_text_chat
 from qgp.pdu_constants import *
 from qgp.qgp_player import qgp_player_movement, qgp_player_status, qgp_player_join, qgp_player_leave
 from qgp.qgp_session_mgmt import qgp_game_start, qgp_game_end
+from qgp.qgp_queue import qgp_queue_request
 
 
 #defining the function to send an error
@@ -260,9 +261,10 @@ def move_player(args):
         player_id = int(args[0])
         movement_type = int(args[1])
         direction = int(args[2])
-        x_position = int(args[3])
-        y_position = int(args[4])
-        z_position = int(args[5])
+        #negative positions are sent as their 32 bit two's complement
+        x_position = int(args[3]) & 0xFFFFFFFF
+        y_position = int(args[4]) & 0xFFFFFFFF
+        z_position = int(args[5]) & 0xFFFFFFFF
         speed = int(args[6])
 
         #creating the headers
@@ -374,6 +376,61 @@ def player_leave(args):
     else:
         return None
 
+#defining the function for joining the matchmaking queue
+def queue_request(args):
+    #making sure the correct number of args are present
+    if args and len(args) >= 3:
+        #saving each arg to its variable
+        player_id = int(args[0])
+        match_mode = int(args[1])
+        player_skill = int(args[2])
+
+        #creating the headers
+        queue_header = qgp_header(
+            version=1,
+            msg_type=QGP_MSG_Q_REQ,
+            msg_len=0,
+            priority=0
+        )
+
+        #packing and returning the package
+        queue_pdu = qgp_queue_request(
+            header=queue_header,
+            player_id=player_id,
+            match_mode=match_mode,
+            player_skill=player_skill,
+            queue_action=QGP_QUEUE_JOIN
+        )
+        return queue_pdu.pack()
+    else:
+        return None
+
+#defining the function for leaving the matchmaking queue
+def leave_queue(args):
+    #making sure the correct number of args are present
+    if args and len(args) >= 1:
+        player_id = int(args[0])
+
+        #creating the headers
+        queue_header = qgp_header(
+            version=1,
+            msg_type=QGP_MSG_Q_REQ,
+            msg_len=0,
+            priority=0
+        )
+
+        #the mode and skill aren't needed to leave
+        queue_pdu = qgp_queue_request(
+            header=queue_header,
+            player_id=player_id,
+            match_mode=0,
+            player_skill=0,
+            queue_action=QGP_QUEUE_LEAVE
+        )
+        return queue_pdu.pack()
+    else:
+        return None
+
 #defining the debug function
 if __name__ == '__main__':
     input_list = [
@@ -6,19 +6,35 @@ from aioquic.asyncio import QuicConnectionProtocol, connect
 from aioquic.quic import events
 from aioquic.quic.configuration import QuicConfiguration
 from aioquic.quic.connection import QuicConnection
-from aioquic.quic.events import QuicEvent, StreamDataReceived, HandshakeCompleted, ConnectionTerminated
+from aioquic.quic.events import QuicEvent, StreamDataReceived, DatagramFrameReceived, HandshakeCompleted, ConnectionTerminated
 
 from cli_funcs.cli_cmds import *
 
 from qgp.pdu_constants import *
 from qgp.qgp_communication import qgp_text_chat
-from qgp.qgp_hello import qgp_client_hello, qgp_server_hello
+from qgp.qgp_hello import qgp_client_hello, qgp_server_hello, parse_capabilities, format_capabilities
 from qgp.qgp_header import qgp_header
 from qgp.qgp_errors import qgp_errors
+from qgp.qgp_delta import qgp_delta_decoder, qgp_snapshot_ack
+from qgp.qgp_compact import compact_movement
+from qgp.qgp_dispatch import qgp_dispatcher
+from qgp.qgp_framing import qgp_stream_reassembler
+from qgp.qgp_channels import qgp_channel, qgp_channel_manager
+from qgp.qgp_scheduler import qgp_send_scheduler, congestion_budget
+from qgp.qgp_logging import get_logger, log_pdu, start_logging
+from qgp.qgp_loading import qgp_load_progress, qgp_load_end
+from qgp.qgp_map_loader import qgp_map_download
+from qgp.qgp_asset_cache import qgp_asset_cache, asset_capabilities, QGP_MAX_ADVERTISED_ASSETS
 
 #tracking the connected clients
 ACTIVE_CLIENTS: Set[QuicConnectionProtocol] = set()
 
+#the per PDU output goes through logging so it can be turned down and never blocks the event loop
+LOGGER = get_logger("client")
+
+#the maps this client has downloaded before, kept on disk by their sha256
+CLIENT_ASSET_CACHE = qgp_asset_cache()
+
 #defining the DFA class
 class client_dfa_state:
     INITIAL = 0
@@ -29,6 +45,8 @@ class client_dfa_state:
     IN_GAME = 5
     GAME_OVER = 6
     IDLE = 7
+    IN_QUEUE = 8
+    LOADING = 9
 
 #defining the client class for QUIC
 class qgp_client_protocol(QuicConnectionProtocol):
@@ -38,16 +56,40 @@ class qgp_client_protocol(QuicConnectionProtocol):
         self.current_dfa_state = client_dfa_state.INITIAL
         self._client_hello_sent_on_stream: Optional[int] = None
 
+        #buffering partial PDUs per stream
+        self.stream_reassembler = qgp_stream_reassembler()
+
+        #opening a small fixed set of persistent streams instead of one per PDU
+        self.channels = qgp_channel_manager(self._quic)
+
+        #rebuilding full snapshots from the keyframes and deltas the server sends
+        self.delta_decoder = qgp_delta_decoder()
+
+        #the map being downloaded for the match, None when nothing is loading
+        self.map_download = None
+
+        #the loaded map, a view of its file in the asset cache
+        self.map_data = None
+
+        #the cached assets offered in the hello, the server doesn't send these
+        self.advertised_assets = set()
+
+        #movement is re-encoded in the compact format once the server agrees to it
+        self.compact_movement = False
+
+        #queueing outbound PDUs by the header priority and sending while the congestion window has room
+        self.scheduler = qgp_send_scheduler(self.channels, self.transmit, budget=lambda: congestion_budget(self._quic))
+
     def connection_made(self, transport):
         super().connection_made(transport)
 
         peername = transport.get_extra_info('peername')
         if peername:
             self.resolved_peer_address = peername
-            print(f"[Server] New connection from: {self.resolved_peer_address}")
+            LOGGER.info("New connection to %s", self.resolved_peer_address)
         else:
             self.resolved_peer_address = None  # Should ideally not happen
-            print("[Server] New connection, but peer address not available from transport.")
+            LOGGER.info("New connection, but peer address not available from transport")
 
         ACTIVE_CLIENTS.add(self)
 
@@ -55,175 +97,381 @@ class qgp_client_protocol(QuicConnectionProtocol):
         super().connection_lost(exc)
         # Use the stored resolved_peer_address for logging if available
         peer_display = self.resolved_peer_address if self.resolved_peer_address else "Unknown Peer"
-        print(f"[Server] Connection lost from: {peer_display}")
+        LOGGER.info("Connection lost to %s", peer_display)
         ACTIVE_CLIENTS.discard(self)
 
+        #dropping anything still waiting to be sent
+        self.scheduler.close()
+
     #defining the function to handle quic connections
     def quic_event_received(self, event: events.QuicEvent):
-        print("received event", event)
-        if isinstance(event, HandshakeCompleted):
-            print("handshake completed")
-            #checking the DFA status only if its the initial state
-            if self.current_dfa_state == client_dfa_state.INITIAL:
-                self.current_dfa_state = client_dfa_state.QUIC_CONNECTING
-
-            if self.current_dfa_state == client_dfa_state.QUIC_CONNECTING:
-                self.send_qgp_client_hello()
-
-        elif isinstance(event, StreamDataReceived):
-            #getting the stream id and the data
-            stream_id = event.stream_id
-            data = event.data
-
-            #unpacking the headers
-            headers = None
-            payload = None
-            headers, payload = qgp_header.unpack(data)
-
-            #errors can happen in any state so error check is located outside of DFA checks
-            if headers.msg_type == QGP_MSG_SERVER_ERROR:
-                print("Error received")
-                error = qgp_errors.unpack(headers, payload)
-
-                print("Error code:", error.error_code)
-                print("Error length:", error.error_length)
-                print("Error message:", error.error_message)
-                print("Error severity:", error.severity)
-            else:
-
-                #checking the DFA status
-                if self.current_dfa_state == client_dfa_state.AWAITING_SERVER_HELLO:
-                    #checking the message type
-                    if headers.msg_type == QGP_MSG_SERVER_HELLO:
-                        print("message len", headers.msg_len)
-                        server_hello = qgp_server_hello.unpack(headers, payload)
-
-                        print("Received server hello")
-                        print("server id:", server_hello.server_id)
-                        print("server version", server_hello.server_software_version)
-                        print("server capabilities:", server_hello.capabilities_str)
-
-                        #updating the DFA
-                        self.current_dfa_state = client_dfa_state.HANDSHAKE_COMPLETED
-
-                    else:
-                        print("Invalid message, closing connection")
-                        self.close()
-
-                #this can happen after the initial connection or the client is out of the game
-                elif self.current_dfa_state == client_dfa_state.HANDSHAKE_COMPLETED or self.current_dfa_state == client_dfa_state.GAME_OVER:
-                    #checking the message type
-                    if headers.msg_type == QGP_MSG_GAME_START:
-                        print("Game start message received")
-                        game_start = qgp_game_start.unpack(headers, payload)
-
-                        #printing the details of the payload
-                        print(f"[INFO] Match ID: {game_start.match_id}")
-                        print(f"[INFO] Match Type: {game_start.match_type}")
-                        print(f"[INFO] Match Duration: {game_start.match_duration}")
-                        print(f"[INFO] Match Map: {game_start.match_map}")
-                        print(f"[INFO] Match Mode: {game_start.match_mode}")
-                        print(f"[INFO] Match Team: {game_start.match_team}")
-                        print(f"[INFO] Match Players: {game_start.match_players}")
-                        print(f"[INFO] Match Player IDs: {game_start.match_player_ids}")
-
-                        #updating the client dfa
-                        self.current_dfa_state = client_dfa_state.IN_GAME
-
-                    else:
-                        print("Server sent a packet outside of valid headers")
-                        print("Sending a client error")
-                        args = ["6", "0", "Client sent a packet outside of valid headers"]
-                        packaged_pdu = server_error_sender(args)
-                        # checking a pdu package was returned and if so sending it
-                        if packaged_pdu is None:
-                            print("Invalid arguments provided")
-                        else:
-                            sender(packaged_pdu)
-
-
-
-                elif self.current_dfa_state == client_dfa_state.IN_GAME:
-                    #checking the message type
-                    if headers.msg_type == QGP_MSG_TEXT_CHAT:
-                        print("Chat message received")
-                        server_chat = qgp_text_chat.unpack(headers, payload)
-
-                        print("Received server chat message:", server_chat.text)
-                    elif headers.msg_type == QGP_MSG_GAME_END:
-                        print("Game end message received")
-                        game_end = qgp_game_end.unpack(headers, payload)
-
-                        # printing the details of the payload
-                        print(f"[INFO] Match ID: {game_end.match_id}")
-                        print(f"[INFO] Match Type: {game_end.match_type}")
-                        print(f"[INFO] Match Duration: {game_end.match_duration}")
-                        print(f"[INFO] Match Map: {game_end.match_map}")
-                        print(f"[INFO] Match Mode: {game_end.match_mode}")
-                        print(f"[INFO] Match Team: {game_end.match_team}")
-                        print(f"[INFO] Match Players: {game_end.match_players}")
-                        print(f"[INFO] Match Player IDs: {game_end.match_player_ids}")
-                        print(f"[INFO] Match Player Kills: {game_end.match_player_kills}")
-                        print(f"[INFO] Match Player Deaths: {game_end.match_player_deaths}")
-                        print(f"[INFO] Match Player Assists: {game_end.match_player_assists}")
-                        print(f"[INFO] Match Player TeamKills: {game_end.match_player_teamkills}")
-                        print(f"[INFO] Match Player TeamDeaths: {game_end.match_player_teamdeaths}")
-                        print(f"[INFO] Match Player TeamAssists: {game_end.match_player_teamassists}")
-
-                        #changing the dfa status
-                        self.current_dfa_state = client_dfa_state.GAME_OVER
-                    else:
-                        print("Server sent a packet outside of valid headers")
-                        print("Sending a client error")
-                        args = ["6", "0", "Client sent a packet outside of valid headers"]
-                        packaged_pdu = server_error_sender(args)
-                        # checking a pdu package was returned and if so sending it
-                        if packaged_pdu is None:
-                            print("Invalid arguments provided")
-                        else:
-                            sender(packaged_pdu)
-
-                else:
-                    print("Server sent a packet outside of next expected state")
-                    print("Sending a client error")
-                    args = ["7", "0", "Received packet outside of next expected state"]
-                    packaged_pdu = client_error_sender(args)
-                    # checking a pdu package was returned and if so sending it
-                    if packaged_pdu is None:
-                        print("Invalid arguments provided")
-                    else:
-                        sender(packaged_pdu)
+        LOGGER.debug("Received event %s", event)
+
+        #routing the event by its type instead of walking isinstance checks
+        event_handler = CLIENT_EVENT_HANDLERS.get(type(event))
+        if event_handler is not None:
+            event_handler(self, event)
+
+    def handle_handshake_completed(self, event):
+        LOGGER.debug("Handshake completed")
+        #checking the DFA status only if its the initial state
+        if self.current_dfa_state == client_dfa_state.INITIAL:
+            self.current_dfa_state = client_dfa_state.QUIC_CONNECTING
+
+        if self.current_dfa_state == client_dfa_state.QUIC_CONNECTING:
+            self.send_qgp_client_hello()
+
+    def handle_stream_data(self, event):
+        #cutting every complete PDU out of the stream data
+        try:
+            frames = self.stream_reassembler.feed(event.stream_id, event.data, event.end_stream)
+        except ValueError as e:
+            LOGGER.warning("Dropping stream %d: %s", event.stream_id, e)
+            return
+
+        #routing each PDU through the registry keyed by (dfa state, message type)
+        for headers, payload in frames:
+            CLIENT_DISPATCHER.dispatch(self, headers, payload, event.stream_id)
+
+    def handle_datagram(self, event):
+        #unwrapping the datagram, stale updates come back as None
+        frame = self.channels.datagrams.receive(event.data)
+        if frame is not None:
+            headers, payload = frame
+            CLIENT_DISPATCHER.dispatch(self, headers, payload, None)
+
+    #errors can happen in any state
+    def handle_server_error(self, headers, error, stream_id):
+        if isinstance(error, str):
+            LOGGER.warning("Invalid server error: %s", error)
+            return
+
+        log_pdu(LOGGER, headers.msg_type, "Server error %d severity %d: %s", error.error_code, error.severity,
+                error.error_message)
+
+    def handle_server_hello(self, headers, server_hello, stream_id):
+        log_pdu(LOGGER, headers.msg_type, "Server hello from server %d version %d capabilities %s",
+                server_hello.server_id, server_hello.server_software_version, server_hello.capabilities_str)
+
+        #switching movement to datagrams and the compact format if the server agreed to them
+        negotiated_capabilities = parse_capabilities(server_hello.capabilities_str)
+        if QGP_CAP_DATAGRAM in negotiated_capabilities:
+            self.channels.enable_datagrams()
+        self.compact_movement = QGP_CAP_COMPACT_MOVEMENT in negotiated_capabilities
+
+        #sending the smaller v2 header from now on, both versions are always accepted
+        if QGP_CAP_HEADER_V2 in negotiated_capabilities:
+            self.channels.enable_header_v2()
+
+        #updating the DFA
+        self.current_dfa_state = client_dfa_state.HANDSHAKE_COMPLETED
+
+    #anything other than the server hello is invalid during the handshake
+    def handle_invalid_hello(self, headers, payload, stream_id):
+        LOGGER.warning("Message type 0x%04x before the server hello, closing connection", headers.msg_type)
+        self.close()
+
+    #this can happen after the initial connection or the client is out of the game
+    def handle_game_start(self, headers, game_start, stream_id):
+        if isinstance(game_start, str):
+            LOGGER.warning("Invalid game start: %s", game_start)
+            return
+
+        #logging the details of the payload
+        log_pdu(LOGGER, headers.msg_type, "Game start for match %d type %d duration %d map %d mode %d team %d "
+                "with %d players %s", game_start.match_id, game_start.match_type, game_start.match_duration,
+                game_start.match_map, game_start.match_mode, game_start.match_team, game_start.match_players,
+                list(game_start.match_player_ids))
+
+        #updating the client dfa
+        self.current_dfa_state = client_dfa_state.IN_GAME
+
+    def handle_queue_response(self, headers, queue_response, stream_id):
+        if isinstance(queue_response, str):
+            LOGGER.warning("Invalid queue response: %s", queue_response)
+            return
+
+        if queue_response.queue_status == QGP_QUEUE_JOINED:
+            log_pdu(LOGGER, headers.msg_type, "Player %d queued for mode %d, %d waiting", queue_response.player_id,
+                    queue_response.match_mode, queue_response.players_waiting)
+            return
+
+        if queue_response.queue_status == QGP_QUEUE_REJECTED:
+            log_pdu(LOGGER, headers.msg_type, "Player %d can't be queued", queue_response.player_id)
+        else:
+            log_pdu(LOGGER, headers.msg_type, "Player %d left the queue", queue_response.player_id)
+
+        #a client that isn't queued any more is back to being connected
+        if self.current_dfa_state == client_dfa_state.IN_QUEUE:
+            self.current_dfa_state = client_dfa_state.HANDSHAKE_COMPLETED
+
+    def handle_match_found(self, headers, match_found, stream_id):
+        if isinstance(match_found, str):
+            LOGGER.warning("Invalid match found: %s", match_found)
+            return
+
+        log_pdu(LOGGER, headers.msg_type, "Match found for player %d: match %d mode %d team %d", match_found.player_id,
+                match_found.match_id, match_found.match_mode, match_found.player_team)
+
+        #the server has put the player in the match and sends its map before the game start
+        self.current_dfa_state = client_dfa_state.LOADING
+
+    def handle_load_start(self, headers, load_start, stream_id):
+        if isinstance(load_start, str):
+            LOGGER.warning("Invalid load start: %s", load_start)
+            return
+
+        self.current_dfa_state = client_dfa_state.LOADING
+
+        #a cached map is read straight from its file
+        self.map_data = CLIENT_ASSET_CACHE.get(load_start.map_hash)
+        if self.map_data is not None:
+            LOGGER.info("Map %d loaded from the cache", load_start.match_map)
+            self.send_load_end(load_start.match_id, load_start.match_map, QGP_LOAD_DONE)
+            return
+
+        log_pdu(LOGGER, headers.msg_type, "Loading map %d for match %d: %d bytes in %d chunks", load_start.match_map,
+                load_start.match_id, load_start.map_size, load_start.chunk_count)
+        self.map_download = qgp_map_download(load_start.match_id, load_start.match_map, load_start.map_hash,
+                                             load_start.map_size, load_start.chunk_size, load_start.chunk_count)
+
+        #an empty map is already loaded
+        if self.map_download.done():
+            self.finish_map_download()
+
+        #the server skips maps offered in the hello, so a map that has gone from the cache since is asked for
+        elif load_start.map_hash in self.advertised_assets:
+            progress_header = qgp_header(version=1, msg_type=QGP_MSG_LD_PROGRESS, msg_len=0, priority=0)
+            self.queue_qgp_pdu(qgp_load_progress(progress_header, load_start.match_id, 0).pack())
+
+    def handle_map_chunk(self, headers, map_chunk, stream_id):
+        if isinstance(map_chunk, str):
+            LOGGER.warning("Invalid map chunk: %s", map_chunk)
+            return
+
+        download = self.map_download
+        if download is None or map_chunk.match_map != download.match_map:
+            #chunks that were already in flight when the map was found in the cache
+            log_pdu(LOGGER, headers.msg_type, "Dropping chunk %d of map %d that isn't being loaded", map_chunk.chunk_index, map_chunk.match_map)
+            return
+
+        #the chunk data is a view into the received data so it is copied into the map straight away
+        if download.add(map_chunk.chunk_index, map_chunk.data):
+            log_pdu(LOGGER, headers.msg_type, "Map %d: %d of %d chunks", download.match_map, download.received, download.chunk_count)
+            progress_header = qgp_header(version=1, msg_type=QGP_MSG_LD_PROGRESS, msg_len=0, priority=0)
+            self.queue_qgp_pdu(qgp_load_progress(progress_header, download.match_id, download.received).pack())
+
+        if download.done():
+            self.finish_map_download()
+
+    #defining function to check the map that arrived, cache it and tell the server
+    def finish_map_download(self):
+        download = self.map_download
+        self.map_download = None
+
+        if not download.verified():
+            LOGGER.warning("Map %d doesn't match its hash", download.match_map)
+            self.send_load_end(download.match_id, download.match_map, QGP_LOAD_FAILED)
+            return
+
+        #the map is used from the cache so the download buffer can be dropped
+        try:
+            CLIENT_ASSET_CACHE.put(download.buffer, download.map_hash)
+            self.map_data = CLIENT_ASSET_CACHE.get(download.map_hash)
+        except OSError as e:
+            LOGGER.warning("Map %d can't be cached: %s", download.match_map, e)
+            self.map_data = download.data()
+
+        LOGGER.info("Map %d loaded", download.match_map)
+        self.send_load_end(download.match_id, download.match_map, QGP_LOAD_DONE)
+
+    #defining function to tell the server the map is loaded or can't be
+    def send_load_end(self, match_id, match_map, load_status):
+        end_header = qgp_header(version=1, msg_type=QGP_MSG_LD_MATCH_END, msg_len=0, priority=0)
+        self.queue_qgp_pdu(qgp_load_end(end_header, match_id, match_map, load_status).pack())
+
+    def handle_text_chat(self, headers, server_chat, stream_id):
+        if isinstance(server_chat, str):
+            LOGGER.warning("Invalid text chat: %s", server_chat)
+            return
+
+        log_pdu(LOGGER, headers.msg_type, "Server chat message: %s", server_chat.text)
+
+    def handle_player_snapshot(self, headers, snapshot, stream_id):
+        if isinstance(snapshot, str):
+            LOGGER.warning("Invalid snapshot: %s", snapshot)
+            return
+
+        #a full snapshot replaces whatever the client had
+        records = self.delta_decoder.apply_snapshot(snapshot)
+        log_pdu(LOGGER, headers.msg_type, "Snapshot tick %d with %d players", snapshot.tick, len(records))
+        self.send_snapshot_ack(snapshot.tick)
+
+    def handle_player_delta(self, headers, delta, stream_id):
+        if isinstance(delta, str):
+            LOGGER.warning("Invalid delta: %s", delta)
+            return
+
+        #without the baseline the delta can't be applied, the server sends a keyframe once the ack is too old
+        records = self.delta_decoder.apply_delta(delta)
+        if records is None:
+            LOGGER.info("Delta tick %d dropped, baseline %d is missing", delta.tick, delta.baseline_tick)
+            return
+
+        log_pdu(LOGGER, headers.msg_type, "Delta tick %d with %d changes, %d players", delta.tick, len(delta.entries), len(records))
+        self.send_snapshot_ack(delta.tick)
+
+    #defining function to tell the server which snapshot it can send deltas against
+    def send_snapshot_ack(self, tick):
+        ack_header = qgp_header(version=1, msg_type=QGP_MSG_SNAPSHOT_ACK, msg_len=0, priority=0)
+        self.queue_qgp_pdu(qgp_snapshot_ack(ack_header, tick).pack())
+
+    def handle_game_end(self, headers, game_end, stream_id):
+        if isinstance(game_end, str):
+            LOGGER.warning("Invalid game end: %s", game_end)
+            return
+
+        # logging the details of the payload
+        log_pdu(LOGGER, headers.msg_type, "Game end for match %d type %d duration %d map %d mode %d team %d "
+                "with %d players %s", game_end.match_id, game_end.match_type, game_end.match_duration,
+                game_end.match_map, game_end.match_mode, game_end.match_team, game_end.match_players,
+                list(game_end.match_player_ids))
+
+        #the per player stats are only worth formatting when debugging
+        LOGGER.debug("Match %d kills %s deaths %s assists %s team kills %s team deaths %s team assists %s",
+                     game_end.match_id, list(game_end.match_player_kills), list(game_end.match_player_deaths),
+                     list(game_end.match_player_assists), list(game_end.match_player_teamkills),
+                     list(game_end.match_player_teamdeaths), list(game_end.match_player_teamassists))
+
+        #changing the dfa status
+        self.current_dfa_state = client_dfa_state.GAME_OVER
+
+    #the state is valid but the message type isn't expected in it
+    def handle_invalid_header(self, headers, payload, stream_id):
+        LOGGER.warning("Server sent message type 0x%04x outside of valid headers, sending a client error",
+                       headers.msg_type)
+        args = ["6", "0", "Client sent a packet outside of valid headers"]
+        packaged_pdu = server_error_sender(args)
+        # checking a pdu package was returned and if so sending it
+        if packaged_pdu is None:
+            LOGGER.warning("Invalid arguments provided for a client error")
+        else:
+            sender(packaged_pdu)
+
+    #the message arrived in a state that doesn't accept any messages
+    def handle_invalid_state(self, headers, payload, stream_id):
+        LOGGER.warning("Server sent message type 0x%04x outside of next expected state, sending a client error",
+                       headers.msg_type)
+        args = ["7", "0", "Received packet outside of next expected state"]
+        packaged_pdu = client_error_sender(args)
+        # checking a pdu package was returned and if so sending it
+        if packaged_pdu is None:
+            LOGGER.warning("Invalid arguments provided for a client error")
+        else:
+            sender(packaged_pdu)
 
     def send_qgp_client_hello(self):
-        stream_id = 0
-        self._client_hello_sent_on_stream = stream_id
-
         header = qgp_header(version=1, msg_type=QGP_MSG_CLIENT_HELLO, msg_len=0, priority=0)
-        client_hello_payload = qgp_client_hello(header=header, client_id=1, client_version=1, capabilities="test_env")
+        client_hello_payload = qgp_client_hello(header=header, client_id=1, client_version=1, capabilities=format_capabilities(self.local_capabilities()))
         packed = client_hello_payload.pack()
-        self._quic.send_stream_data(stream_id, packed, end_stream=False)
+
+        #the hello opens the control channel
+        self.channels.send(packed, qgp_channel.CONTROL)
+        self._client_hello_sent_on_stream = self.channels.stream_id(qgp_channel.CONTROL)
         self.current_dfa_state = client_dfa_state.AWAITING_SERVER_HELLO
-        print("client hello sent")
+        LOGGER.debug("Client hello sent")
 
-    #helper method to send PDUs to server
-    async def send_qgp_pdu(self, pdu_instance, dfa_status, stream_id_to_use: Optional[int] = None, end_stream=False):
-        #using the packed PDU
-        packed_pdu = pdu_instance
+    #defining function to get the capabilities offered in the client hello
+    def local_capabilities(self):
+        capabilities = {"test_env", QGP_CAP_COMPACT_MOVEMENT, QGP_CAP_HEADER_V2}
+
+        #datagrams need the QUIC DATAGRAM extension turned on in the configuration
+        if self._quic.configuration.max_datagram_frame_size:
+            capabilities.add(QGP_CAP_DATAGRAM)
+
+        #offering the cached maps so the server doesn't send them again
+        self.advertised_assets = set(CLIENT_ASSET_CACHE.digests(QGP_MAX_ADVERTISED_ASSETS))
+        capabilities |= asset_capabilities(self.advertised_assets)
+
+        return capabilities
 
+    #defining function to queue an already packed PDU for the server without creating a task
+    #the PDU is flushed with everything else queued this tick
+    def queue_qgp_pdu(self, packed_pdu, dfa_status=None):
         # changing the DFA if needed
         if dfa_status is not None:
             self.current_dfa_state = dfa_status
 
+        #sending movement in the compact format when both sides support it
+        if self.compact_movement and qgp_header.peek_msg_type(packed_pdu) == QGP_MSG_PLAYER_MOVEMENT:
+            packed_pdu = compact_movement(packed_pdu)
+
+        if not self.scheduler.send(packed_pdu):
+            LOGGER.warning("Send queue full, dropped low priority PDU")
+
+    #helper method to send PDUs to server
+    async def send_qgp_pdu(self, pdu_instance, dfa_status, stream_id_to_use: Optional[int] = None, end_stream=False):
+        #using the packed PDU
+        packed_pdu = pdu_instance
+
+        #queueing the packet for its persistent channel unless a stream was asked for
+        #everything queued this tick is flushed together with one transmit()
         if stream_id_to_use is None:
-            stream_id = self._quic.get_next_available_stream_id(
-                is_unidirectional=False)  # Or True for one-way broadcast
+            self.queue_qgp_pdu(packed_pdu, dfa_status)
         else:
-            stream_id = stream_id_to_use
-        print("Stream id", stream_id)
-
-        self._quic.send_stream_data(stream_id, packed_pdu, end_stream=True)
-        self.transmit()
-        print("Sent response")
+            # changing the DFA if needed
+            if dfa_status is not None:
+                self.current_dfa_state = dfa_status
+
+            self._quic.send_stream_data(stream_id_to_use, packed_pdu, end_stream=end_stream)
+            self.transmit()
+
+        LOGGER.debug("Sent message type 0x%04x", qgp_header.peek_msg_type(packed_pdu))
+
+#routing the QUIC events by their type
+CLIENT_EVENT_HANDLERS = {
+    HandshakeCompleted: qgp_client_protocol.handle_handshake_completed,
+    StreamDataReceived: qgp_client_protocol.handle_stream_data,
+    DatagramFrameReceived: qgp_client_protocol.handle_datagram,
+}
+
+#building the PDU routing table once so the hot path is a dict lookup
+CLIENT_DISPATCHER = qgp_dispatcher(default_handler=qgp_client_protocol.handle_invalid_state)
+CLIENT_DISPATCHER.register(qgp_dispatcher.ANY_STATE, QGP_MSG_SERVER_ERROR, qgp_client_protocol.handle_server_error)
+
+CLIENT_DISPATCHER.register(client_dfa_state.AWAITING_SERVER_HELLO, QGP_MSG_SERVER_HELLO, qgp_client_protocol.handle_server_hello)
+CLIENT_DISPATCHER.register_state_default(client_dfa_state.AWAITING_SERVER_HELLO, qgp_client_protocol.handle_invalid_hello)
+
+#a client that has joined a match is already IN_GAME when the match's game start arrives
+CLIENT_DISPATCHER.register((client_dfa_state.HANDSHAKE_COMPLETED, client_dfa_state.GAME_OVER, client_dfa_state.IN_GAME,
+                            client_dfa_state.LOADING),
+                           QGP_MSG_GAME_START, qgp_client_protocol.handle_game_start)
+
+CLIENT_DISPATCHER.register(client_dfa_state.IN_GAME, QGP_MSG_TEXT_CHAT, qgp_client_protocol.handle_text_chat)
+CLIENT_DISPATCHER.register(client_dfa_state.IN_GAME, QGP_MSG_GAME_END, qgp_client_protocol.handle_game_end)
+#the match's first snapshot can arrive on the gameplay channel before the match found on the control channel
+#and the state sent from the game start can arrive before the game start itself
+CLIENT_DISPATCHER.register((client_dfa_state.IN_GAME, client_dfa_state.IN_QUEUE, client_dfa_state.LOADING),
+                           QGP_MSG_PLAYER_SNAPSHOT, qgp_client_protocol.handle_player_snapshot)
+CLIENT_DISPATCHER.register((client_dfa_state.IN_GAME, client_dfa_state.IN_QUEUE, client_dfa_state.LOADING),
+                           QGP_MSG_PLAYER_DELTA, qgp_client_protocol.handle_player_delta)
+
+#a leave or rejection can be answered after the client has moved on
+CLIENT_DISPATCHER.register((client_dfa_state.IN_QUEUE, client_dfa_state.HANDSHAKE_COMPLETED, client_dfa_state.GAME_OVER),
+                           QGP_MSG_Q_RES, qgp_client_protocol.handle_queue_response)
+CLIENT_DISPATCHER.register((client_dfa_state.IN_QUEUE, client_dfa_state.LOADING), QGP_MSG_MATCH, qgp_client_protocol.handle_match_found)
+
+#the load start is sent on the bulk channel so it can arrive before the match found on the control channel
+CLIENT_DISPATCHER.register((client_dfa_state.IN_QUEUE, client_dfa_state.LOADING, client_dfa_state.HANDSHAKE_COMPLETED,
+                            client_dfa_state.GAME_OVER), QGP_MSG_LD_MATCH_START, qgp_client_protocol.handle_load_start)
+#a match that timed out waiting for this client has started, the rest of the map still arrives in game
+CLIENT_DISPATCHER.register((client_dfa_state.LOADING, client_dfa_state.IN_GAME), QGP_MSG_LD_MAP_CHUNK, qgp_client_protocol.handle_map_chunk)
+CLIENT_DISPATCHER.register_state_default((client_dfa_state.HANDSHAKE_COMPLETED,
+                                          client_dfa_state.GAME_OVER,
+                                          client_dfa_state.IN_GAME,
+                                          client_dfa_state.IN_QUEUE,
+                                          client_dfa_state.LOADING),
+                                         qgp_client_protocol.handle_invalid_header)
 
 # --- CLI Handling ---
 async def process_commands(command_queue: asyncio.Queue, loop: asyncio.AbstractEventLoop):
@@ -251,24 +499,14 @@ async def process_commands(command_queue: asyncio.Queue, loop: asyncio.AbstractE
                 print(f"[Server CLI] Broadcasting chat: '{message_text}'")
                 chat_header = qgp_header(
                     version=1,
-                    msg_type=0,
+                    msg_type=QGP_MSG_TEXT_CHAT,
                     msg_len=0,
                     priority=1
                 )
                 chat_pdu = qgp_text_chat(chat_header, text_length=len(message_text), text=message_text)
 
-                clients_to_send_snapshot = list(ACTIVE_CLIENTS)
-                if not clients_to_send_snapshot:
-                    print("[Server CLI] No active clients to broadcast to.")
-                for client_protocol in clients_to_send_snapshot:
-                    if hasattr(client_protocol, 'send_qgp_pdu') and client_protocol._quic is not None:
-                        # Use asyncio.create_task for safety from within another coroutine
-                        asyncio.create_task(client_protocol.send_qgp_pdu(chat_pdu, stream_id_to_use=None))
-                    else:
-                        peer_addr_display = client_protocol.resolved_peer_address if hasattr(client_protocol,
-                                                                                             'resolved_peer_address') and client_protocol.resolved_peer_address else "Unknown Client"
-                        print(
-                            f"[Server CLI] Cannot send to client {peer_addr_display}: missing send_qgp_pdu or not fully connected.")
+                #packing the chat once and queueing the same bytes on every connection
+                sender(chat_pdu.pack())
             else:
                 print("[Server CLI] Usage: broadcast_chat <message>")
 
@@ -323,6 +561,28 @@ async def process_commands(command_queue: asyncio.Queue, loop: asyncio.AbstractE
             else:
                 sender(packaged_pdu, dfa)
 
+        # sending the queue command
+        elif cmd == "queue":
+            packaged_pdu = queue_request(args)
+            dfa = client_dfa_state.IN_QUEUE
+
+            # checking a pdu package was returned and if so sending it
+            if packaged_pdu is None:
+                print("Invalid arguments provided")
+            else:
+                sender(packaged_pdu, dfa)
+
+        # sending the leave_queue command
+        elif cmd == "leave_queue":
+            packaged_pdu = leave_queue(args)
+            dfa = client_dfa_state.HANDSHAKE_COMPLETED
+
+            # checking a pdu package was returned and if so sending it
+            if packaged_pdu is None:
+                print("Invalid arguments provided")
+            else:
+                sender(packaged_pdu, dfa)
+
         # sending the player_leave command
         elif cmd == "player_status":
             packaged_pdu = player_status(args)
@@ -399,18 +659,16 @@ def sender(packaged_pdu, dfa_status = None):
     if not clients_to_send_snapshot:
         print("[client CLI] No active servers to broadcast to.")
 
-    #looping through the active clients and sending the error
-    print(clients_to_send_snapshot)
+    #looping through the active clients and queueing the PDU without creating a task
     for client_protocol in clients_to_send_snapshot:
-        if hasattr(client_protocol, 'send_qgp_pdu') and client_protocol._quic is not None:
-            # Use asyncio.create_task for safety from within another coroutine
-            asyncio.create_task(client_protocol.send_qgp_pdu(packaged_pdu, dfa_status=dfa_status, stream_id_to_use=None))
+        if client_protocol._quic is not None:
+            client_protocol.queue_qgp_pdu(packaged_pdu, dfa_status)
 
         else:
             peer_addr_display = client_protocol.resolved_peer_address if hasattr(client_protocol,
                                                                                  'resolved_peer_address') and client_protocol.resolved_peer_address else "Unknown Sever"
             print(
-                f"[Client CLI] Cannot send to server {peer_addr_display}: missing send_qgp_pdu or not fully connected.")
+                f"[Client CLI] Cannot send to server {peer_addr_display}: not fully connected.")
 
 #defining the main function
 async def main():
@@ -422,6 +680,12 @@ async def main():
     #loading the ssl cert
     config.load_verify_locations(cafile="test_cert.pem")
 
+    #allowing movement updates to use QUIC datagrams
+    config.max_datagram_frame_size = QGP_MAX_DATAGRAM_FRAME_SIZE
+
+    #writing the logs from a background thread
+    start_logging()
+
     async with connect(configuration = config,
                               port = QGP_PORT,
                               host = QGP_HOST,
@@ -453,6 +717,10 @@ async def main_with_cli():
     )
     config.load_verify_locations(cafile="test_cert.pem")
     config.idle_timeout = 1200
+    config.max_datagram_frame_size = QGP_MAX_DATAGRAM_FRAME_SIZE
+
+    #writing the logs from a background thread
+    start_logging()
 
     command_queue = asyncio.Queue()
     loop = asyncio.get_running_loop()
@@ -14,10 +14,16 @@ QGP_MSG_PLAYER_JOIN = 0x0017
 QGP_MSG_PLAYER_LEAVE =0x0018 
 QGP_MSG_OWN_PLAYER_LEAVE =0x0019
 QGP_MSG_PLAYER_STATUS = 0x001A
+QGP_MSG_LD_MAP_CHUNK = 0x001B
+QGP_MSG_LD_PROGRESS = 0x001C
 QGP_MSG_TEXT_CHAT = 0x0020 
 QGP_MSG_VOICE_CHAT = 0x0021 
 QGP_MSG_PLAYER_MOVEMENT = 0x0100 
 QGP_MSG_PLAYER_ACTION = 0x0101 
+QGP_MSG_PLAYER_SNAPSHOT = 0x0102
+QGP_MSG_PLAYER_DELTA = 0x0103
+QGP_MSG_SNAPSHOT_ACK = 0x0104
+QGP_MSG_PLAYER_MOVEMENT_COMPACT = 0x0105
 QGP_MSG_SERVER_ERROR = 0x0200 
 QGP_MSG_CLIENT_ERROR = 0x0201 
 QGP_MSG_LATENCY_WARN = 0x0202 
@@ -26,10 +32,54 @@ QGP_MSG_NAT_WARN = 0x0204
 QGP_MSG_ANTICHEAT_WARN = 0x0205 
 QGP_MSG_UNKNOWN_ERROR = 0x0206
 
+#error codes sent by the server
+QGP_ERROR_KICKED = 10
+QGP_ERROR_PLAYER_ID_TAKEN = 11
+QGP_ERROR_INVALID_PDU = 12
+
+#queue request actions
+QGP_QUEUE_LEAVE = 0
+QGP_QUEUE_JOIN = 1
+
+#queue response statuses
+QGP_QUEUE_LEFT = 0
+QGP_QUEUE_JOINED = 1
+QGP_QUEUE_REJECTED = 2
+
+#load end statuses
+QGP_LOAD_DONE = 0
+QGP_LOAD_FAILED = 1
+
+#message types that get a one byte type code in the v2 header, the code is the index
+#new types must only be added at the end so existing codes don't change
+QGP_V2_COMMON_MSG_TYPES = (
+    QGP_MSG_PLAYER_MOVEMENT,
+    QGP_MSG_PLAYER_MOVEMENT_COMPACT,
+    QGP_MSG_PLAYER_STATUS,
+    QGP_MSG_PLAYER_ACTION,
+    QGP_MSG_PLAYER_SNAPSHOT,
+    QGP_MSG_PLAYER_DELTA,
+    QGP_MSG_SNAPSHOT_ACK,
+    QGP_MSG_TEXT_CHAT,
+    QGP_MSG_VOICE_CHAT,
+)
+
 #Control constants
 QGP_VERSION = 1
 QGP_ALPN = ['qgp/1.0']
 
+#capability tokens exchanged in the hello capabilities string
+QGP_CAP_DATAGRAM = "datagram"
+QGP_CAP_COMPACT_MOVEMENT = "compact_move"
+QGP_CAP_HEADER_V2 = "hdr2"
+
+#prefix of the tokens a client sends for each asset it has cached, followed by the asset's sha256 in hex
+QGP_CAP_ASSET_PREFIX = "asset:"
+
+#largest QUIC DATAGRAM frame accepted and the largest PDU sent as a datagram
+QGP_MAX_DATAGRAM_FRAME_SIZE = 65536
+QGP_MAX_DATAGRAM_PDU_SIZE = 1100
+
 #defining the connection constants
 QGP_HOST = "localhost"
 QGP_PORT = 5544
@@ -0,0 +1,65 @@
+import sys, struct
+from array import array
+from functools import lru_cache
+
+#defining the helpers for moving blocks of uint32 values on and off the wire
+#a whole block is copied with one call instead of one struct call per value
+#the wire is big endian so the values are byteswapped on little endian machines
+
+#the array type code with 4 byte items
+UINT32_TYPECODE = "I" if array("I").itemsize == 4 else "L"
+UINT32_SIZE = 4
+
+#checking if the machine already stores values in network order
+NATIVE_IS_NETWORK_ORDER = sys.byteorder == "big"
+
+#defining function to make a uint32 array
+def uint32_array(values=()):
+    return array(UINT32_TYPECODE, values)
+
+#defining function to get a cached struct for count uint32 values in network order
+#for callers that still want a struct instead of an array
+@lru_cache(maxsize=256)
+def uint32_struct(count):
+    return struct.Struct("!%dI" % count)
+
+#defining function to write uint32 values into a buffer in network order
+#values can be an array or any sequence of ints, the caller's values are never changed
+#returns the offset after the written values
+def pack_uint32_into(buffer, offset, values):
+    if not NATIVE_IS_NETWORK_ORDER:
+        #swapping a copy in place so the caller's array keeps native order
+        values = array(UINT32_TYPECODE, values)
+        values.byteswap()
+    elif not isinstance(values, array) or values.typecode != UINT32_TYPECODE:
+        values = array(UINT32_TYPECODE, values)
+
+    end = offset + len(values) * UINT32_SIZE
+    memoryview(buffer)[offset:end] = memoryview(values).cast("B")
+    return end
+
+#defining function to read count uint32 values in network order from a buffer
+def unpack_uint32_from(data, offset, count):
+    values = array(UINT32_TYPECODE)
+    values.frombytes(memoryview(data)[offset:offset + count * UINT32_SIZE])
+
+    if not NATIVE_IS_NETWORK_ORDER:
+        values.byteswap()
+
+    return values
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP ARRAY HELPERS
+    ############################################################################
+    values = uint32_array([1, 2, 0xFFFFFFFF, 70000])
+    buffer = bytearray(4 + len(values) * UINT32_SIZE)
+    end = pack_uint32_into(buffer, 4, values)
+    print("packed", bytes(buffer).hex(), "end", end)
+
+    #checking the block matches what struct writes
+    print("matches struct", bytes(buffer[4:]) == struct.pack("!4I", *values))
+    print("unpacked", list(unpack_uint32_from(buffer, 4, len(values))))
+    print("from a list", pack_uint32_into(bytearray(8), 0, [5, 6]), "cached struct", uint32_struct(4) is uint32_struct(4))
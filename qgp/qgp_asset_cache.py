@@ -0,0 +1,202 @@
+import hashlib, mmap, os
+#importing the libraries in a way so this file can be ran in isolation for testing
+try:
+    from pdu_constants import QGP_CAP_ASSET_PREFIX
+    from qgp_logging import get_logger
+except:
+    from qgp.pdu_constants import QGP_CAP_ASSET_PREFIX
+    from qgp.qgp_logging import get_logger
+
+#the directory cached assets are kept in, each one is stored as <sha256 hex>.qasset
+QGP_ASSET_CACHE_DIRECTORY = "asset_cache"
+
+#the most cached assets advertised in the hello, the most recently used ones first
+QGP_MAX_ADVERTISED_ASSETS = 64
+
+QGP_ASSET_SUFFIX = ".qasset"
+
+LOGGER = get_logger("assets")
+
+#defining function to get the sha256 digest an asset is stored under
+def asset_digest(data):
+    return hashlib.sha256(data).digest()
+
+#defining function to turn asset digests into hello capability tokens
+def asset_capabilities(digests):
+    return {QGP_CAP_ASSET_PREFIX + digest.hex() for digest in digests}
+
+#defining function to get the asset digests out of a set of hello capability tokens
+#tokens that aren't a whole sha256 digest are ignored
+def parse_asset_capabilities(tokens):
+    digests = set()
+    for token in tokens:
+        if token.startswith(QGP_CAP_ASSET_PREFIX):
+            try:
+                digest = bytes.fromhex(token[len(QGP_CAP_ASSET_PREFIX):])
+            except ValueError:
+                continue
+            if len(digest) == hashlib.sha256().digest_size:
+                digests.add(digest)
+
+    return digests
+
+#defining the class for the assets a client keeps on disk between matches
+#assets are keyed by the sha256 of their content so the same map is stored once whatever it is called
+#reads are memory mapped so an asset is used straight from the page cache without copying it into python
+#a file is checked against its digest the first time it is mapped and dropped if it doesn't match
+class qgp_asset_cache:
+    #defining the class variables
+    def __init__(self, directory=QGP_ASSET_CACHE_DIRECTORY):
+        self.directory = directory
+
+        #digest -> path of every asset on disk
+        self.files = {}
+
+        #digest -> (mmap, memoryview) of the assets that have been read
+        self.mapped = {}
+
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if not name.endswith(QGP_ASSET_SUFFIX):
+                    continue
+                try:
+                    digest = bytes.fromhex(name[:-len(QGP_ASSET_SUFFIX)])
+                except ValueError:
+                    continue
+                self.files[digest] = os.path.join(directory, name)
+
+    def __len__(self):
+        return len(self.files)
+
+    def __contains__(self, digest):
+        return digest in self.files
+
+    #defining function to get the digests of the cached assets, the most recently used first
+    def digests(self, limit=None):
+        def last_used(digest):
+            try:
+                return os.path.getmtime(self.files[digest])
+            except OSError:
+                return 0
+
+        digests = sorted(self.files, key=last_used, reverse=True)
+        return digests if limit is None else digests[:limit]
+
+    #defining function to get a read only view of an asset, or None if it isn't cached
+    def get(self, digest):
+        mapped = self.mapped.get(digest)
+        if mapped is not None:
+            return mapped[1]
+
+        path = self.files.get(digest)
+        if path is None:
+            return None
+
+        try:
+            with open(path, "rb") as asset_file:
+                #an empty file can't be mapped
+                if os.fstat(asset_file.fileno()).st_size == 0:
+                    asset_map, view = None, memoryview(b"")
+                else:
+                    asset_map = mmap.mmap(asset_file.fileno(), 0, access=mmap.ACCESS_READ)
+                    view = memoryview(asset_map)
+            os.utime(path)
+        except OSError as e:
+            LOGGER.warning("Dropping cached asset %s: %s", digest.hex(), e)
+            self.files.pop(digest, None)
+            return None
+
+        #a file that was changed or cut short on disk is thrown away
+        if asset_digest(view) != digest:
+            LOGGER.warning("Dropping cached asset %s, its content doesn't match", digest.hex())
+            view.release()
+            if asset_map is not None:
+                asset_map.close()
+            self.remove(digest)
+            return None
+
+        self.mapped[digest] = (asset_map, view)
+        return view
+
+    #defining function to store an asset
+    #returns its digest, the file is written under a temporary name first so a crash can't leave half of it
+    def put(self, data, digest=None):
+        if digest is None:
+            digest = asset_digest(data)
+        if digest in self.files:
+            return digest
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, digest.hex() + QGP_ASSET_SUFFIX)
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "wb") as asset_file:
+            asset_file.write(data)
+        os.replace(temporary_path, path)
+
+        self.files[digest] = path
+        return digest
+
+    #defining function to unmap an asset and delete its file
+    def remove(self, digest):
+        self.unmap(digest)
+        path = self.files.pop(digest, None)
+        if path is not None:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    #defining function to unmap an asset, the view it returned can't be used afterwards
+    def unmap(self, digest):
+        mapped = self.mapped.pop(digest, None)
+        if mapped is not None:
+            asset_map, view = mapped
+            view.release()
+            if asset_map is not None:
+                asset_map.close()
+
+    #defining function to unmap every asset
+    def close(self):
+        for digest in list(self.mapped):
+            self.unmap(digest)
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP ASSET CACHE
+    ############################################################################
+    import tempfile, time
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = qgp_asset_cache(directory)
+        map_data = os.urandom(4 * 1024 * 1024)
+        digest = cache.put(map_data)
+        print("stored", digest.hex()[:16], "cached", digest in cache, "assets", len(cache))
+
+        #a new cache finds the asset on disk and maps it
+        cache = qgp_asset_cache(directory)
+        view = cache.get(digest)
+        print("mapped", len(view), "matches", view == map_data, "read only", view.readonly)
+
+        tokens = asset_capabilities(cache.digests(QGP_MAX_ADVERTISED_ASSETS)) | {"hdr2", QGP_CAP_ASSET_PREFIX + "xyz"}
+        print("advertised", [digest.hex()[:16] for digest in parse_asset_capabilities(tokens)])
+
+        #timing a repeat read from the map against reading the file
+        rounds = 200
+        start = time.perf_counter()
+        for _ in range(rounds):
+            cache.get(digest)
+        mapped_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(rounds):
+            with open(cache.files[digest], "rb") as asset_file:
+                asset_file.read()
+        read_time = time.perf_counter() - start
+        print(f"4MB asset: mapped {mapped_time / rounds * 1e6:.1f}us, read {read_time / rounds * 1e6:.0f}us")
+
+        #a corrupted file is dropped the first time it is mapped
+        cache.close()
+        with open(cache.files[digest], "r+b") as asset_file:
+            asset_file.write(b"x")
+        print("corrupted", cache.get(digest), "still cached", digest in cache)
@@ -0,0 +1,137 @@
+#importing the libraries in a way so this file can be ran in isolation for testing
+try:
+    from pdu_constants import *
+    from qgp_header import qgp_header
+    from qgp_datagram import qgp_datagram_channel
+except:
+    from qgp.pdu_constants import *
+    from qgp.qgp_header import qgp_header
+    from qgp.qgp_datagram import qgp_datagram_channel
+
+#defining the persistent channels opened on each connection
+#each channel is its own QUIC stream so a stalled channel can't block the others
+class qgp_channel:
+    CONTROL = 0
+    CHAT = 1
+    GAMEPLAY = 2
+    BULK = 3
+
+    #not a stream, PDUs sent here go out as unreliable QUIC DATAGRAM frames
+    DATAGRAM = 4
+
+#mapping each message type to the channel it is sent on
+#anything not listed here goes on the control channel
+QGP_CHANNEL_BY_MSG_TYPE = {
+    QGP_MSG_TEXT_CHAT: qgp_channel.CHAT,
+    QGP_MSG_VOICE_CHAT: qgp_channel.CHAT,
+    QGP_MSG_PLAYER_MOVEMENT: qgp_channel.GAMEPLAY,
+    QGP_MSG_PLAYER_MOVEMENT_COMPACT: qgp_channel.GAMEPLAY,
+    QGP_MSG_PLAYER_ACTION: qgp_channel.GAMEPLAY,
+    QGP_MSG_PLAYER_STATUS: qgp_channel.GAMEPLAY,
+    QGP_MSG_PLAYER_SNAPSHOT: qgp_channel.GAMEPLAY,
+    QGP_MSG_PLAYER_DELTA: qgp_channel.GAMEPLAY,
+    QGP_MSG_SNAPSHOT_ACK: qgp_channel.GAMEPLAY,
+    QGP_MSG_GAME_END: qgp_channel.BULK,
+    QGP_MSG_LD_MATCH_START: qgp_channel.BULK,
+    QGP_MSG_LD_MAP_CHUNK: qgp_channel.BULK,
+}
+
+#defining the class that multiplexes PDUs onto the persistent channel streams
+class qgp_channel_manager:
+    #defining the class variables
+    def __init__(self, quic):
+        self.quic = quic
+        self.stream_ids = {}
+
+        #the datagram channel is only used once both sides agreed to it in the hello
+        self.datagrams = qgp_datagram_channel(quic)
+        self.datagrams_enabled = False
+
+        #PDUs are packed with a v1 header and switched to v2 as they are written once both sides agree
+        self.header_version = 1
+
+    #defining function to get the stream of a channel, opening it the first time it's used
+    def stream_id(self, channel):
+        stream_id = self.stream_ids.get(channel)
+        if stream_id is None:
+            stream_id = self.quic.get_next_available_stream_id(is_unidirectional=False)
+            self.stream_ids[channel] = stream_id
+
+        return stream_id
+
+    #defining function to use a stream the peer opened as one of our channels
+    def adopt(self, channel, stream_id):
+        self.stream_ids.setdefault(channel, stream_id)
+
+    #defining function to start sending latest-value-wins PDUs as datagrams
+    def enable_datagrams(self):
+        self.datagrams_enabled = True
+
+    #defining function to start writing the compact v2 header
+    def enable_header_v2(self):
+        self.header_version = qgp_header.V2_VERSION
+
+    #defining function to get the channel a packed PDU belongs on
+    @staticmethod
+    def channel_for(packed_pdu):
+        return QGP_CHANNEL_BY_MSG_TYPE.get(qgp_header.peek_msg_type(packed_pdu), qgp_channel.CONTROL)
+
+    #defining function to write a packed PDU to its channel without closing the stream
+    #the caller is responsible for calling transmit() afterwards
+    def send(self, packed_pdu, channel=None):
+        if channel is None:
+            msg_type = qgp_header.peek_msg_type(packed_pdu)
+
+            #movement and other latest-value-wins PDUs skip the reliable streams when possible
+            if self.datagrams_enabled and self.datagrams.accepts(msg_type, packed_pdu):
+                if self.header_version == qgp_header.V2_VERSION:
+                    packed_pdu = qgp_header.to_v2(packed_pdu)
+                self.datagrams.send(packed_pdu)
+                return qgp_channel.DATAGRAM
+
+            channel = QGP_CHANNEL_BY_MSG_TYPE.get(msg_type, qgp_channel.CONTROL)
+
+        if self.header_version == qgp_header.V2_VERSION:
+            packed_pdu = qgp_header.to_v2(packed_pdu)
+
+        self.quic.send_stream_data(self.stream_id(channel), packed_pdu, end_stream=False)
+        return channel
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP CHANNEL MANAGER
+    ############################################################################
+    try:
+        from qgp_player import qgp_player_movement
+        from qgp_communication import qgp_text_chat
+    except:
+        from qgp.qgp_player import qgp_player_movement
+        from qgp.qgp_communication import qgp_text_chat
+
+    #defining a stand in for the QUIC connection that records the writes
+    class debug_quic:
+        def __init__(self):
+            self.streams = {}
+
+        def get_next_available_stream_id(self, is_unidirectional=False):
+            stream_id = 0
+            while stream_id in self.streams:
+                stream_id += 4
+            return stream_id
+
+        def send_stream_data(self, stream_id, data, end_stream=False):
+            self.streams.setdefault(stream_id, []).append((len(data), end_stream))
+
+    quic = debug_quic()
+    channels = qgp_channel_manager(quic)
+
+    move_header = qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+    chat_header = qgp_header(version=1, msg_type=QGP_MSG_TEXT_CHAT, msg_len=0, priority=1)
+    for i in range(3):
+        channels.send(qgp_player_movement(move_header, 1, 0, 0, i, i, i, 1).pack())
+    channels.send(qgp_text_chat(chat_header, 5, "hello").pack())
+
+    print("channel streams", channels.stream_ids)
+    print("writes per stream", quic.streams)
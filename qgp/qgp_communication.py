@@ -2,57 +2,65 @@ import struct
 #importing the libraries in a way so this file can be ran in isolation for testing
 try:
     from pdu_constants import *
-    from qgp_header import qgp_header
+    from qgp_header import qgp_header, QGP_ENCODE_BUFFER
 except:
     from qgp.pdu_constants import *
-    from qgp.qgp_header import qgp_header
+    from qgp.qgp_header import qgp_header, QGP_ENCODE_BUFFER
 
 #defining class for qgp text chat
 class qgp_text_chat:
+    #text length and the encoded text length
+    PAYLOAD_FIXED_FORMAT = "!H H"
+    PAYLOAD_FIXED_STRUCT = struct.Struct(PAYLOAD_FIXED_FORMAT)
+    PAYLOAD_FIXED_SIZE = PAYLOAD_FIXED_STRUCT.size
+    PDU_STRUCT = qgp_header.pdu_struct(PAYLOAD_FIXED_FORMAT)
+
     #defining the class variables
     def __init__(self, header, text_length, text):
         self.header = header
         self.text_length = text_length
         self.text = text
 
-    #defining the function to pack the values
-    def pack(self):
-        # packing the payload with the client id and client version
-        payload = b''
-        payload = struct.pack("!H", self.text_length)
+    #defining the function to get the size of the packed PDU
+    def packed_size(self):
+        return self.PDU_STRUCT.size + len(self.text.encode("utf-8"))
 
-        # packing the capabilities
+    #defining the function to pack the values into a buffer
+    def pack_into(self, buffer, offset=0):
+        # packing the text
         text_bytes = self.text.encode("utf-8")
-        payload += struct.pack("!H", len(text_bytes)) + text_bytes
 
         # packing the headers
-        self.header.msg_len = qgp_header.SIZE + len(payload)
+        self.header.msg_len = self.PDU_STRUCT.size + len(text_bytes)
         #self.header.msg_type = QGP_MSG_TEXT_CHAT
 
+        # packing the headers and the text lengths in one call
+        self.PDU_STRUCT.pack_into(buffer, offset, self.header.version, self.header.msg_type, self.header.msg_len,
+                                  self.header.priority, self.text_length, len(text_bytes))
+        offset += self.PDU_STRUCT.size
+        buffer[offset:offset + len(text_bytes)] = text_bytes
+
+        return offset + len(text_bytes)
+
+    #defining the function to pack the values
+    def pack(self):
         # returning the packed payload
-        return self.header.pack() + payload
+        return QGP_ENCODE_BUFFER.encode(self)
 
 
     #defining the function to unpack the payload
     @classmethod
     def unpack(cls, header, payload):
-        #defining the offset to know where everything is at
-        offset = 0
-
-        #getting the client id and version and updating the offset num
-        func_text_length  = struct.unpack_from("!H", payload, offset)
-        offset += struct.calcsize("!H")
-
-        #getting the text length
-        func_text_bytes, = struct.unpack_from("!H", payload, offset)
-        offset += struct.calcsize("!H")
+        #getting the text length and the encoded text length
+        func_text_length, func_text_bytes = cls.PAYLOAD_FIXED_STRUCT.unpack_from(payload, 0)
+        offset = cls.PAYLOAD_FIXED_SIZE
 
-        #getting the actual capabilities
-        func_text = payload[offset:offset + func_text_bytes].decode("utf-8")
+        #getting the actual text
+        func_text = str(payload[offset:offset + func_text_bytes], "utf-8")
         offset += func_text_bytes
 
         #checking the length of the message
-        if header.msg_len != qgp_header.SIZE + offset:
+        if header.msg_len != header.size + offset:
             return "Length is not expected"
 
         #returning the PDU values
@@ -0,0 +1,163 @@
+import struct
+#importing the libraries in a way so this file can be ran in isolation for testing
+try:
+    from pdu_constants import *
+    from qgp_header import qgp_header
+    from qgp_player import qgp_player_movement
+    from qgp_varint import write_uvarint, write_svarint, read_uvarint, read_svarint
+except:
+    from qgp.pdu_constants import *
+    from qgp.qgp_header import qgp_header
+    from qgp.qgp_player import qgp_player_movement
+    from qgp.qgp_varint import write_uvarint, write_svarint, read_uvarint, read_svarint
+
+#defining function to read a uint32 position as the signed value it stands for
+def to_signed32(value):
+    return value - 0x100000000 if value & 0x80000000 else value
+
+#defining the class for movement in the compact wire format
+#the player id, direction and speed are varints, the movement type is one byte
+#and the positions are zig-zag varints so negative coordinates can be sent
+#a typical update is about 16 bytes against 36 for qgp_player_movement
+class qgp_player_movement_compact:
+    #the movement type is kept to a single byte
+    MOVEMENT_TYPE_MAX = 0xFF
+
+    #slotted like qgp_player_movement
+    __slots__ = ("header", "player_id", "movement_type", "direction", "x_position", "y_position", "z_position", "speed")
+
+    #defining the class variables
+    def __init__(self, header, player_id, movement_type, direction, x_position, y_position, z_position, speed):
+        self.header = header
+        self.player_id = player_id
+        self.movement_type = movement_type
+        self.direction = direction
+        self.x_position = x_position
+        self.y_position = y_position
+        self.z_position = z_position
+        self.speed = speed
+
+    #defining function to build the compact form of a movement PDU
+    #the uint32 positions are read as signed 32 bit values
+    @classmethod
+    def from_movement(cls, movement):
+        return cls(movement.header, movement.player_id, movement.movement_type, movement.direction,
+                   to_signed32(movement.x_position), to_signed32(movement.y_position),
+                   to_signed32(movement.z_position), movement.speed)
+
+    #defining function to turn the compact form back into a movement PDU for the existing handlers
+    def to_movement(self):
+        move_header = qgp_header(version=self.header.version, msg_type=QGP_MSG_PLAYER_MOVEMENT,
+                                 msg_len=qgp_player_movement.PDU_STRUCT.size, priority=self.header.priority)
+        return qgp_player_movement(move_header, self.player_id, self.movement_type, self.direction,
+                                   self.x_position & 0xFFFFFFFF, self.y_position & 0xFFFFFFFF,
+                                   self.z_position & 0xFFFFFFFF, self.speed)
+
+    #defining function to encode the payload
+    def pack_payload(self):
+        if not 0 <= self.movement_type <= self.MOVEMENT_TYPE_MAX:
+            raise ValueError("Movement type doesn't fit in the compact format")
+
+        payload = bytearray()
+        write_uvarint(payload, self.player_id)
+        payload.append(self.movement_type)
+        write_uvarint(payload, self.direction)
+        write_svarint(payload, self.x_position)
+        write_svarint(payload, self.y_position)
+        write_svarint(payload, self.z_position)
+        write_uvarint(payload, self.speed)
+        return payload
+
+    #defining function to get the size of the packed PDU
+    def packed_size(self):
+        return qgp_header.SIZE + len(self.pack_payload())
+
+    #defining function to pack the PDU into a buffer
+    def pack_into(self, buffer, offset=0):
+        packed_pdu = self.pack()
+        buffer[offset:offset + len(packed_pdu)] = packed_pdu
+        return offset + len(packed_pdu)
+
+    #defining function to pack the PDU
+    def pack(self):
+        payload = self.pack_payload()
+
+        #creating the headers
+        self.header.msg_len = qgp_header.SIZE + len(payload)
+        self.header.msg_type = QGP_MSG_PLAYER_MOVEMENT_COMPACT
+
+        return self.header.STRUCT.pack(self.header.version, self.header.msg_type, self.header.msg_len,
+                                       self.header.priority) + payload
+
+    #defining function to unpack the PDU
+    @classmethod
+    def unpack(cls, header, payload):
+        try:
+            func_player_id, offset = read_uvarint(payload, 0)
+            func_movement_type = payload[offset]
+            func_direction, offset = read_uvarint(payload, offset + 1)
+            func_x_position, offset = read_svarint(payload, offset)
+            func_y_position, offset = read_svarint(payload, offset)
+            func_z_position, offset = read_svarint(payload, offset)
+            func_speed, offset = read_uvarint(payload, offset)
+        except (IndexError, ValueError):
+            return "Length is not expected"
+
+        # checking the length of the message
+        if header.msg_len != header.size + offset:
+            return "Length is not expected"
+
+        # returning the PDU values
+        return cls(header, func_player_id, func_movement_type, func_direction, func_x_position, func_y_position,
+                   func_z_position, func_speed)
+
+#defining function to re-encode a packed movement PDU in the compact format
+#the PDU is returned as it is if it can't be decoded or its movement type doesn't fit the compact format
+def compact_movement(packed_pdu):
+    header, payload = qgp_header.unpack(packed_pdu)
+    movement = qgp_player_movement.unpack(header, payload)
+    if isinstance(movement, str) or not 0 <= movement.movement_type <= qgp_player_movement_compact.MOVEMENT_TYPE_MAX:
+        return packed_pdu
+
+    return qgp_player_movement_compact.from_movement(movement).pack()
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP COMPACT MOVEMENT FORMAT
+    ############################################################################
+    import time
+
+    move_header = qgp_header(version=1, msg_type=QGP_MSG_PLAYER_MOVEMENT_COMPACT, msg_len=0, priority=0)
+    compact = qgp_player_movement_compact(move_header, 12, 1, 90, -250, 34, 8, 7)
+    packed_compact = compact.pack()
+
+    header, payload = qgp_header.unpack(packed_compact)
+    decoded = qgp_player_movement_compact.unpack(header, payload)
+    print("positions", decoded.x_position, decoded.y_position, decoded.z_position)
+
+    #checking the round trip through the old format keeps negative positions
+    movement = decoded.to_movement()
+    print("x through the old format", to_signed32(movement.x_position))
+
+    standard = qgp_player_movement(qgp_header(version=1, msg_type=0, msg_len=0, priority=0), 12, 1, 90, 250, 34, 8, 7)
+    packed_standard = standard.pack()
+    print("bytes per update: standard", len(packed_standard), "compact", len(packed_compact))
+
+    #timing encode and decode of both formats
+    rounds = 20000
+    standard_header, standard_payload = qgp_header.STRUCT.unpack_from(packed_standard), memoryview(packed_standard)[qgp_header.SIZE:]
+    standard_header = qgp_header(*standard_header)
+    compact_payload = memoryview(packed_compact)[qgp_header.SIZE:]
+
+    def bench(label, function):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            function()
+        print(f"{label}: {(time.perf_counter() - start) / rounds * 1e6:.2f}us")
+
+    bench("standard encode", standard.pack)
+    bench("compact encode", compact.pack)
+    bench("standard decode", lambda: qgp_player_movement.unpack(standard_header, standard_payload))
+    bench("compact decode", lambda: qgp_player_movement_compact.unpack(header, compact_payload))
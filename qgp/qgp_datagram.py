@@ -0,0 +1,132 @@
+import struct
+#importing the libraries in a way so this file can be ran in isolation for testing
+try:
+    from pdu_constants import *
+    from qgp_header import qgp_header
+    from qgp_varint import read_uvarint
+except:
+    from qgp.pdu_constants import *
+    from qgp.qgp_header import qgp_header
+    from qgp.qgp_varint import read_uvarint
+
+#message types where the newest value replaces the old one so a lost update doesn't need resending
+#the value is the payload offset of the player id the update belongs to
+QGP_DATAGRAM_MSG_TYPES = {
+    QGP_MSG_PLAYER_MOVEMENT: 0,
+    QGP_MSG_PLAYER_MOVEMENT_COMPACT: 0,
+}
+
+#message types where the player id is a varint instead of a uint32
+QGP_DATAGRAM_VARINT_ID_TYPES = {QGP_MSG_PLAYER_MOVEMENT_COMPACT}
+
+#defining the class that sends latest-value-wins PDUs as unreliable QUIC DATAGRAM frames
+#every datagram starts with a sequence number so updates that arrive late are dropped
+class qgp_datagram_channel:
+    SEQUENCE_STRUCT = struct.Struct("!I")
+    SEQUENCE_SIZE = SEQUENCE_STRUCT.size
+    PLAYER_ID_STRUCT = struct.Struct("!I")
+    SEQUENCE_MASK = 0xFFFFFFFF
+
+    #defining the class variables
+    def __init__(self, quic, max_pdu_size=QGP_MAX_DATAGRAM_PDU_SIZE):
+        self.quic = quic
+        self.max_pdu_size = max_pdu_size
+        self.send_sequence = 0
+
+        #last sequence number seen for each (msg_type, player_id)
+        self.recv_sequences = {}
+        self.dropped = 0
+
+    #defining function to check a packed PDU can go out as a datagram
+    def accepts(self, msg_type, packed_pdu):
+        return msg_type in QGP_DATAGRAM_MSG_TYPES and len(packed_pdu) <= self.max_pdu_size
+
+    #defining function to send a packed PDU in a datagram
+    def send(self, packed_pdu):
+        self.send_sequence = (self.send_sequence + 1) & self.SEQUENCE_MASK
+        self.quic.send_datagram_frame(self.SEQUENCE_STRUCT.pack(self.send_sequence) + packed_pdu)
+
+    #defining function to check a sequence number is newer than the last one using wraparound arithmetic
+    @classmethod
+    def is_newer(cls, sequence, last_sequence):
+        return sequence != last_sequence and ((sequence - last_sequence) & cls.SEQUENCE_MASK) < 0x80000000
+
+    #defining function to unwrap a received datagram
+    #returns the header and payload, or None if the datagram is stale or malformed
+    def receive(self, data):
+        if len(data) < self.SEQUENCE_SIZE + qgp_header.MIN_SIZE:
+            return None
+
+        sequence, = self.SEQUENCE_STRUCT.unpack_from(data, 0)
+        try:
+            header = qgp_header.unpack_from(data, self.SEQUENCE_SIZE)
+        except (IndexError, ValueError, struct.error):
+            return None
+
+        #checking the datagram holds exactly one PDU
+        if header.msg_len != len(data) - self.SEQUENCE_SIZE:
+            return None
+
+        #only latest-value-wins PDUs are accepted on the datagram channel
+        player_id_offset = QGP_DATAGRAM_MSG_TYPES.get(header.msg_type)
+        if player_id_offset is None:
+            return None
+
+        payload_offset = self.SEQUENCE_SIZE + header.size
+        if header.msg_type in QGP_DATAGRAM_VARINT_ID_TYPES:
+            try:
+                player_id, _ = read_uvarint(data, payload_offset + player_id_offset)
+            except (IndexError, ValueError):
+                return None
+        else:
+            if header.msg_len < header.size + player_id_offset + self.PLAYER_ID_STRUCT.size:
+                return None
+            player_id, = self.PLAYER_ID_STRUCT.unpack_from(data, payload_offset + player_id_offset)
+
+        #dropping updates older than the newest one already applied
+        key = (header.msg_type, player_id)
+        last_sequence = self.recv_sequences.get(key)
+        if last_sequence is not None and not self.is_newer(sequence, last_sequence):
+            self.dropped += 1
+            return None
+
+        self.recv_sequences[key] = sequence
+        return header, memoryview(data)[payload_offset:]
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP DATAGRAM CHANNEL
+    ############################################################################
+    try:
+        from qgp_player import qgp_player_movement
+    except:
+        from qgp.qgp_player import qgp_player_movement
+
+    #defining a stand in for the QUIC connection that records the datagrams
+    class debug_quic:
+        def __init__(self):
+            self.datagrams = []
+
+        def send_datagram_frame(self, data):
+            self.datagrams.append(data)
+
+    quic = debug_quic()
+    sender = qgp_datagram_channel(quic)
+    receiver = qgp_datagram_channel(None)
+
+    move_header = qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+    for x in range(3):
+        sender.send(qgp_player_movement(move_header, 1, 0, 0, x, 0, 0, 1).pack())
+
+    #delivering the datagrams out of order so the older ones are dropped
+    for data in (quic.datagrams[0], quic.datagrams[2], quic.datagrams[1]):
+        frame = receiver.receive(data)
+        if frame is None:
+            print("stale datagram dropped")
+        else:
+            move = qgp_player_movement.unpack(*frame)
+            print("movement x", move.x_position)
+
+    print("dropped", receiver.dropped)
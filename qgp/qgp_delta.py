@@ -0,0 +1,387 @@
+import struct
+#importing the libraries in a way so this file can be ran in isolation for testing
+try:
+    from pdu_constants import *
+    from qgp_header import qgp_header, QGP_ENCODE_BUFFER
+    from qgp_snapshot import qgp_player_snapshot, QGP_MOVEMENT_RECORD_WIDTH
+    from qgp_arrays import uint32_array
+except:
+    from qgp.pdu_constants import *
+    from qgp.qgp_header import qgp_header, QGP_ENCODE_BUFFER
+    from qgp.qgp_snapshot import qgp_player_snapshot, QGP_MOVEMENT_RECORD_WIDTH
+    from qgp.qgp_arrays import uint32_array
+
+#one mask bit for each movement field after the player id
+QGP_DELTA_FIELD_COUNT = QGP_MOVEMENT_RECORD_WIDTH - 1
+QGP_DELTA_ALL_FIELDS = (1 << QGP_DELTA_FIELD_COUNT) - 1
+
+#set in the mask when the player is no longer in the snapshot
+QGP_DELTA_REMOVED = 0x80
+
+#compiling one struct per mask so a delta entry is packed with a single call
+QGP_DELTA_ENTRY_FORMAT = "!I B"
+QGP_DELTA_ENTRY_STRUCTS = {mask: struct.Struct(QGP_DELTA_ENTRY_FORMAT + " " + "I" * bin(mask & QGP_DELTA_ALL_FIELDS).count("1"))
+                           for mask in list(range(QGP_DELTA_ALL_FIELDS + 1)) + [QGP_DELTA_REMOVED]}
+
+#defining function to turn flat snapshot records into player_id -> record tuple
+def records_by_player(records):
+    width = QGP_MOVEMENT_RECORD_WIDTH
+    return {records[start]: tuple(records[start:start + width]) for start in range(0, len(records), width)}
+
+#defining function to get the changed fields of every player between two snapshots
+#returns a list of (player_id, mask, changed values)
+def diff_records(baseline, records):
+    entries = []
+    width = QGP_MOVEMENT_RECORD_WIDTH
+    seen = set()
+
+    for start in range(0, len(records), width):
+        record = tuple(records[start:start + width])
+        player_id = record[0]
+        seen.add(player_id)
+
+        base_record = baseline.get(player_id)
+        if base_record is None:
+            #a new player sends every field
+            entries.append((player_id, QGP_DELTA_ALL_FIELDS, record[1:]))
+            continue
+
+        #setting a bit for every field that changed
+        mask = 0
+        values = []
+        for field in range(QGP_DELTA_FIELD_COUNT):
+            if record[field + 1] != base_record[field + 1]:
+                mask |= 1 << field
+                values.append(record[field + 1])
+
+        #unchanged players aren't sent at all
+        if mask:
+            entries.append((player_id, mask, tuple(values)))
+
+    #telling the client about players that left
+    for player_id in baseline:
+        if player_id not in seen:
+            entries.append((player_id, QGP_DELTA_REMOVED, ()))
+
+    return entries
+
+#defining function to apply delta entries to a baseline, returning the new player_id -> record dict
+def apply_entries(baseline, entries):
+    records = dict(baseline)
+    for player_id, mask, values in entries:
+        if mask & QGP_DELTA_REMOVED:
+            records.pop(player_id, None)
+            continue
+
+        record = list(records.get(player_id, (player_id,) + (0,) * QGP_DELTA_FIELD_COUNT))
+        value_index = 0
+        for field in range(QGP_DELTA_FIELD_COUNT):
+            if mask & (1 << field):
+                record[field + 1] = values[value_index]
+                value_index += 1
+
+        records[player_id] = tuple(record)
+
+    return records
+
+
+#defining the class for movement sent as changes against a snapshot the client acknowledged
+#each entry is the player id, a mask of the changed fields and then only those fields
+class qgp_player_delta:
+    #tick, baseline tick and the number of entries
+    PAYLOAD_FIXED_FORMAT = "!I I H"
+    PAYLOAD_FIXED_STRUCT = struct.Struct(PAYLOAD_FIXED_FORMAT)
+    PAYLOAD_FIXED_SIZE = PAYLOAD_FIXED_STRUCT.size
+    PDU_STRUCT = qgp_header.pdu_struct(PAYLOAD_FIXED_FORMAT)
+
+    #player id and field mask at the start of every entry
+    ENTRY_FORMAT = QGP_DELTA_ENTRY_FORMAT
+    ENTRY_STRUCT = struct.Struct(ENTRY_FORMAT)
+    ENTRY_STRUCTS = QGP_DELTA_ENTRY_STRUCTS
+
+    MAX_ENTRIES = 0xFFFF
+
+    __slots__ = ("header", "tick", "baseline_tick", "entries")
+
+    #defining the class variables
+    def __init__(self, header, tick, baseline_tick, entries):
+        self.header = header
+        self.tick = tick
+        self.baseline_tick = baseline_tick
+        self.entries = entries
+
+    #defining function to get the size of the packed PDU
+    def packed_size(self):
+        entry_size = self.ENTRY_STRUCT.size
+        return self.PDU_STRUCT.size + sum(entry_size + 4 * len(values) for _, _, values in self.entries)
+
+    #defining function to pack the delta into a buffer
+    def pack_into(self, buffer, offset=0):
+        if len(self.entries) > self.MAX_ENTRIES:
+            raise ValueError("Too many entries for one delta")
+
+        #creating the headers
+        self.header.msg_len = self.packed_size()
+        self.header.msg_type = QGP_MSG_PLAYER_DELTA
+
+        self.PDU_STRUCT.pack_into(buffer, offset, self.header.version, self.header.msg_type, self.header.msg_len,
+                                  self.header.priority, self.tick, self.baseline_tick, len(self.entries))
+        offset += self.PDU_STRUCT.size
+
+        #packing each entry with the struct for its mask
+        for player_id, mask, values in self.entries:
+            entry_struct = self.ENTRY_STRUCTS[mask]
+            entry_struct.pack_into(buffer, offset, player_id, mask, *values)
+            offset += entry_struct.size
+
+        return offset
+
+    #defining function to pack the delta
+    def pack(self):
+        return QGP_ENCODE_BUFFER.encode(self)
+
+    #defining function to unpack the delta
+    @classmethod
+    def unpack(cls, header, payload):
+        #making sure the fixed fields are there
+        if len(payload) < cls.PAYLOAD_FIXED_SIZE:
+            return "Length is not expected"
+
+        func_tick, func_baseline_tick, func_entry_count = cls.PAYLOAD_FIXED_STRUCT.unpack_from(payload, 0)
+        offset = cls.PAYLOAD_FIXED_SIZE
+
+        #reading each entry with the struct for its mask
+        func_entries = []
+        try:
+            for _ in range(func_entry_count):
+                mask = payload[offset + 4]
+                entry_struct = cls.ENTRY_STRUCTS.get(mask)
+                if entry_struct is None:
+                    return "Delta mask is not valid"
+
+                player_id, _, *values = entry_struct.unpack_from(payload, offset)
+                func_entries.append((player_id, mask, tuple(values)))
+                offset += entry_struct.size
+        except (IndexError, struct.error):
+            return "Length is not expected"
+
+        # checking the length of the message
+        if header.msg_len != header.size + offset:
+            return "Length is not expected"
+
+        return cls(header, func_tick, func_baseline_tick, func_entries)
+
+#defining the class the client sends to say which snapshot it has applied
+class qgp_snapshot_ack:
+    FORMAT = "!I"
+    STRUCT = struct.Struct(FORMAT)
+    SIZE = STRUCT.size
+    PDU_STRUCT = qgp_header.pdu_struct(FORMAT)
+
+    #acks arrive every tick so they are slotted to keep each object small
+    __slots__ = ("header", "tick")
+
+    #defining the class variables
+    def __init__(self, header, tick):
+        self.header = header
+        self.tick = tick
+
+    #defining function to get the size of the packed PDU
+    def packed_size(self):
+        return self.PDU_STRUCT.size
+
+    #defining function to pack the ack into a buffer
+    def pack_into(self, buffer, offset=0):
+        self.header.msg_len = self.PDU_STRUCT.size
+        self.header.msg_type = QGP_MSG_SNAPSHOT_ACK
+        self.PDU_STRUCT.pack_into(buffer, offset, self.header.version, self.header.msg_type, self.header.msg_len,
+                                  self.header.priority, self.tick)
+        return offset + self.PDU_STRUCT.size
+
+    #defining function to pack the ack
+    def pack(self):
+        self.header.msg_len = self.PDU_STRUCT.size
+        self.header.msg_type = QGP_MSG_SNAPSHOT_ACK
+        return self.PDU_STRUCT.pack(self.header.version, self.header.msg_type, self.header.msg_len,
+                                    self.header.priority, self.tick)
+
+    #defining function to unpack the ack
+    @classmethod
+    def unpack(cls, header, payload):
+        # checking the length of the message
+        if header.msg_len != header.size + cls.SIZE or len(payload) < cls.SIZE:
+            return "Length is not expected"
+
+        func_tick, = cls.STRUCT.unpack_from(payload, 0)
+        return cls(header, func_tick)
+
+
+#defining the per client encoder that picks between a delta and a full snapshot
+#the snapshots sent to the client are kept until it acknowledges one of them
+#a delta is only sent against the newest acknowledged snapshot, otherwise a keyframe is sent
+class qgp_delta_encoder:
+    #how many sent snapshots are kept while waiting for an ack
+    MAX_HISTORY = 32
+
+    #defining the class variables
+    def __init__(self, max_history=MAX_HISTORY):
+        self.max_history = max_history
+
+        #tick -> snapshot records sent at that tick, oldest first
+        self.history = {}
+        self.acked_tick = None
+        self.keyframes = 0
+        self.deltas = 0
+
+        #the last baseline looked up by player, as (records, player_id -> record)
+        self.baseline_players = (None, None)
+
+    #defining function to forget every baseline, e.g. when the client changes match
+    def reset(self):
+        self.history.clear()
+        self.acked_tick = None
+        self.baseline_players = (None, None)
+
+    #defining function to get the records of the acknowledged baseline, or None if a keyframe is needed
+    def baseline(self):
+        if self.acked_tick is None:
+            return None
+
+        return self.history.get(self.acked_tick)
+
+    #defining function to get the acknowledged baseline as player_id -> record, or None if a keyframe is needed
+    #it is only rebuilt when the ack moves
+    def baseline_records(self):
+        baseline = self.baseline()
+        if baseline is None:
+            return None
+
+        if self.baseline_players[0] is not baseline:
+            self.baseline_players = (baseline, records_by_player(baseline))
+        return self.baseline_players[1]
+
+    #defining function to remember the records sent at a tick
+    def remember(self, tick, records):
+        self.history[tick] = records
+        while len(self.history) > self.max_history:
+            del self.history[next(iter(self.history))]
+
+    #defining function to record an ack from the client
+    #acks for snapshots that are no longer kept are ignored
+    def ack(self, tick):
+        if tick not in self.history:
+            return False
+
+        self.acked_tick = tick
+
+        #anything older than the ack can't be used as a baseline any more
+        for old_tick in list(self.history):
+            if old_tick == tick:
+                break
+            del self.history[old_tick]
+
+        return True
+
+    #defining function to encode the snapshot records of a tick for this client
+    #cache is shared between clients sent the same records so each baseline is only encoded once
+    def encode(self, tick, records, priority=0, cache=None):
+        baseline = self.baseline()
+        key = None if baseline is None else id(baseline)
+
+        packed_pdu = cache.get(key) if cache is not None else None
+        if packed_pdu is None:
+            header = qgp_header(version=1, msg_type=0, msg_len=0, priority=priority)
+            if baseline is None:
+                packed_pdu = qgp_player_snapshot(header, tick, records).pack()
+            else:
+                entries = diff_records(self.baseline_records(), records)
+                packed_pdu = qgp_player_delta(header, tick, self.acked_tick, entries).pack()
+
+            if cache is not None:
+                cache[key] = packed_pdu
+
+        if baseline is None:
+            self.keyframes += 1
+        else:
+            self.deltas += 1
+
+        self.remember(tick, records)
+        return packed_pdu
+
+#defining the client side decoder that rebuilds full snapshots from keyframes and deltas
+class qgp_delta_decoder:
+    #how many decoded snapshots are kept as possible baselines
+    MAX_HISTORY = 32
+
+    #defining the class variables
+    def __init__(self, max_history=MAX_HISTORY):
+        self.max_history = max_history
+
+        #tick -> player_id -> record tuple
+        self.history = {}
+        self.latest_tick = None
+        self.missing_baselines = 0
+
+    #defining function to store a decoded snapshot
+    def store(self, tick, records):
+        self.history[tick] = records
+        self.latest_tick = tick
+        while len(self.history) > self.max_history:
+            del self.history[next(iter(self.history))]
+
+        return records
+
+    #defining function to apply a full snapshot
+    def apply_snapshot(self, snapshot):
+        return self.store(snapshot.tick, records_by_player(snapshot.records))
+
+    #defining function to apply a delta, returns None if its baseline is gone
+    def apply_delta(self, delta):
+        baseline = self.history.get(delta.baseline_tick)
+        if baseline is None:
+            self.missing_baselines += 1
+            return None
+
+        return self.store(delta.tick, apply_entries(baseline, delta.entries))
+
+    #defining function to get the newest snapshot as flat records
+    def latest_records(self):
+        records = uint32_array()
+        for record in self.history.get(self.latest_tick, {}).values():
+            records.extend(record)
+        return records
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP DELTA ENCODER AND DECODER
+    ############################################################################
+    encoder = qgp_delta_encoder()
+    decoder = qgp_delta_decoder()
+
+    def receive(packed_pdu):
+        header, payload = qgp_header.unpack(packed_pdu)
+        if header.msg_type == QGP_MSG_PLAYER_SNAPSHOT:
+            return decoder.apply_snapshot(qgp_player_snapshot.unpack(header, payload))
+        return decoder.apply_delta(qgp_player_delta.unpack(header, payload))
+
+    rows = [[player_id, 1, 90, player_id * 10, 5, 6, 7] for player_id in range(64)]
+    for tick in range(1, 6):
+        #a few players move along x every tick
+        for row in rows[:4]:
+            row[3] += 1
+        records = uint32_array(value for row in rows for value in row)
+
+        packed_pdu = encoder.encode(tick, records)
+        decoded = receive(packed_pdu)
+        print("tick", tick, "bytes", len(packed_pdu), "matches", decoded == records_by_player(records))
+
+        #the client only acks every other tick
+        if tick % 2:
+            encoder.ack(tick)
+
+    #a player leaving
+    records = uint32_array(value for row in rows[1:] for value in row)
+    decoded = receive(encoder.encode(6, records))
+    print("player 0 removed", 0 not in decoded, "keyframes", encoder.keyframes, "deltas", encoder.deltas)
@@ -0,0 +1,95 @@
+#defining the class that maps player ids to their connections
+#a connection is added under its hello client id and any player id it joins a match with
+#so one player can be messaged or kicked without scanning every connected client
+class qgp_player_directory:
+    #defining the class variables
+    #is_connected tells if a connection is still open, an id can only be taken from one that isn't
+    def __init__(self, is_connected=lambda connection: True):
+        self.is_connected = is_connected
+
+        #player_id -> connection
+        self.players = {}
+
+        #connection -> set of player ids that point at it
+        self.player_ids = {}
+
+    #defining function to check if a connection may take a player id
+    #the id has to be free, already its own, or left behind by a connection that has closed
+    def available(self, player_id, connection):
+        old_connection = self.players.get(player_id)
+        return old_connection is None or old_connection is connection or not self.is_connected(old_connection)
+
+    #defining function to point a player id at a connection
+    #a reconnecting player takes the id over from its closed connection
+    #returns False and changes nothing if another open connection has the id
+    def add(self, player_id, connection):
+        if not self.available(player_id, connection):
+            return False
+
+        old_connection = self.players.get(player_id)
+        if old_connection is not None and old_connection is not connection:
+            self.player_ids[old_connection].discard(player_id)
+
+        self.players[player_id] = connection
+        self.player_ids.setdefault(connection, set()).add(player_id)
+        return True
+
+    #defining function to forget every player id of a connection
+    #returns the ids that were removed
+    def remove(self, connection):
+        player_ids = self.player_ids.pop(connection, set())
+        for player_id in player_ids:
+            if self.players.get(player_id) is connection:
+                del self.players[player_id]
+
+        return player_ids
+
+    #defining function to get the connection of a player, or None if it isn't connected
+    def lookup(self, player_id):
+        return self.players.get(player_id)
+
+    #defining function to get the connections of several players
+    #unknown ids are skipped and a connection is only returned once
+    def lookup_many(self, player_ids):
+        connections = {}
+        for player_id in player_ids:
+            connection = self.players.get(player_id)
+            if connection is not None:
+                connections[connection] = None
+
+        return list(connections)
+
+    #defining function to get the player ids of a connection
+    def ids_for(self, connection):
+        return self.player_ids.get(connection, set())
+
+    def __len__(self):
+        return len(self.players)
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP PLAYER DIRECTORY
+    ############################################################################
+    closed = set()
+    directory = qgp_player_directory(is_connected=lambda connection: connection not in closed)
+    directory.add(1, "client_a")
+    directory.add(2, "client_b")
+
+    #the client also joins a match as player 10
+    directory.add(10, "client_a")
+    print("player 10", directory.lookup(10))
+    print("players 1 2 10 99", directory.lookup_many([1, 2, 10, 99]))
+
+    #another client can't take player 2 while client_b is still connected
+    print("client_c takes player 2", directory.add(2, "client_c"))
+
+    #player 2 reconnects on a new connection after the old one closed
+    closed.add("client_b")
+    print("client_c takes player 2", directory.add(2, "client_c"))
+    print("removed client_b", directory.remove("client_b"))
+    print("player 2", directory.lookup(2))
+
+    print("removed client_a", directory.remove("client_a"))
+    print("players left", len(directory))
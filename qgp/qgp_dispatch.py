@@ -0,0 +1,151 @@
+#importing the libraries in a way so this file can be ran in isolation for testing
+try:
+    from pdu_constants import *
+    from qgp_header import qgp_header
+    from qgp_hello import qgp_client_hello, qgp_server_hello
+    from qgp_errors import qgp_errors
+    from qgp_communication import qgp_text_chat
+    from qgp_player import qgp_player_movement, qgp_player_status, qgp_player_join, qgp_player_leave
+    from qgp_session_mgmt import qgp_game_start, qgp_game_end
+    from qgp_snapshot import qgp_player_snapshot
+    from qgp_delta import qgp_player_delta, qgp_snapshot_ack
+    from qgp_compact import qgp_player_movement_compact
+    from qgp_queue import qgp_queue_request, qgp_queue_response, qgp_match_found
+    from qgp_loading import qgp_load_start, qgp_map_chunk, qgp_load_progress, qgp_load_end
+    from qgp_view import QGP_PDU_VIEWS
+except:
+    from qgp.pdu_constants import *
+    from qgp.qgp_header import qgp_header
+    from qgp.qgp_hello import qgp_client_hello, qgp_server_hello
+    from qgp.qgp_errors import qgp_errors
+    from qgp.qgp_communication import qgp_text_chat
+    from qgp.qgp_player import qgp_player_movement, qgp_player_status, qgp_player_join, qgp_player_leave
+    from qgp.qgp_session_mgmt import qgp_game_start, qgp_game_end
+    from qgp.qgp_snapshot import qgp_player_snapshot
+    from qgp.qgp_delta import qgp_player_delta, qgp_snapshot_ack
+    from qgp.qgp_compact import qgp_player_movement_compact
+    from qgp.qgp_queue import qgp_queue_request, qgp_queue_response, qgp_match_found
+    from qgp.qgp_loading import qgp_load_start, qgp_map_chunk, qgp_load_progress, qgp_load_end
+    from qgp.qgp_view import QGP_PDU_VIEWS
+
+#mapping each message type to the PDU class that decodes it
+QGP_PDU_CLASSES = {
+    QGP_MSG_SERVER_HELLO: qgp_server_hello,
+    QGP_MSG_CLIENT_HELLO: qgp_client_hello,
+    QGP_MSG_GAME_START: qgp_game_start,
+    QGP_MSG_GAME_END: qgp_game_end,
+    QGP_MSG_PLAYER_JOIN: qgp_player_join,
+    QGP_MSG_PLAYER_LEAVE: qgp_player_leave,
+    QGP_MSG_PLAYER_STATUS: qgp_player_status,
+    QGP_MSG_TEXT_CHAT: qgp_text_chat,
+    QGP_MSG_PLAYER_MOVEMENT: qgp_player_movement,
+    QGP_MSG_PLAYER_MOVEMENT_COMPACT: qgp_player_movement_compact,
+    QGP_MSG_PLAYER_SNAPSHOT: qgp_player_snapshot,
+    QGP_MSG_PLAYER_DELTA: qgp_player_delta,
+    QGP_MSG_SNAPSHOT_ACK: qgp_snapshot_ack,
+    QGP_MSG_Q_REQ: qgp_queue_request,
+    QGP_MSG_Q_RES: qgp_queue_response,
+    QGP_MSG_MATCH: qgp_match_found,
+    QGP_MSG_LD_MATCH_START: qgp_load_start,
+    QGP_MSG_LD_MAP_CHUNK: qgp_map_chunk,
+    QGP_MSG_LD_PROGRESS: qgp_load_progress,
+    QGP_MSG_LD_MATCH_END: qgp_load_end,
+    QGP_MSG_SERVER_ERROR: qgp_errors,
+    QGP_MSG_CLIENT_ERROR: qgp_errors,
+}
+
+#defining the registry that routes PDUs to their handlers
+#entries are keyed by (dfa_state, msg_type) so a lookup is a single dict access
+#handlers are called as handler(protocol, headers, pdu, stream_id)
+class qgp_dispatcher:
+    #key used for entries that are valid in every DFA state
+    ANY_STATE = None
+
+    #defining the class variables
+    def __init__(self, default_handler=None):
+        self.routes = {}
+        self.state_defaults = {}
+        self.default_handler = default_handler
+
+    #defining function to register a handler for one message type in one or more states
+    #with lazy the handler gets a qgp_pdu_view that only decodes the fields it reads
+    def register(self, states, msg_type, handler, pdu_class=None, lazy=False):
+        #looking up the PDU class from the message type if one wasn't given
+        if pdu_class is None:
+            pdu_class = QGP_PDU_VIEWS.get(msg_type) if lazy else QGP_PDU_CLASSES.get(msg_type)
+
+        #allowing a single state to be passed in
+        if states is self.ANY_STATE or isinstance(states, int):
+            states = (states,)
+
+        for state in states:
+            self.routes[(state, msg_type)] = (pdu_class, handler)
+
+    #defining function to register the handler used when a state gets an unexpected message type
+    def register_state_default(self, states, handler):
+        if isinstance(states, int):
+            states = (states,)
+
+        for state in states:
+            self.state_defaults[state] = handler
+
+    #defining function to route a PDU to its handler
+    def dispatch(self, protocol, headers, payload, stream_id):
+        msg_type = headers.msg_type
+
+        #state independent routes win so errors are handled in every state
+        route = self.routes.get((self.ANY_STATE, msg_type))
+        if route is None:
+            route = self.routes.get((protocol.current_dfa_state, msg_type))
+
+        if route is not None:
+            pdu_class, handler = route
+
+            #unpacking the payload if the route has a PDU class
+            #a view class wraps the payload and nothing is decoded until a field is read
+            if pdu_class is None:
+                pdu = payload
+            elif hasattr(pdu_class, "wrap"):
+                pdu = pdu_class.wrap(headers, payload)
+            else:
+                pdu = pdu_class.unpack(headers, payload)
+            return handler(protocol, headers, pdu, stream_id)
+
+        #falling back to the state default and then the global default
+        handler = self.state_defaults.get(protocol.current_dfa_state, self.default_handler)
+        if handler is not None:
+            return handler(protocol, headers, payload, stream_id)
+
+        return None
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP DISPATCHER
+    ############################################################################
+    class debug_protocol:
+        current_dfa_state = 1
+
+    def debug_handler(protocol, headers, pdu, stream_id):
+        print("handled", headers.msg_type, pdu, stream_id)
+        return pdu
+
+    def debug_default(protocol, headers, payload, stream_id):
+        print("default handler", headers.msg_type, protocol.current_dfa_state)
+
+    dispatcher = qgp_dispatcher(default_handler=debug_default)
+    dispatcher.register(1, QGP_MSG_PLAYER_STATUS, debug_handler)
+    dispatcher.register(dispatcher.ANY_STATE, QGP_MSG_CLIENT_ERROR, debug_handler)
+
+    #routing a player status PDU in the registered state
+    status_header = qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+    status_packed = qgp_player_status(status_header, 1, 90, 10).pack()
+    headers, payload = qgp_header.unpack(status_packed)
+    status_unpacked = dispatcher.dispatch(debug_protocol(), headers, payload, 0)
+    print("status health", status_unpacked.player_health)
+
+    #routing the same PDU in an unregistered state
+    other_state = debug_protocol()
+    other_state.current_dfa_state = 2
+    dispatcher.dispatch(other_state, headers, payload, 0)
@@ -2,13 +2,19 @@ import struct
 #importing the libraries in a way so this file can be ran in isolation for testing
 try:
     from pdu_constants import *
-    from qgp_header import qgp_header
+    from qgp_header import qgp_header, QGP_ENCODE_BUFFER
 except:
     from qgp.pdu_constants import *
-    from qgp.qgp_header import qgp_header
+    from qgp.qgp_header import qgp_header, QGP_ENCODE_BUFFER
 
 #defining the error class
 class qgp_errors:
+    #error code, error length, severity and the message length
+    PAYLOAD_FIXED_FORMAT = "!H H H H"
+    PAYLOAD_FIXED_STRUCT = struct.Struct(PAYLOAD_FIXED_FORMAT)
+    PAYLOAD_FIXED_SIZE = PAYLOAD_FIXED_STRUCT.size
+    PDU_STRUCT = qgp_header.pdu_struct(PAYLOAD_FIXED_FORMAT)
+
     # defining the class variables
     def __init__(self, header, error_code, error_length, severity, error_message):
         self.header = header
@@ -17,43 +23,46 @@ class qgp_errors:
         self.severity = severity
         self.error_message = error_message
 
-    # defining the function to pack the values
-    def pack(self):
-        # packing the payload with the client id and client version
-        payload = b''
-        payload = struct.pack("!H H H", self.error_code, self.error_length, self.severity)
+    # defining the function to get the size of the packed PDU
+    def packed_size(self):
+        return self.PDU_STRUCT.size + len(self.error_message.encode("utf-8"))
 
-        # packing the capabilities
+    # defining the function to pack the values into a buffer
+    def pack_into(self, buffer, offset=0):
+        # packing the error message
         err_msg_bytes = self.error_message.encode("utf-8")
-        payload += struct.pack("!H", len(err_msg_bytes)) + err_msg_bytes
 
         # packing the headers
-        self.header.msg_len = qgp_header.SIZE + len(payload)
+        self.header.msg_len = self.PDU_STRUCT.size + len(err_msg_bytes)
         #self.header.msg_type = QGP_MSG_CLIENT_HELLO
 
+        # packing the headers and the fixed payload in one call
+        self.PDU_STRUCT.pack_into(buffer, offset, self.header.version, self.header.msg_type, self.header.msg_len,
+                                  self.header.priority, self.error_code, self.error_length, self.severity,
+                                  len(err_msg_bytes))
+        offset += self.PDU_STRUCT.size
+        buffer[offset:offset + len(err_msg_bytes)] = err_msg_bytes
+
+        return offset + len(err_msg_bytes)
+
+    # defining the function to pack the values
+    def pack(self):
         # returning the packed payload
-        return self.header.pack() + payload
+        return QGP_ENCODE_BUFFER.encode(self)
 
     # defining the function to unpack the payload
     @classmethod
     def unpack(cls, header, payload):
-        # defining the offset to know where everything is at
-        offset = 0
-
-        # getting the client id and version and updating the offset num
-        func_error_code, func_error_length, func_severity = struct.unpack_from("!H H H", payload, offset)
-        offset += struct.calcsize("!H H H")
-
-        # getting the text length
-        func_err_msg_bytes, = struct.unpack_from("!H", payload, offset)
-        offset += struct.calcsize("!H")
+        # getting the error code, length, severity and the text length
+        func_error_code, func_error_length, func_severity, func_err_msg_bytes = cls.PAYLOAD_FIXED_STRUCT.unpack_from(payload, 0)
+        offset = cls.PAYLOAD_FIXED_SIZE
 
-        # getting the actual capabilities
-        func_err_msg = payload[offset:offset + func_err_msg_bytes].decode("utf-8")
+        # getting the actual error message
+        func_err_msg = str(payload[offset:offset + func_err_msg_bytes], "utf-8")
         offset += func_err_msg_bytes
 
         # checking the length of the message
-        if header.msg_len != qgp_header.SIZE + offset:
+        if header.msg_len != header.size + offset:
             return "Length is not expected"
 
         # returning the PDU values
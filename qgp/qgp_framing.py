@@ -0,0 +1,138 @@
+import struct
+#importing the libraries in a way so this file can be ran in isolation for testing
+try:
+    from pdu_constants import *
+    from qgp_header import qgp_header
+    from qgp_logging import get_logger
+except:
+    from qgp.pdu_constants import *
+    from qgp.qgp_header import qgp_header
+    from qgp.qgp_logging import get_logger
+
+LOGGER = get_logger("framing")
+
+#defining the class that cuts complete PDUs out of a single stream
+#QUIC can split a PDU across events or coalesce several PDUs into one event
+#so the bytes are buffered and cut using the msg_len from each header
+#v1 and v2 headers are both accepted so the header size is read from each header
+class qgp_frame_decoder:
+    #the largest PDU accepted before the stream is treated as corrupt
+    MAX_FRAME_SIZE = 1 << 20
+
+    #defining the class variables
+    def __init__(self, max_frame_size=MAX_FRAME_SIZE):
+        self.buffer = bytearray()
+        self.max_frame_size = max_frame_size
+
+    #defining function to add received bytes and get back every complete PDU as a batch
+    def feed(self, data):
+        frames = []
+
+        #when nothing is buffered the PDUs are cut straight out of the received data
+        if not self.buffer:
+            data = memoryview(data)
+            offset = self.cut_frames(data, frames)
+            if offset < len(data):
+                self.buffer += data[offset:]
+
+            return frames
+
+        #otherwise the partial PDU is completed with the new data first
+        self.buffer += data
+        data = memoryview(bytes(self.buffer))
+        self.buffer.clear()
+
+        offset = self.cut_frames(data, frames)
+        if offset < len(data):
+            self.buffer += data[offset:]
+
+        return frames
+
+    #defining function to cut the complete PDUs and return how many bytes were used
+    def cut_frames(self, data, frames):
+        offset = 0
+        data_len = len(data)
+
+        while data_len - offset >= qgp_header.MIN_SIZE:
+            #waiting for more data if the header itself isn't complete yet
+            try:
+                header = qgp_header.unpack_from(data, offset)
+            except (IndexError, struct.error):
+                break
+
+            #checking the declared length can be a real PDU
+            if header.msg_len < header.size or header.msg_len > self.max_frame_size:
+                raise ValueError(f"Invalid PDU length {header.msg_len} on stream")
+
+            #waiting for more data if the PDU isn't complete yet
+            frame_end = offset + header.msg_len
+            if frame_end > data_len:
+                break
+
+            frames.append((header, data[offset + header.size:frame_end]))
+            offset = frame_end
+
+        return offset
+
+    #defining function to get the number of buffered bytes waiting for the rest of a PDU
+    def pending(self):
+        return len(self.buffer)
+
+#defining the class that keeps one frame decoder per stream of a connection
+class qgp_stream_reassembler:
+    #defining the class variables
+    def __init__(self):
+        self.decoders = {}
+
+    #defining function to feed a StreamDataReceived event's data and get the PDUs it completed
+    def feed(self, stream_id, data, end_stream=False):
+        decoder = self.decoders.get(stream_id)
+        if decoder is None:
+            decoder = qgp_frame_decoder()
+            self.decoders[stream_id] = decoder
+
+        try:
+            frames = decoder.feed(data)
+        except ValueError:
+            #the stream can't be resynchronised so its buffered bytes are dropped
+            del self.decoders[stream_id]
+            raise
+
+        #forgetting the stream once the peer has finished it
+        if end_stream:
+            if decoder.pending():
+                LOGGER.warning("Stream %d ended with %d bytes of a partial PDU", stream_id, decoder.pending())
+            del self.decoders[stream_id]
+
+        return frames
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP FRAME DECODER
+    ############################################################################
+    try:
+        from qgp_player import qgp_player_status
+    except:
+        from qgp.qgp_player import qgp_player_status
+
+    #packing three PDUs back to back as they would arrive on one stream
+    status_header = qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+    stream_bytes = b"".join(qgp_player_status(status_header, i, 100 - i, i).pack() for i in range(3))
+
+    #feeding the bytes in uneven pieces to split and coalesce the PDUs
+    reassembler = qgp_stream_reassembler()
+    for start, end in ((0, 5), (5, 30), (30, len(stream_bytes))):
+        for header, payload in reassembler.feed(0, stream_bytes[start:end], end_stream=end == len(stream_bytes)):
+            status = qgp_player_status.unpack(header, payload)
+            print("status", status.player_id, status.player_health, status.player_dmg_taken)
+
+    print("streams left", len(reassembler.decoders))
+
+    #mixing v1 and v2 headers on one stream
+    mixed_bytes = b"".join(qgp_header.to_v2(qgp_player_status(status_header, i, 50, i).pack()) if i % 2 else
+                           qgp_player_status(status_header, i, 50, i).pack() for i in range(4))
+    for header, payload in reassembler.feed(4, mixed_bytes[:11]) + reassembler.feed(4, mixed_bytes[11:]):
+        status = qgp_player_status.unpack(header, payload)
+        print("header v", header.version, "size", header.size, "status", status.player_id)
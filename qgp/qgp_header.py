@@ -1,11 +1,43 @@
 import struct
-
+#importing the libraries in a way so this file can be ran in isolation for testing
+try:
+    from pdu_constants import QGP_V2_COMMON_MSG_TYPES
+    from qgp_varint import write_uvarint, read_uvarint
+except:
+    from qgp.pdu_constants import QGP_V2_COMMON_MSG_TYPES
+    from qgp.qgp_varint import write_uvarint, read_uvarint
 
 #defining the class for the qgp headers
 #this includes packing and unpacking the headers
+#
+#version 1 is the fixed 8 byte "!B H I B" header
+#version 2 is sent once both sides agree to it in the hello and is usually 3 bytes:
+#  one byte with the version in the top four bits and the priority in the bottom four
+#  one byte type code for common messages, or 0xFF followed by the "!H" message type
+#  the payload length as a varint
+#both versions are decoded side by side, the first byte tells them apart
 class qgp_header:
     FORMAT = "!B H I B"
-    SIZE = struct.calcsize(FORMAT)
+    STRUCT = struct.Struct(FORMAT)
+    SIZE = STRUCT.size
+
+    #the fewest bytes any header version can take
+    MIN_SIZE = 3
+
+    #defining the v2 header layout
+    V2_VERSION = 2
+    V2_PRIORITY_MASK = 0x0F
+    V2_TYPE_ESCAPE = 0xFF
+    V2_MSG_TYPES = QGP_V2_COMMON_MSG_TYPES
+    V2_TYPE_CODES = {msg_type: code for code, msg_type in enumerate(QGP_V2_COMMON_MSG_TYPES)}
+
+    #a header is made for every received PDU so it doesn't carry a __dict__
+    __slots__ = ("version", "msg_type", "msg_len", "priority", "size")
+
+    #the message type sits after the version byte and the priority is the last byte
+    MSG_TYPE_STRUCT = struct.Struct("!H")
+    MSG_TYPE_OFFSET = 1
+    PRIORITY_OFFSET = 7
 
     #defining the header variables
     def __init__(self, version, msg_type, msg_len, priority):
@@ -14,10 +46,17 @@ class qgp_header:
         self.msg_len = msg_len
         self.priority = priority
 
+        #the number of bytes the header takes on the wire
+        self.size = self.SIZE
+
     #defining function to package the headers
     def pack(self):
-        print("Packing with", self.FORMAT, self.msg_type, self.msg_len, self.priority)
-        return struct.pack(self.FORMAT, self.version, self.msg_type, self.msg_len, self.priority)
+        return self.STRUCT.pack(self.version, self.msg_type, self.msg_len, self.priority)
+
+    #defining function to package the headers into an existing buffer
+    def pack_into(self, buffer, offset=0):
+        self.STRUCT.pack_into(buffer, offset, self.version, self.msg_type, self.msg_len, self.priority)
+        return offset + self.SIZE
 
     @classmethod
     def unpack(cls, data):
@@ -26,7 +65,107 @@ class qgp_header:
             return "Header length not the valid length"
 
         #unpacking the header and saving to the class variables
-        print("Unpacking with", cls.FORMAT)
-        func_version, func_msg_type, func_msg_len, func_priority = struct.unpack(cls.FORMAT, data[:cls.SIZE])
-        remaining_data = data[cls.SIZE:]
-        return cls(func_version, func_msg_type, func_msg_len, func_priority), remaining_data
\ No newline at end of file
+        header = cls.unpack_from(data, 0)
+
+        #the payload is a view into the received data so it isn't copied
+        remaining_data = memoryview(data)[header.size:]
+        return header, remaining_data
+
+    #defining function to unpack a header of either version at an offset without slicing the data
+    #raises IndexError or struct.error if the data ends inside the header
+    @classmethod
+    def unpack_from(cls, data, offset=0):
+        if data[offset] >> 4 == cls.V2_VERSION:
+            return cls.unpack_v2_from(data, offset)
+
+        return cls(*cls.STRUCT.unpack_from(data, offset))
+
+    #defining function to unpack a v2 header
+    #msg_len is set to the header and payload length so it means the same as in v1
+    @classmethod
+    def unpack_v2_from(cls, data, offset=0):
+        first_byte = data[offset]
+        type_code = data[offset + 1]
+
+        if type_code == cls.V2_TYPE_ESCAPE:
+            msg_type = cls.MSG_TYPE_STRUCT.unpack_from(data, offset + 2)[0]
+            position = offset + 4
+        elif type_code < len(cls.V2_MSG_TYPES):
+            msg_type = cls.V2_MSG_TYPES[type_code]
+            position = offset + 2
+        else:
+            raise ValueError(f"Unknown v2 header type code {type_code}")
+
+        payload_len, position = read_uvarint(data, position)
+        size = position - offset
+
+        header = cls(cls.V2_VERSION, msg_type, size + payload_len, first_byte & cls.V2_PRIORITY_MASK)
+        header.size = size
+        return header
+
+    #defining function to build a v2 header
+    #priorities above 15 are sent as 15, the scheduler treats them all as the lowest class anyway
+    @classmethod
+    def pack_v2(cls, msg_type, payload_len, priority):
+        header = bytearray()
+        header.append((cls.V2_VERSION << 4) | min(priority, cls.V2_PRIORITY_MASK))
+
+        type_code = cls.V2_TYPE_CODES.get(msg_type)
+        if type_code is None:
+            header.append(cls.V2_TYPE_ESCAPE)
+            header += cls.MSG_TYPE_STRUCT.pack(msg_type)
+        else:
+            header.append(type_code)
+
+        write_uvarint(header, payload_len)
+        return header
+
+    #defining function to swap the v1 header of a packed PDU for a v2 header
+    #PDUs are always packed with a v1 header and only converted when they are written
+    @classmethod
+    def to_v2(cls, packed_pdu):
+        version, msg_type, msg_len, priority = cls.STRUCT.unpack_from(packed_pdu, 0)
+        header = cls.pack_v2(msg_type, msg_len - cls.SIZE, priority)
+        header += memoryview(packed_pdu)[cls.SIZE:]
+        return bytes(header)
+
+    #defining function to read only the message type of a packed PDU
+    @classmethod
+    def peek_msg_type(cls, data, offset=0):
+        return cls.MSG_TYPE_STRUCT.unpack_from(data, offset + cls.MSG_TYPE_OFFSET)[0]
+
+    #defining function to read only the priority of a packed PDU
+    @classmethod
+    def peek_priority(cls, data, offset=0):
+        return data[offset + cls.PRIORITY_OFFSET]
+
+    #defining function to compile a struct covering the header and a fixed payload
+    #this lets a PDU encode its header and payload with a single pack call
+    @classmethod
+    def pdu_struct(cls, payload_format):
+        return struct.Struct(cls.FORMAT + " " + payload_format.lstrip("!"))
+
+
+#defining a reusable buffer for encoding variable length PDUs
+#PDUs pack straight into it and only the finished PDU is copied out
+class qgp_encode_buffer:
+    #defining the class variables
+    def __init__(self, size=4096):
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+
+    #defining function to pack a PDU and return its bytes
+    def encode(self, pdu):
+        size = pdu.packed_size()
+
+        #growing the buffer if the PDU doesn't fit
+        if size > len(self.buffer):
+            self.view.release()
+            self.buffer = bytearray(max(size, 2 * len(self.buffer)))
+            self.view = memoryview(self.buffer)
+
+        end = pdu.pack_into(self.buffer, 0)
+        return bytes(self.view[:end])
+
+#the shared encode buffer used by the PDU pack functions
+QGP_ENCODE_BUFFER = qgp_encode_buffer()
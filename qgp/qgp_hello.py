@@ -3,15 +3,29 @@ import struct
 #importing the libraries in a way so this file can be ran in isolation for testing
 try:
     from pdu_constants import *
-    from qgp_header import qgp_header
+    from qgp_header import qgp_header, QGP_ENCODE_BUFFER
 except:
     from qgp.pdu_constants import *
-    from qgp.qgp_header import qgp_header
+    from qgp.qgp_header import qgp_header, QGP_ENCODE_BUFFER
+
+#defining function to split a capabilities string into its tokens
+def parse_capabilities(capabilities):
+    return {token.strip() for token in capabilities.split(",") if token.strip()}
+
+#defining function to join capability tokens into a capabilities string
+def format_capabilities(tokens):
+    return ",".join(sorted(tokens))
 
 class qgp_client_hello:
     #importing the message type value
     MSG_TYPE = QGP_MSG_CLIENT_HELLO
 
+    #client id, client version and the capabilities length
+    PAYLOAD_FIXED_FORMAT = "!H H H"
+    PAYLOAD_FIXED_STRUCT = struct.Struct(PAYLOAD_FIXED_FORMAT)
+    PAYLOAD_FIXED_SIZE = PAYLOAD_FIXED_STRUCT.size
+    PDU_STRUCT = qgp_header.pdu_struct(PAYLOAD_FIXED_FORMAT)
+
     #defining the class variables
     def __init__(self, header, client_id, client_version, capabilities):
         self.header = header
@@ -19,44 +33,45 @@ class qgp_client_hello:
         self.client_version = client_version
         self.capabilities = capabilities
 
-    #defining the function to pack the data
-    def pack(self):
-
-        #packing the payload with the client id and client version
-        payload = b''
-        payload = struct.pack("!H H", self.client_id, self.client_version)
+    #defining the function to get the size of the packed PDU
+    def packed_size(self):
+        return self.PDU_STRUCT.size + len(self.capabilities.encode("utf-8"))
 
+    #defining the function to pack the data into a buffer
+    def pack_into(self, buffer, offset=0):
         #packing the capabilities
         cap_bytes = self.capabilities.encode("utf-8")
-        payload += struct.pack("!H", len(cap_bytes)) + cap_bytes
 
         #packing the headers
-        self.header.msg_len = qgp_header.SIZE + len(payload)
+        self.header.msg_len = self.PDU_STRUCT.size + len(cap_bytes)
         self.header.msg_type = QGP_MSG_CLIENT_HELLO
 
+        #packing the headers and the payload with the client id and client version in one call
+        self.PDU_STRUCT.pack_into(buffer, offset, self.header.version, self.header.msg_type, self.header.msg_len,
+                                  self.header.priority, self.client_id, self.client_version, len(cap_bytes))
+        offset += self.PDU_STRUCT.size
+        buffer[offset:offset + len(cap_bytes)] = cap_bytes
+
+        return offset + len(cap_bytes)
+
+    #defining the function to pack the data
+    def pack(self):
         #returning the packed payload
-        return self.header.pack() + payload
+        return QGP_ENCODE_BUFFER.encode(self)
 
     #defining the function to unpack the payload
     @classmethod
     def unpack(cls, header, payload):
-        #defining the offset to know where everything is at
-        offset = 0
-
-        #getting the client id and version and updating the offset num
-        func_client_id, func_client_version = struct.unpack_from("!H H", payload, offset)
-        offset += struct.calcsize("!H H")
-
-        #getting the capalities length
-        func_cap_bytes, = struct.unpack_from("!H", payload, offset)
-        offset += struct.calcsize("!H")
+        #getting the client id and version and the capalities length
+        func_client_id, func_client_version, func_cap_bytes = cls.PAYLOAD_FIXED_STRUCT.unpack_from(payload, 0)
+        offset = cls.PAYLOAD_FIXED_SIZE
 
         #getting the actual capabilities
-        func_caps = payload[offset:offset + func_cap_bytes].decode("utf-8")
+        func_caps = str(payload[offset:offset + func_cap_bytes], "utf-8")
         offset += func_cap_bytes
 
         #checking the length of the message
-        if header.msg_len != qgp_header.SIZE + offset:
+        if header.msg_len != header.size + offset:
             return "Length is not expected"
 
         #returning the PDU values
@@ -67,7 +82,9 @@ class qgp_server_hello:  # Renamed class for clarity
     MSG_TYPE = QGP_MSG_SERVER_HELLO
     # Payload fixed part: server_id (H), server_version (H), capabilities_length (H)
     PAYLOAD_FIXED_FORMAT = "!H H H"  # Using server_id as per your PDF for ServerHello
-    PAYLOAD_FIXED_SIZE = struct.calcsize(PAYLOAD_FIXED_FORMAT)
+    PAYLOAD_FIXED_STRUCT = struct.Struct(PAYLOAD_FIXED_FORMAT)
+    PAYLOAD_FIXED_SIZE = PAYLOAD_FIXED_STRUCT.size
+    PDU_STRUCT = qgp_header.pdu_struct(PAYLOAD_FIXED_FORMAT)
 
     def __init__(self, header, server_id, server_software_version,
                  capabilities_str):  # Changed client_id to server_id, server_version to server_software_version
@@ -76,49 +93,44 @@ class qgp_server_hello:  # Renamed class for clarity
         self.server_software_version = server_software_version  # Version of the server application
         self.capabilities_str = capabilities_str  # Renamed for clarity
 
-    def pack(self):
-        payload_fixed_part = struct.pack(
-            self.PAYLOAD_FIXED_FORMAT,
-            self.server_id,
-            self.server_software_version,
-            len(self.capabilities_str.encode("utf-8"))  # Length of the capabilities string
-        )
-        cap_bytes = self.capabilities_str.encode("utf-8")
+    def packed_size(self):
+        return self.PDU_STRUCT.size + len(self.capabilities_str.encode("utf-8"))
 
-        payload = payload_fixed_part + cap_bytes
+    def pack_into(self, buffer, offset=0):
+        cap_bytes = self.capabilities_str.encode("utf-8")
 
         # Update header attributes before packing the header
-        self.header.msg_len = qgp_header.SIZE + len(payload)  # Use header.message_length
+        self.header.msg_len = self.PDU_STRUCT.size + len(cap_bytes)  # Use header.message_length
         self.header.msg_type = self.MSG_TYPE
 
-        return self.header.pack() + payload
+        # Header and fixed payload part go out in one call, followed by the capabilities string
+        self.PDU_STRUCT.pack_into(buffer, offset, self.header.version, self.header.msg_type, self.header.msg_len,
+                                  self.header.priority, self.server_id, self.server_software_version, len(cap_bytes))
+        offset += self.PDU_STRUCT.size
+        buffer[offset:offset + len(cap_bytes)] = cap_bytes
 
-    @classmethod
-    def unpack(cls, header, payload):  # Changed variable names for clarity
-        # defining the offset to know where everything is at
-        offset = 0
+        return offset + len(cap_bytes)
 
-        # getting the client id and version and updating the offset num
-        func_server_id, func_server_version = struct.unpack_from("!H H", payload, offset)
-        offset += struct.calcsize("!H H")
+    def pack(self):
+        return QGP_ENCODE_BUFFER.encode(self)
 
-        # getting the capalities length
-        func_cap_bytes, = struct.unpack_from("!H", payload, offset)
-        offset += struct.calcsize("!H")
+    @classmethod
+    def unpack(cls, header, payload):  # Changed variable names for clarity
+        # getting the server id and version and the capalities length
+        func_server_id, func_server_version, func_cap_bytes = cls.PAYLOAD_FIXED_STRUCT.unpack_from(payload, 0)
+        offset = cls.PAYLOAD_FIXED_SIZE
 
         # getting the actual capabilities
-        func_caps = payload[offset:offset + func_cap_bytes].decode("utf-8")
+        func_caps = str(payload[offset:offset + func_cap_bytes], "utf-8")
         offset += func_cap_bytes
 
         # checking the length of the message
-        if header.msg_len != qgp_header.SIZE + offset:
+        if header.msg_len != header.size + offset:
             return "Length is not expected"
 
         # returning the PDU values
         return cls(header, func_server_id, func_server_version, func_caps)
 
-        #return cls(header_obj, unpacked_server_id, unpacked_server_sw_version, unpacked_caps_str)
-
 
 #defining debug function for testing these two classes
 if __name__ == '__main__':
@@ -0,0 +1,131 @@
+#importing the libraries in a way so this file can be ran in isolation for testing
+try:
+    from qgp_compact import to_signed32
+except:
+    from qgp.qgp_compact import to_signed32
+
+#the size of a grid cell in position units when none is given
+QGP_DEFAULT_CELL_SIZE = 256
+
+#defining the class that tracks which players are near each other
+#the map is cut into cubes of cell_size and each player is kept in the set of the cell it is in
+#a player is interested in everyone within view_cells cells of its own in every direction
+#so finding who should get an update looks at a fixed number of cells however many players there are
+class qgp_interest_grid:
+    #defining the class variables
+    def __init__(self, cell_size=QGP_DEFAULT_CELL_SIZE, view_cells=1):
+        if cell_size <= 0:
+            raise ValueError("Cell size must be positive")
+
+        self.cell_size = cell_size
+        self.view_cells = view_cells
+
+        #(cell x, cell y, cell z) -> set of player ids
+        self.cells = {}
+
+        #player_id -> cell
+        self.player_cells = {}
+
+        #the cell offsets that make up a player's area of interest
+        span = range(-view_cells, view_cells + 1)
+        self.offsets = [(dx, dy, dz) for dx in span for dy in span for dz in span]
+
+    def __len__(self):
+        return len(self.player_cells)
+
+    def __contains__(self, player_id):
+        return player_id in self.player_cells
+
+    #defining function to get the cell of a position
+    #positions are uint32 on the wire but can stand for negative coordinates
+    def cell_for(self, x_position, y_position, z_position):
+        return (to_signed32(x_position) // self.cell_size, to_signed32(y_position) // self.cell_size,
+                to_signed32(z_position) // self.cell_size)
+
+    #defining function to move a player to its new position
+    #only a player that crosses into another cell changes the grid
+    #returns True if the player changed cell
+    def update(self, player_id, x_position, y_position, z_position):
+        cell = self.cell_for(x_position, y_position, z_position)
+        old_cell = self.player_cells.get(player_id)
+        if cell == old_cell:
+            return False
+
+        if old_cell is not None:
+            self.discard_from_cell(player_id, old_cell)
+
+        self.cells.setdefault(cell, set()).add(player_id)
+        self.player_cells[player_id] = cell
+        return True
+
+    #defining function to take a player out of the grid
+    def remove(self, player_id):
+        cell = self.player_cells.pop(player_id, None)
+        if cell is not None:
+            self.discard_from_cell(player_id, cell)
+
+    #defining function to take a player out of one cell, dropping the cell once it is empty
+    def discard_from_cell(self, player_id, cell):
+        players = self.cells[cell]
+        players.discard(player_id)
+        if not players:
+            del self.cells[cell]
+
+    #defining function to get every player around a cell
+    def players_around(self, cell):
+        cell_x, cell_y, cell_z = cell
+        players = set()
+        for dx, dy, dz in self.offsets:
+            cell_players = self.cells.get((cell_x + dx, cell_y + dy, cell_z + dz))
+            if cell_players:
+                players |= cell_players
+
+        return players
+
+    #defining function to get the players a player can see, including itself
+    #returns an empty set if the player isn't in the grid
+    def nearby(self, player_id):
+        cell = self.player_cells.get(player_id)
+        if cell is None:
+            return set()
+
+        return self.players_around(cell)
+
+    #defining function to get the players that should be sent a player's update
+    #the area of interest is the same size for everyone so this is everyone the player can see
+    def recipients(self, player_id):
+        recipients = self.nearby(player_id)
+        recipients.discard(player_id)
+        return recipients
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP INTEREST GRID
+    ############################################################################
+    import random, time
+
+    grid = qgp_interest_grid(cell_size=100)
+    grid.update(1, 10, 10, 0)
+    grid.update(2, 150, 20, 0)
+    grid.update(3, 900, 900, 0)
+    grid.update(4, -30 & 0xFFFFFFFF, 10, 0)
+    print("near 1", sorted(grid.nearby(1)), "recipients of 3", sorted(grid.recipients(3)))
+
+    #moving inside a cell doesn't touch the grid
+    print("moved cell", grid.update(1, 20, 20, 0), grid.update(3, 120, 90, 0))
+    print("near 1 after 3 moved", sorted(grid.nearby(1)))
+    grid.remove(2)
+    print("near 1 after 2 left", sorted(grid.nearby(1)), "cells", len(grid.cells))
+
+    #comparing the recipients of every update in a 200 player match against sending to everyone
+    random.seed(1)
+    big_grid = qgp_interest_grid(cell_size=256)
+    for player_id in range(200):
+        big_grid.update(player_id, random.randrange(8192), random.randrange(8192), 0)
+
+    start = time.perf_counter()
+    total = sum(len(big_grid.recipients(player_id)) for player_id in range(200))
+    elapsed = time.perf_counter() - start
+    print(f"200 players: {total} sends against {200 * 199} to everyone, {elapsed * 1e3:.2f}ms")
@@ -0,0 +1,236 @@
+import struct
+#importing the libraries in a way so this file can be ran in isolation for testing
+try:
+    from pdu_constants import *
+    from qgp_header import qgp_header, QGP_ENCODE_BUFFER
+except:
+    from qgp.pdu_constants import *
+    from qgp.qgp_header import qgp_header, QGP_ENCODE_BUFFER
+
+#defining the class for the server telling a client to load a match's map
+#the map is then sent in chunk_count chunks of chunk_size bytes, the last one can be shorter
+#map_hash is the sha256 of the map, the chunks aren't sent to a client that said it has it cached
+class qgp_load_start:
+    FORMAT = "!I I I H I 32s"
+    STRUCT = struct.Struct(FORMAT)
+    SIZE = STRUCT.size
+    PDU_STRUCT = qgp_header.pdu_struct(FORMAT)
+
+    __slots__ = ("header", "match_id", "match_map", "map_size", "chunk_size", "chunk_count", "map_hash")
+
+    #defining the class variables
+    def __init__(self, header, match_id, match_map, map_size, chunk_size, chunk_count, map_hash):
+        self.header = header
+        self.match_id = match_id
+        self.match_map = match_map
+        self.map_size = map_size
+        self.chunk_size = chunk_size
+        self.chunk_count = chunk_count
+        self.map_hash = map_hash
+
+    def packed_size(self):
+        return self.PDU_STRUCT.size
+
+    #defining the packing into a buffer class
+    def pack_into(self, buffer, offset=0):
+        self.header.msg_len = self.PDU_STRUCT.size
+        self.header.msg_type = QGP_MSG_LD_MATCH_START
+        self.PDU_STRUCT.pack_into(buffer, offset, self.header.version, self.header.msg_type, self.header.msg_len,
+                                  self.header.priority, self.match_id, self.match_map, self.map_size,
+                                  self.chunk_size, self.chunk_count, self.map_hash)
+        return offset + self.PDU_STRUCT.size
+
+    #defining the packing class
+    def pack(self):
+        self.header.msg_len = self.PDU_STRUCT.size
+        self.header.msg_type = QGP_MSG_LD_MATCH_START
+        return self.PDU_STRUCT.pack(self.header.version, self.header.msg_type, self.header.msg_len,
+                                    self.header.priority, self.match_id, self.match_map, self.map_size,
+                                    self.chunk_size, self.chunk_count, self.map_hash)
+
+    #defining the unpacking class
+    @classmethod
+    def unpack(cls, header, payload):
+        # checking the length of the message
+        if header.msg_len != header.size + cls.SIZE or len(payload) < cls.SIZE:
+            return "Length is not expected"
+
+        func_match_id, func_match_map, func_map_size, func_chunk_size, func_chunk_count, func_map_hash = cls.STRUCT.unpack_from(payload, 0)
+
+        #returning the unpacked values
+        return cls(header, func_match_id, func_match_map, func_map_size, func_chunk_size, func_chunk_count, func_map_hash)
+
+#defining the class for one chunk of a map
+#the data is kept as the view it was given so sending a chunk doesn't copy the map
+class qgp_map_chunk:
+    #the map, the chunk index and the data length
+    PAYLOAD_FIXED_FORMAT = "!I I H"
+    PAYLOAD_FIXED_STRUCT = struct.Struct(PAYLOAD_FIXED_FORMAT)
+    PAYLOAD_FIXED_SIZE = PAYLOAD_FIXED_STRUCT.size
+    PDU_STRUCT = qgp_header.pdu_struct(PAYLOAD_FIXED_FORMAT)
+
+    __slots__ = ("header", "match_map", "chunk_index", "data")
+
+    #defining the class variables
+    def __init__(self, header, match_map, chunk_index, data):
+        self.header = header
+        self.match_map = match_map
+        self.chunk_index = chunk_index
+        self.data = data
+
+    def packed_size(self):
+        return self.PDU_STRUCT.size + len(self.data)
+
+    #defining the packing into a buffer class
+    def pack_into(self, buffer, offset=0):
+        self.header.msg_len = self.PDU_STRUCT.size + len(self.data)
+        self.header.msg_type = QGP_MSG_LD_MAP_CHUNK
+        self.PDU_STRUCT.pack_into(buffer, offset, self.header.version, self.header.msg_type, self.header.msg_len,
+                                  self.header.priority, self.match_map, self.chunk_index, len(self.data))
+        offset += self.PDU_STRUCT.size
+        buffer[offset:offset + len(self.data)] = self.data
+
+        return offset + len(self.data)
+
+    #defining the packing class
+    def pack(self):
+        return QGP_ENCODE_BUFFER.encode(self)
+
+    #defining the unpacking class
+    #the data is a view into the payload, it has to be copied before the handler returns
+    @classmethod
+    def unpack(cls, header, payload):
+        if len(payload) < cls.PAYLOAD_FIXED_SIZE:
+            return "Length is not expected"
+
+        func_match_map, func_chunk_index, func_data_len = cls.PAYLOAD_FIXED_STRUCT.unpack_from(payload, 0)
+        offset = cls.PAYLOAD_FIXED_SIZE
+
+        # checking the length of the message
+        if header.msg_len != header.size + offset + func_data_len or len(payload) < offset + func_data_len:
+            return "Length is not expected"
+
+        #returning the unpacked values
+        return cls(header, func_match_map, func_chunk_index, memoryview(payload)[offset:offset + func_data_len])
+
+#defining the class for a client telling the server how much of the map it has
+#chunks_received also lets the server send the next chunks, so it doubles as the flow control ack
+class qgp_load_progress:
+    FORMAT = "!I I"
+    STRUCT = struct.Struct(FORMAT)
+    SIZE = STRUCT.size
+    PDU_STRUCT = qgp_header.pdu_struct(FORMAT)
+
+    __slots__ = ("header", "match_id", "chunks_received")
+
+    #defining the class variables
+    def __init__(self, header, match_id, chunks_received):
+        self.header = header
+        self.match_id = match_id
+        self.chunks_received = chunks_received
+
+    def packed_size(self):
+        return self.PDU_STRUCT.size
+
+    #defining the packing into a buffer class
+    def pack_into(self, buffer, offset=0):
+        self.header.msg_len = self.PDU_STRUCT.size
+        self.header.msg_type = QGP_MSG_LD_PROGRESS
+        self.PDU_STRUCT.pack_into(buffer, offset, self.header.version, self.header.msg_type, self.header.msg_len,
+                                  self.header.priority, self.match_id, self.chunks_received)
+        return offset + self.PDU_STRUCT.size
+
+    #defining the packing class
+    def pack(self):
+        self.header.msg_len = self.PDU_STRUCT.size
+        self.header.msg_type = QGP_MSG_LD_PROGRESS
+        return self.PDU_STRUCT.pack(self.header.version, self.header.msg_type, self.header.msg_len,
+                                    self.header.priority, self.match_id, self.chunks_received)
+
+    #defining the unpacking class
+    @classmethod
+    def unpack(cls, header, payload):
+        # checking the length of the message
+        if header.msg_len != header.size + cls.SIZE or len(payload) < cls.SIZE:
+            return "Length is not expected"
+
+        func_match_id, func_chunks_received = cls.STRUCT.unpack_from(payload, 0)
+
+        #returning the unpacked values
+        return cls(header, func_match_id, func_chunks_received)
+
+#defining the class for a client telling the server it has finished loading a match's map
+class qgp_load_end:
+    FORMAT = "!I I B"
+    STRUCT = struct.Struct(FORMAT)
+    SIZE = STRUCT.size
+    PDU_STRUCT = qgp_header.pdu_struct(FORMAT)
+
+    __slots__ = ("header", "match_id", "match_map", "load_status")
+
+    #defining the class variables
+    def __init__(self, header, match_id, match_map, load_status=QGP_LOAD_DONE):
+        self.header = header
+        self.match_id = match_id
+        self.match_map = match_map
+        self.load_status = load_status
+
+    def packed_size(self):
+        return self.PDU_STRUCT.size
+
+    #defining the packing into a buffer class
+    def pack_into(self, buffer, offset=0):
+        self.header.msg_len = self.PDU_STRUCT.size
+        self.header.msg_type = QGP_MSG_LD_MATCH_END
+        self.PDU_STRUCT.pack_into(buffer, offset, self.header.version, self.header.msg_type, self.header.msg_len,
+                                  self.header.priority, self.match_id, self.match_map, self.load_status)
+        return offset + self.PDU_STRUCT.size
+
+    #defining the packing class
+    def pack(self):
+        self.header.msg_len = self.PDU_STRUCT.size
+        self.header.msg_type = QGP_MSG_LD_MATCH_END
+        return self.PDU_STRUCT.pack(self.header.version, self.header.msg_type, self.header.msg_len,
+                                    self.header.priority, self.match_id, self.match_map, self.load_status)
+
+    #defining the unpacking class
+    @classmethod
+    def unpack(cls, header, payload):
+        # checking the length of the message
+        if header.msg_len != header.size + cls.SIZE or len(payload) < cls.SIZE:
+            return "Length is not expected"
+
+        func_match_id, func_match_map, func_load_status = cls.STRUCT.unpack_from(payload, 0)
+
+        #returning the unpacked values
+        return cls(header, func_match_id, func_match_map, func_load_status)
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP LOADING PDUS
+    ############################################################################
+    load_header = qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+
+    packed_start = qgp_load_start(load_header, 65536, 151, 5000, 1024, 5, bytes(range(32))).pack()
+    header, payload = qgp_header.unpack(packed_start)
+    start = qgp_load_start.unpack(header, payload)
+    print("start", start.match_id, start.match_map, start.map_size, start.chunk_size, start.chunk_count, start.map_hash.hex()[:16])
+
+    map_data = bytes(range(256)) * 4
+    packed_chunk = qgp_map_chunk(load_header, 151, 3, memoryview(map_data)[100:200]).pack()
+    header, payload = qgp_header.unpack(packed_chunk)
+    chunk = qgp_map_chunk.unpack(header, payload)
+    print("chunk", chunk.match_map, chunk.chunk_index, len(chunk.data), bytes(chunk.data) == map_data[100:200])
+    print("short chunk", qgp_map_chunk.unpack(header, payload[:20]))
+
+    packed_progress = qgp_load_progress(load_header, 65536, 4).pack()
+    header, payload = qgp_header.unpack(packed_progress)
+    progress = qgp_load_progress.unpack(header, payload)
+    print("progress", progress.match_id, progress.chunks_received)
+
+    packed_end = qgp_load_end(load_header, 65536, 151).pack()
+    header, payload = qgp_header.unpack(packed_end)
+    end = qgp_load_end.unpack(header, payload)
+    print("end", end.match_id, end.match_map, end.load_status)
@@ -0,0 +1,212 @@
+import math
+#importing the libraries in a way so this file can be ran in isolation for testing
+try:
+    from qgp_arrays import uint32_array
+    from qgp_compact import to_signed32
+    from qgp_delta import QGP_DELTA_ENTRY_STRUCTS, QGP_DELTA_ALL_FIELDS, QGP_DELTA_REMOVED
+except:
+    from qgp.qgp_arrays import uint32_array
+    from qgp.qgp_compact import to_signed32
+    from qgp.qgp_delta import QGP_DELTA_ENTRY_STRUCTS, QGP_DELTA_ALL_FIELDS, QGP_DELTA_REMOVED
+
+#the bytes one player's update can take, a delta entry with every field changed
+QGP_LOD_RECORD_COST = QGP_DELTA_ENTRY_STRUCTS[QGP_DELTA_ALL_FIELDS].size
+
+#the bytes of a delta entry with no fields, each changed field adds 4
+QGP_LOD_ENTRY_COST = QGP_DELTA_ENTRY_STRUCTS[0].size
+
+#the bytes of telling the client a player left
+QGP_LOD_REMOVAL_COST = QGP_DELTA_ENTRY_STRUCTS[QGP_DELTA_REMOVED].size
+
+#the bytes of player updates each client can be sent per tick when no budget is given
+QGP_DEFAULT_LOD_BUDGET = 1200
+
+#the distance at which a player's priority grows half as fast as one right next to the viewer
+QGP_LOD_DISTANCE_SCALE = 256
+
+#how much each unit of speed adds to a player's priority
+QGP_LOD_SPEED_WEIGHT = 0.1
+
+#defining the class that picks which players a client is sent each tick
+#every tick each player the client can see gains priority, more if it is close or moving fast
+#the players with the most priority are sent until the byte budget is used up and their priority starts again from zero
+#so distant players are updated less often and a client never gets more than the budget per tick
+#the delta encoder diffs against the snapshot the client acknowledged, so the cost of every player is worked out against it
+#a player the client hasn't acknowledged yet is sent again each tick before anything new, so it never jumps back
+#players that aren't picked are sent with their acknowledged values, so the delta has nothing for them
+class qgp_lod_selector:
+    #defining the class variables
+    def __init__(self, budget=QGP_DEFAULT_LOD_BUDGET, distance_scale=QGP_LOD_DISTANCE_SCALE,
+                 speed_weight=QGP_LOD_SPEED_WEIGHT, record_cost=QGP_LOD_RECORD_COST):
+        self.budget = budget
+        self.distance_scale = distance_scale
+        self.speed_weight = speed_weight
+        self.record_cost = record_cost
+
+        #player_id -> accumulated priority
+        self.priorities = {}
+
+        #player_id -> movement record the client was last sent
+        self.sent = {}
+
+    #defining function to forget everything, e.g. when the client joins another match
+    def reset(self):
+        self.priorities.clear()
+        self.sent.clear()
+
+    #defining function to get how much priority a player gains in one tick
+    def priority(self, distance, speed):
+        return (1 + speed * self.speed_weight) / (1 + distance / self.distance_scale)
+
+    #defining function to get the bytes a record adds to a delta against the baseline record
+    def cost(self, base_record, record):
+        if base_record is None:
+            return self.record_cost
+        if record == base_record:
+            return 0
+
+        changed = sum(1 for field in range(1, len(record)) if record[field] != base_record[field])
+        return QGP_LOD_ENTRY_COST + 4 * changed
+
+    #defining function to get the records to send a client this tick
+    #viewer_ids are the client's own players, which are always sent
+    #visible_ids are the players it can see, or None for every player in the world
+    #baseline is player_id -> record of the snapshot the client acknowledged, or None before its first ack
+    def select(self, world, viewer_ids, visible_ids=None, baseline=None):
+        if visible_ids is None:
+            visible_ids = world.slots.keys()
+        if baseline is None:
+            baseline = {}
+
+        #measuring distances from the client's first player in the world
+        viewers = [player_id for player_id in viewer_ids if player_id in world.slots]
+        if viewers:
+            viewer_slot = world.slots[viewers[0]]
+            viewer_x = to_signed32(world.x_positions[viewer_slot])
+            viewer_y = to_signed32(world.y_positions[viewer_slot])
+            viewer_z = to_signed32(world.z_positions[viewer_slot])
+        else:
+            viewer_x = viewer_y = viewer_z = 0
+
+        #adding this tick's priority to everyone that can be seen
+        priorities = self.priorities
+        candidates = []
+        for player_id in visible_ids:
+            slot = world.slots.get(player_id)
+            if slot is None or player_id in viewers:
+                continue
+
+            distance = math.sqrt((to_signed32(world.x_positions[slot]) - viewer_x) ** 2 +
+                                 (to_signed32(world.y_positions[slot]) - viewer_y) ** 2 +
+                                 (to_signed32(world.z_positions[slot]) - viewer_z) ** 2)
+            priorities[player_id] = priorities.get(player_id, 0) + self.priority(distance, world.speeds[slot])
+            candidates.append(player_id)
+
+        candidate_set = set(candidates)
+        for player_id in [player_id for player_id in priorities if player_id not in candidate_set]:
+            del priorities[player_id]
+
+        #the client's own players always go first
+        sent = {}
+        spent = 0
+        for player_id in viewers:
+            record = world.movement_record(world.slots[player_id])
+            sent[player_id] = record
+            spent += self.cost(baseline.get(player_id), record)
+            priorities[player_id] = 0
+
+        #telling the client about players that went out of view, or keeping them until there is room
+        for player_id, base_record in baseline.items():
+            if player_id in sent or player_id in candidate_set:
+                continue
+            if spent + QGP_LOD_REMOVAL_COST <= self.budget:
+                spent += QGP_LOD_REMOVAL_COST
+            else:
+                sent[player_id] = base_record
+
+        #sending again what the client hasn't acknowledged yet, the highest priority first
+        candidates.sort(key=lambda player_id: (-priorities[player_id], player_id))
+        for player_id in candidates:
+            record = self.sent.get(player_id)
+            if record is None:
+                continue
+
+            base_record = baseline.get(player_id)
+            record_cost = self.cost(base_record, record)
+            if record_cost and spent + record_cost <= self.budget:
+                sent[player_id] = record
+                spent += record_cost
+
+        #spending what is left on the highest priorities, ties go to the lower id
+        #players still waiting for their ack aren't picked again, or they would never leave the budget
+        for player_id in candidates:
+            if player_id in sent:
+                continue
+
+            record = world.movement_record(world.slots[player_id])
+            base_record = baseline.get(player_id)
+            record_cost = self.cost(base_record, record)
+            if spent + record_cost <= self.budget:
+                sent[player_id] = record
+                spent += record_cost
+                priorities[player_id] = 0
+
+            #players that weren't picked keep the values the client acknowledged
+            elif base_record is not None:
+                sent[player_id] = base_record
+
+        self.sent = sent
+
+        records = uint32_array()
+        for record in sent.values():
+            records.extend(record)
+
+        return records
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP LOD SELECTOR
+    ############################################################################
+    try:
+        from qgp_world import qgp_world
+        from qgp_delta import qgp_delta_encoder, qgp_player_delta
+    except:
+        from qgp.qgp_world import qgp_world
+        from qgp.qgp_delta import qgp_delta_encoder, qgp_player_delta
+
+    #one viewer at the origin, ten near players and ten far ones
+    world = qgp_world()
+    world.set_movement((1, 1, 0, 0, 0, 0, 0))
+    for player_id in range(10, 20):
+        world.set_movement((player_id, 1, 0, 50, 0, 0, 5))
+    for player_id in range(100, 110):
+        world.set_movement((player_id, 1, 0, 4000, 0, 0, 5))
+
+    #room for the viewer and 4 others per tick, with the client's acks arriving 3 ticks late
+    selector = qgp_lod_selector(budget=5 * QGP_LOD_RECORD_COST)
+    encoder = qgp_delta_encoder()
+    ack_lag = 3
+    updates = {}
+    largest = 0
+    for tick in range(100):
+        for player_id in list(world.slots):
+            if player_id != 1:
+                slot = world.slot_of(player_id)
+                world.set_movement((player_id, 1, 0, world.x_positions[slot], tick, 0, 5))
+
+        records = selector.select(world, (1,), baseline=encoder.baseline_records())
+        largest = max(largest, len(encoder.encode(tick, records)))
+        if tick >= ack_lag:
+            encoder.ack(tick - ack_lag)
+
+        #counting the players sent with their values from this tick
+        for player_id, record in selector.sent.items():
+            if record[4] == tick:
+                updates[player_id] = updates.get(player_id, 0) + 1
+
+    near_updates = sum(updates.get(player_id, 0) for player_id in range(10, 20)) / 10
+    far_updates = sum(updates.get(player_id, 0) for player_id in range(100, 110)) / 10
+    print(f"updates per player over 100 ticks: near {near_updates:.1f}, far {far_updates:.1f}")
+    print("largest PDU", largest, "budget plus the delta headers", selector.budget + qgp_player_delta.PDU_STRUCT.size)
@@ -0,0 +1,170 @@
+import logging, logging.handlers, queue, sys, time, atexit
+#importing the libraries in a way so this file can be ran in isolation for testing
+try:
+    from pdu_constants import *
+except:
+    from qgp.pdu_constants import *
+
+#the logger every qgp logger hangs off, e.g. "qgp.server"
+QGP_LOGGER_NAME = "qgp"
+
+#the format used when logging is started
+QGP_LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+#the level each message type is logged at, types not listed use INFO
+#the per-tick gameplay messages are DEBUG so they cost one level check unless asked for
+QGP_MSG_TYPE_LEVELS = {
+    QGP_MSG_PLAYER_MOVEMENT: logging.DEBUG,
+    QGP_MSG_PLAYER_MOVEMENT_COMPACT: logging.DEBUG,
+    QGP_MSG_PLAYER_STATUS: logging.DEBUG,
+    QGP_MSG_PLAYER_SNAPSHOT: logging.DEBUG,
+    QGP_MSG_PLAYER_DELTA: logging.DEBUG,
+    QGP_MSG_SNAPSHOT_ACK: logging.DEBUG,
+    QGP_MSG_LD_MAP_CHUNK: logging.DEBUG,
+    QGP_MSG_LD_PROGRESS: logging.DEBUG,
+}
+
+#the default level of message types that aren't in QGP_MSG_TYPE_LEVELS
+QGP_DEFAULT_MSG_TYPE_LEVEL = logging.INFO
+
+#the library stays silent until the program starts logging
+logging.getLogger(QGP_LOGGER_NAME).addHandler(logging.NullHandler())
+
+#the running queue listener, None until start_logging is called
+_LISTENER = None
+
+#defining function to get a qgp logger
+def get_logger(name=None):
+    if name is None:
+        return logging.getLogger(QGP_LOGGER_NAME)
+
+    return logging.getLogger(f"{QGP_LOGGER_NAME}.{name}")
+
+#defining function to change the level a message type is logged at
+def set_msg_type_level(msg_type, level):
+    QGP_MSG_TYPE_LEVELS[msg_type] = level
+
+#defining function to get the level a message type is logged at
+def msg_type_level(msg_type):
+    return QGP_MSG_TYPE_LEVELS.get(msg_type, QGP_DEFAULT_MSG_TYPE_LEVEL)
+
+#defining function to log a message about a PDU at the level of its message type
+#the arguments are only formatted if the record is going to be written
+def log_pdu(logger, msg_type, message, *args):
+    level = QGP_MSG_TYPE_LEVELS.get(msg_type, QGP_DEFAULT_MSG_TYPE_LEVEL)
+    if logger.isEnabledFor(level):
+        logger.log(level, message, *args, extra={"msg_type": msg_type})
+
+#defining the filter that rate limits noisy records
+#each call site (and message type) may write limit records per interval seconds
+#the rest are dropped and counted, and the next record written says how many were dropped
+#records above max_level, e.g. errors, are never dropped
+class qgp_sampling_filter(logging.Filter):
+    def __init__(self, limit=10, interval=1.0, max_level=logging.WARNING, clock=time.monotonic):
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self.max_level = max_level
+        self.clock = clock
+
+        #(window start, records written, records dropped) per call site
+        self.windows = {}
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+
+        key = (record.name, record.msg, getattr(record, "msg_type", None))
+        now = self.clock()
+        window_start, written, dropped = self.windows.get(key, (now, 0, 0))
+
+        #starting a new window once the old one has run out
+        if now - window_start >= self.interval:
+            window_start, written = now, 0
+
+        if written >= self.limit:
+            self.windows[key] = (window_start, written, dropped + 1)
+            return False
+
+        #noting the dropped records on the first record that gets through
+        if dropped:
+            record.msg = f"{record.msg} ({dropped} similar records dropped)"
+
+        self.windows[key] = (window_start, written + 1, 0)
+        return True
+
+#defining function to start writing the qgp logs
+#records are put on a queue and written by a listener thread so the event loop never waits on the stream
+#returns the listener, calling it again returns the running one
+def start_logging(level=logging.INFO, stream=None, sample_limit=10, sample_interval=1.0):
+    global _LISTENER
+
+    logger = get_logger()
+    logger.setLevel(level)
+    if _LISTENER is not None:
+        return _LISTENER
+
+    stream_handler = logging.StreamHandler(stream if stream is not None else sys.stdout)
+    stream_handler.setFormatter(logging.Formatter(QGP_LOG_FORMAT))
+
+    #sampling before the queue so dropped records are never queued
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(qgp_sampling_filter(sample_limit, sample_interval))
+
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+
+    _LISTENER = logging.handlers.QueueListener(log_queue, stream_handler)
+    _LISTENER.start()
+    atexit.register(stop_logging)
+    return _LISTENER
+
+#defining function to stop the listener, writing anything still queued
+def stop_logging():
+    global _LISTENER
+
+    if _LISTENER is None:
+        return
+
+    _LISTENER.stop()
+    logger = get_logger()
+    for handler in list(logger.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            logger.removeHandler(handler)
+
+    logger.propagate = True
+    _LISTENER = None
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP LOGGING
+    ############################################################################
+    import io
+
+    #nothing is written before logging is started
+    get_logger("test").warning("not written")
+
+    output = io.StringIO()
+    start_logging(logging.DEBUG, stream=output, sample_limit=3)
+    test_logger = get_logger("test")
+
+    #only the first 3 of a burst of movement records are written
+    for player_id in range(100):
+        log_pdu(test_logger, QGP_MSG_PLAYER_MOVEMENT, "Player %d moved", player_id)
+    test_logger.error("errors are never sampled")
+
+    #raising the logger level above DEBUG turns the movement records off
+    start_logging(logging.INFO)
+    log_pdu(test_logger, QGP_MSG_PLAYER_MOVEMENT, "Player %d moved", 101)
+    stop_logging()
+    print(output.getvalue(), end="")
+
+    #timing a disabled movement record
+    rounds = 200000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        log_pdu(test_logger, QGP_MSG_PLAYER_MOVEMENT, "Player %d moved", 1)
+    print(f"disabled movement record: {(time.perf_counter() - start) / rounds * 1e9:.0f}ns")
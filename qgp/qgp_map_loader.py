@@ -0,0 +1,401 @@
+import asyncio, os, random
+#importing the libraries in a way so this file can be ran in isolation for testing
+try:
+    from qgp_logging import get_logger
+    from qgp_asset_cache import asset_digest
+except:
+    from qgp.qgp_logging import get_logger
+    from qgp.qgp_asset_cache import asset_digest
+
+#the directory maps are read from, a map is stored as <match_map>.qmap
+QGP_MAP_DIRECTORY = "maps"
+
+#the size of maps that aren't on disk, they are generated from their id so the load phase works without assets
+QGP_GENERATED_MAP_SIZE = 64 * 1024
+
+#the bytes of map data in one chunk
+QGP_MAP_CHUNK_SIZE = 1024
+
+#the chunks a client can have unacknowledged before the server waits for its progress
+QGP_LOAD_WINDOW = 16
+
+#the client reports its progress after this many chunks and when it has the whole map
+QGP_LOAD_PROGRESS_EVERY = 4
+
+#the bytes of map data sent to all clients together each pump
+QGP_LOAD_BYTES_PER_PUMP = 64 * 1024
+
+#the seconds between pumps
+QGP_LOAD_PUMP_INTERVAL = 0.01
+
+#the seconds a match waits for its players to load before starting anyway
+QGP_LOAD_TIMEOUT = 30
+
+LOGGER = get_logger("loading")
+
+#defining the class that holds the maps the server can send
+#each map is read once and kept, chunks are sent as views into it so they aren't copied
+class qgp_map_store:
+    #defining the class variables
+    def __init__(self, directory=QGP_MAP_DIRECTORY, generated_size=QGP_GENERATED_MAP_SIZE):
+        self.directory = directory
+        self.generated_size = generated_size
+
+        #match_map -> bytes
+        self.maps = {}
+
+        #match_map -> sha256 of the map
+        self.digests = {}
+
+    #defining function to get the data of a map
+    def get(self, match_map):
+        data = self.maps.get(match_map)
+        if data is None:
+            path = os.path.join(self.directory, f"{match_map}.qmap")
+            if os.path.isfile(path):
+                with open(path, "rb") as map_file:
+                    data = map_file.read()
+            else:
+                data = random.Random(match_map).randbytes(self.generated_size)
+            self.maps[match_map] = data
+
+        return data
+
+    #defining function to get the sha256 of a map, worked out once per map
+    def digest(self, match_map):
+        digest = self.digests.get(match_map)
+        if digest is None:
+            digest = self.digests[match_map] = asset_digest(self.get(match_map))
+
+        return digest
+
+#defining the class for sending one map to one client
+#the client can be at most window chunks behind what it has acknowledged
+class qgp_map_transfer:
+    __slots__ = ("member", "match_id", "match_map", "data", "digest", "chunk_size", "chunk_count", "window",
+                 "next_chunk", "acked")
+
+    #defining the class variables
+    def __init__(self, member, match_id, match_map, data, chunk_size=QGP_MAP_CHUNK_SIZE, window=QGP_LOAD_WINDOW,
+                 digest=None):
+        self.member = member
+        self.match_id = match_id
+        self.match_map = match_map
+        self.data = memoryview(data)
+        self.digest = digest
+        self.chunk_size = chunk_size
+        self.chunk_count = (len(data) + chunk_size - 1) // chunk_size
+        self.window = window
+
+        #the next chunk to send and the number of chunks the client has
+        self.next_chunk = 0
+        self.acked = 0
+
+    #defining function to get how many chunks can be sent before the client has to catch up
+    def sendable(self):
+        return min(self.acked + self.window, self.chunk_count) - self.next_chunk
+
+    #defining function to take the next chunk to send as (chunk_index, data)
+    def take(self):
+        chunk_index = self.next_chunk
+        self.next_chunk += 1
+        start = chunk_index * self.chunk_size
+        return chunk_index, self.data[start:start + self.chunk_size]
+
+    #defining function to record the client's progress
+    def ack(self, chunks_received):
+        self.acked = max(self.acked, min(chunks_received, self.next_chunk))
+
+#defining the class for the load phase of one match
+class qgp_match_load:
+    __slots__ = ("match_id", "match_map", "data", "digest", "chunk_size", "chunk_count", "game", "waiting",
+                 "timeout_handle")
+
+    #defining the class variables
+    #game is whatever the caller wants handed back when the match starts
+    def __init__(self, match_id, match_map, data, digest, chunk_size, game, waiting):
+        self.match_id = match_id
+        self.match_map = match_map
+        self.data = data
+        self.digest = digest
+        self.chunk_size = chunk_size
+        self.chunk_count = (len(data) + chunk_size - 1) // chunk_size
+        self.game = game
+        self.waiting = waiting
+        self.timeout_handle = None
+
+#defining the class that runs the load phase of every match
+#each member is sent the match's map in chunks, and the match is started once everyone has loaded or the timeout fires
+#chunks are sent by a pump that runs every pump_interval and shares bytes_per_pump between every transfer in turn
+#so however many matches are loading, loading adds a bounded amount of work and data per tick next to the running games
+#a transfer only sends while the client is less than window chunks behind, the progress PDUs open the window again
+#members that are still loading at the timeout keep receiving the map after their match starts
+#members that already have the map are waited for without being sent anything
+class qgp_load_manager:
+    #defining the class variables
+    #send_chunk(member, transfer, chunk_index, data) sends one chunk
+    #start_game(match_id, game, still_loading) is called when a match's load phase is over
+    def __init__(self, send_chunk, start_game, store=None, chunk_size=QGP_MAP_CHUNK_SIZE, window=QGP_LOAD_WINDOW,
+                 bytes_per_pump=QGP_LOAD_BYTES_PER_PUMP, pump_interval=QGP_LOAD_PUMP_INTERVAL,
+                 timeout=QGP_LOAD_TIMEOUT):
+        self.send_chunk = send_chunk
+        self.start_game = start_game
+        self.store = store if store is not None else qgp_map_store()
+        self.chunk_size = chunk_size
+        self.window = window
+        self.bytes_per_pump = bytes_per_pump
+        self.pump_interval = pump_interval
+        self.timeout = timeout
+
+        #match_id -> qgp_match_load
+        self.loads = {}
+
+        #member -> match_id of the members a match is waiting for
+        self.members = {}
+
+        #member -> qgp_map_transfer, in the order they are next served
+        self.transfers = {}
+
+        self.pump_handle = None
+
+    #defining function to start the load phase of a match
+    #has_map(member, digest) says whether a member already has the map, those members aren't sent it
+    #returns the qgp_match_load so the caller can tell each member what it is about to load
+    def start(self, match_id, match_map, members, game=None, has_map=None):
+        self.cancel(match_id)
+        load = qgp_match_load(match_id, match_map, self.store.get(match_map), self.store.digest(match_map),
+                              self.chunk_size, game, set(members))
+
+        for member in members:
+            self.remove(member)
+            self.members[member] = match_id
+            if has_map is None or not has_map(member, load.digest):
+                self.send_map(member, load)
+
+        self.loads[match_id] = load
+        load.timeout_handle = asyncio.get_running_loop().call_later(self.timeout, self.time_out, match_id)
+
+        return load
+
+    #defining function to start sending a match's map to a member
+    def send_map(self, member, load):
+        self.transfers[member] = qgp_map_transfer(member, load.match_id, load.match_map, load.data, self.chunk_size,
+                                                  self.window, load.digest)
+        self.schedule_pump()
+
+    #defining function to get the digest of the map a member is being sent or waited on for
+    #returns None if the server isn't loading match_map for the member, so a client can't name a map of its own
+    def digest_for(self, member, match_map):
+        transfer = self.transfers.get(member)
+        if transfer is not None:
+            return transfer.digest if transfer.match_map == match_map else None
+
+        load = self.loads.get(self.members.get(member))
+        if load is not None and load.match_map == match_map:
+            return load.digest
+
+        return None
+
+    #defining function to record a member's progress, letting more chunks be sent to it
+    #a member that was thought to have the map asks for it by reporting no chunks
+    def progress(self, member, chunks_received):
+        transfer = self.transfers.get(member)
+        if transfer is not None:
+            transfer.ack(chunks_received)
+            return
+
+        load = self.loads.get(self.members.get(member))
+        if load is not None and chunks_received == 0:
+            self.send_map(member, load)
+
+    #defining function to record that a member has the whole map
+    def loaded(self, member):
+        self.transfers.pop(member, None)
+        match_id = self.members.pop(member, None)
+
+        load = self.loads.get(match_id)
+        if load is not None:
+            load.waiting.discard(member)
+            if not load.waiting:
+                self.finish(match_id)
+
+    #defining function to forget a member that left its match or disconnected
+    def remove(self, member):
+        self.loaded(member)
+
+    #defining function to get the members a match is still waiting for
+    def waiting(self, match_id):
+        load = self.loads.get(match_id)
+        return set() if load is None else set(load.waiting)
+
+    #defining function to end a match's load phase and start it
+    def finish(self, match_id):
+        load = self.loads.pop(match_id, None)
+        if load is None:
+            return
+
+        if load.timeout_handle is not None:
+            load.timeout_handle.cancel()
+        for member in load.waiting:
+            self.members.pop(member, None)
+
+        self.start_game(match_id, load.game, load.waiting)
+
+    #defining function to start a match whose players haven't all loaded in time
+    def time_out(self, match_id):
+        load = self.loads.get(match_id)
+        if load is not None:
+            load.timeout_handle = None
+            LOGGER.warning("Match %d started with %d players still loading", match_id, len(load.waiting))
+            self.finish(match_id)
+
+    #defining function to drop a match's load phase without starting it
+    def cancel(self, match_id):
+        load = self.loads.pop(match_id, None)
+        if load is None:
+            return
+
+        if load.timeout_handle is not None:
+            load.timeout_handle.cancel()
+        for member in load.waiting:
+            self.members.pop(member, None)
+        for member in [member for member, transfer in self.transfers.items() if transfer.match_id == match_id]:
+            del self.transfers[member]
+
+    #defining function to make sure a pump is coming
+    def schedule_pump(self):
+        if self.pump_handle is None and self.transfers:
+            self.pump_handle = asyncio.get_running_loop().call_later(self.pump_interval, self.pump)
+
+    #defining function to send the next chunks of every transfer, one chunk each in turn
+    #returns the number of bytes sent
+    def pump(self):
+        self.pump_handle = None
+        sent = 0
+        served = []
+        active = [transfer for transfer in self.transfers.values() if transfer.sendable() > 0]
+
+        while active and sent < self.bytes_per_pump:
+            still_active = []
+            for transfer in active:
+                chunk_index, data = transfer.take()
+                self.send_chunk(transfer.member, transfer, chunk_index, data)
+                sent += len(data)
+                served.append(transfer.member)
+
+                if transfer.sendable() > 0:
+                    still_active.append(transfer)
+                if sent >= self.bytes_per_pump:
+                    break
+            active = still_active
+
+        #the transfers served this pump go to the back so the others go first next time
+        for member in served:
+            transfer = self.transfers.pop(member, None)
+            if transfer is not None:
+                self.transfers[member] = transfer
+
+        self.schedule_pump()
+        return sent
+
+    #defining function to stop every load phase
+    def stop(self):
+        for match_id in list(self.loads):
+            self.cancel(match_id)
+        self.transfers.clear()
+        self.members.clear()
+        if self.pump_handle is not None:
+            self.pump_handle.cancel()
+            self.pump_handle = None
+
+#defining the class for a client receiving a map
+#the chunks arrive in order on one stream so each one is written straight after the last
+class qgp_map_download:
+    __slots__ = ("match_id", "match_map", "map_hash", "chunk_size", "chunk_count", "buffer", "received",
+                 "progress_every")
+
+    #defining the class variables
+    def __init__(self, match_id, match_map, map_hash, map_size, chunk_size, chunk_count,
+                 progress_every=QGP_LOAD_PROGRESS_EVERY):
+        self.match_id = match_id
+        self.match_map = match_map
+        self.map_hash = map_hash
+        self.chunk_size = chunk_size
+        self.chunk_count = chunk_count
+        self.buffer = bytearray(map_size)
+        self.received = 0
+        self.progress_every = progress_every
+
+    #defining function to check every chunk has arrived
+    def done(self):
+        return self.received >= self.chunk_count
+
+    #defining function to store a chunk
+    #returns True when the server should be sent the progress
+    def add(self, chunk_index, data):
+        if chunk_index != self.received or self.done():
+            return False
+
+        start = chunk_index * self.chunk_size
+        self.buffer[start:start + len(data)] = data
+        self.received += 1
+
+        return self.done() or self.received % self.progress_every == 0
+
+    #defining function to get the map once it has arrived
+    def data(self):
+        return bytes(self.buffer)
+
+    #defining function to check the map that arrived is the one the server meant to send
+    def verified(self):
+        return self.done() and asset_digest(self.buffer) == self.map_hash
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP MAP LOADER
+    ############################################################################
+    import time
+
+    started = []
+    downloads = {}
+
+    #defining a stand in for the clients that report their progress straight back
+    async def run():
+        manager = None
+
+        def send_chunk(member, transfer, chunk_index, data):
+            download = downloads[member]
+            if download.add(chunk_index, data):
+                manager.progress(member, download.received)
+            if download.done():
+                manager.loaded(member)
+
+        def start_game(match_id, game, still_loading):
+            started.append((match_id, game, sorted(still_loading), time.perf_counter()))
+
+        manager = qgp_load_manager(send_chunk, start_game, bytes_per_pump=32 * 1024)
+
+        #two players loading a 64KB map together and one that has it cached
+        begin = time.perf_counter()
+        load = manager.start(7, 151, ["a", "b", "cached"], game="game 7", has_map=lambda member, digest: member == "cached")
+        for member in ("a", "b"):
+            downloads[member] = qgp_map_download(7, 151, load.digest, len(load.data), load.chunk_size, load.chunk_count)
+        print("sending to", sorted(manager.transfers))
+        manager.loaded("cached")
+
+        while not started:
+            await asyncio.sleep(0.005)
+        print("match", started[0][0], started[0][1], "still loading", started[0][2], f"after {(started[0][3] - begin) * 1e3:.0f}ms")
+        print("maps match", downloads["a"].data() == manager.store.get(151) == downloads["b"].data(), "verified", downloads["a"].verified())
+
+        #a player that never reports progress holds the match until the timeout
+        quiet = qgp_load_manager(lambda member, transfer, chunk_index, data: None, start_game, timeout=0.1)
+        quiet.start(8, 152, ["c"], game="game 8")
+        await asyncio.sleep(0.2)
+        print("match", started[1][0], started[1][1], "still loading", started[1][2],
+              "chunks sent without progress", quiet.transfers["c"].next_chunk)
+        quiet.stop()
+
+    asyncio.run(run())
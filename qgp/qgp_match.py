@@ -0,0 +1,84 @@
+#defining the class that tracks which connections are in which match and team
+#the join and leave PDUs keep it up to date so group sends don't have to scan every client
+class qgp_match_registry:
+    #defining the class variables
+    def __init__(self):
+        #match_id -> set of members
+        self.matches = {}
+
+        #match_id -> team -> set of members
+        self.teams = {}
+
+        #member -> (match_id, team)
+        self.memberships = {}
+
+    #defining function to add a member to a match and team
+    #a member can only be in one match so any old membership is dropped first
+    def join(self, member, match_id, team):
+        if member in self.memberships:
+            self.leave(member)
+
+        self.matches.setdefault(match_id, set()).add(member)
+        self.teams.setdefault(match_id, {}).setdefault(team, set()).add(member)
+        self.memberships[member] = (match_id, team)
+
+    #defining function to remove a member from its match
+    #returns the (match_id, team) that was left or None if it wasn't in a match
+    def leave(self, member):
+        membership = self.memberships.pop(member, None)
+        if membership is None:
+            return None
+
+        match_id, team = membership
+        members = self.matches[match_id]
+        members.discard(member)
+
+        team_members = self.teams[match_id][team]
+        team_members.discard(member)
+
+        #cleaning up empty teams and matches
+        if not team_members:
+            del self.teams[match_id][team]
+        if not members:
+            del self.matches[match_id]
+            del self.teams[match_id]
+
+        return membership
+
+    #defining function to get every member of a match
+    def match_members(self, match_id):
+        return self.matches.get(match_id, set())
+
+    #defining function to get the members of one team in a match
+    def team_members(self, match_id, team):
+        return self.teams.get(match_id, {}).get(team, set())
+
+    #defining function to get the (match_id, team) of a member
+    def membership(self, member):
+        return self.memberships.get(member)
+
+    #defining function to get the ids of every match with members
+    def match_ids(self):
+        return list(self.matches)
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP MATCH REGISTRY
+    ############################################################################
+    registry = qgp_match_registry()
+    registry.join("client_a", 56, 1)
+    registry.join("client_b", 56, 2)
+    registry.join("client_c", 57, 1)
+
+    print("match 56", sorted(registry.match_members(56)))
+    print("match 56 team 2", sorted(registry.team_members(56, 2)))
+
+    #moving a client to another match
+    registry.join("client_b", 57, 1)
+    print("match 56 after move", sorted(registry.match_members(56)))
+    print("match 57 after move", sorted(registry.match_members(57)))
+
+    print("left", registry.leave("client_a"))
+    print("matches", registry.match_ids())
@@ -0,0 +1,192 @@
+import heapq, itertools
+
+#the players in a match when the mode has no size of its own
+QGP_DEFAULT_MATCH_SIZE = 10
+
+#the width of a skill bucket, players are only matched with others in the same bucket
+QGP_DEFAULT_SKILL_BUCKET = 200
+
+#the number of teams a formed match is split into
+QGP_DEFAULT_TEAM_COUNT = 2
+
+#matchmade match ids start here so they don't clash with ids typed at the CLI
+QGP_FIRST_MATCHMADE_ID = 0x10000
+
+#defining the class for a match the matchmaker has formed
+class qgp_formed_match:
+    __slots__ = ("match_id", "match_mode", "players")
+
+    #defining the class variables
+    #players is a list of (player_id, team)
+    def __init__(self, match_id, match_mode, players):
+        self.match_id = match_id
+        self.match_mode = match_mode
+        self.players = players
+
+    #defining function to get the ids of every player in the match
+    def player_ids(self):
+        return [player_id for player_id, team in self.players]
+
+#defining the class that groups queued players into matches
+#players are kept in a bucket per (mode, skill // skill_bucket), each bucket is a heap ordered by when they queued
+#so queueing is one heap push and a match is formed as soon as a bucket holds enough players
+#leaving only marks the player as gone, its heap entry is skipped when the bucket is next used
+class qgp_matchmaker:
+    #defining the class variables
+    def __init__(self, match_size=QGP_DEFAULT_MATCH_SIZE, skill_bucket=QGP_DEFAULT_SKILL_BUCKET,
+                 team_count=QGP_DEFAULT_TEAM_COUNT, match_sizes=None, first_match_id=QGP_FIRST_MATCHMADE_ID,
+                 match_id_in_use=None):
+        self.match_size = match_size
+        self.skill_bucket = skill_bucket
+        self.team_count = team_count
+
+        #match_mode -> match size for modes that aren't the default size
+        self.match_sizes = dict(match_sizes or {})
+
+        #(mode, bucket) -> heap of (queue order, player_id, skill)
+        self.buckets = {}
+
+        #(mode, bucket) -> players still queued in it
+        self.bucket_counts = {}
+
+        #player_id -> ((mode, bucket), queue order, skill)
+        self.queued = {}
+
+        self.queue_order = itertools.count()
+        self.match_ids = itertools.count(first_match_id)
+        self.match_id_in_use = match_id_in_use
+
+    def __len__(self):
+        return len(self.queued)
+
+    def __contains__(self, player_id):
+        return player_id in self.queued
+
+    #defining function to get the bucket a player queues in
+    def bucket_for(self, match_mode, skill):
+        return match_mode, skill // self.skill_bucket
+
+    #defining function to get the number of players a match of a mode needs
+    def size_for(self, match_mode):
+        return self.match_sizes.get(match_mode, self.match_size)
+
+    #defining function to get how many players are waiting with a player's mode and skill
+    def waiting(self, match_mode, skill):
+        return self.bucket_counts.get(self.bucket_for(match_mode, skill), 0)
+
+    #defining function to get how many players are waiting for each mode
+    def waiting_by_mode(self):
+        modes = {}
+        for (match_mode, bucket), count in self.bucket_counts.items():
+            modes[match_mode] = modes.get(match_mode, 0) + count
+
+        return modes
+
+    #defining function to queue a player, queueing again moves the player to the back with the new mode and skill
+    #returns the qgp_formed_match if this player filled a match, otherwise None
+    def enqueue(self, player_id, match_mode, skill):
+        self.remove(player_id)
+
+        key = self.bucket_for(match_mode, skill)
+        order = next(self.queue_order)
+        heapq.heappush(self.buckets.setdefault(key, []), (order, player_id, skill))
+        self.queued[player_id] = (key, order, skill)
+        self.bucket_counts[key] = self.bucket_counts.get(key, 0) + 1
+
+        if self.bucket_counts[key] >= self.size_for(match_mode):
+            return self.form(key)
+
+        return None
+
+    #defining function to take a player out of the queue
+    #returns True if the player was queued
+    def remove(self, player_id):
+        entry = self.queued.pop(player_id, None)
+        if entry is None:
+            return False
+
+        key = entry[0]
+        self.bucket_counts[key] -= 1
+
+        #an empty bucket is dropped along with any entries left for players that have gone
+        if not self.bucket_counts[key]:
+            del self.bucket_counts[key]
+            del self.buckets[key]
+
+        return True
+
+    #defining function to get the next free match id
+    def next_match_id(self):
+        match_id = next(self.match_ids)
+        while self.match_id_in_use is not None and self.match_id_in_use(match_id):
+            match_id = next(self.match_ids)
+
+        return match_id
+
+    #defining function to form a match from the players who have waited longest in a bucket
+    def form(self, key):
+        match_mode = key[0]
+        heap = self.buckets[key]
+        chosen = []
+        while len(chosen) < self.size_for(match_mode):
+            order, player_id, skill = heapq.heappop(heap)
+
+            #skipping the entries of players that left or queued again
+            entry = self.queued.get(player_id)
+            if entry is None or entry[1] != order:
+                continue
+
+            del self.queued[player_id]
+            chosen.append((skill, player_id))
+
+        self.bucket_counts[key] -= len(chosen)
+        if not self.bucket_counts[key]:
+            del self.bucket_counts[key]
+            del self.buckets[key]
+
+        return qgp_formed_match(self.next_match_id(), match_mode, self.split_teams(chosen))
+
+    #defining function to split players into teams with a snake draft on skill
+    #the best player goes to team 1, the next ones to team 2, then back the other way, so team skill stays even
+    def split_teams(self, chosen):
+        chosen.sort(key=lambda skill_player: (-skill_player[0], skill_player[1]))
+        players = []
+        for index, (skill, player_id) in enumerate(chosen):
+            draft_round, position = divmod(index, self.team_count)
+            if draft_round % 2:
+                position = self.team_count - 1 - position
+            players.append((player_id, position + 1))
+
+        return players
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP MATCHMAKER
+    ############################################################################
+    import random, time
+
+    matchmaker = qgp_matchmaker(match_size=4, match_sizes={2: 2})
+    print("queued 1", matchmaker.enqueue(1, 1, 1000), "queued 2", matchmaker.enqueue(2, 1, 1100))
+    print("other bucket", matchmaker.enqueue(3, 1, 1500), "waiting", matchmaker.waiting(1, 1000))
+
+    #a player that leaves is skipped when the match is formed
+    matchmaker.enqueue(4, 1, 1050)
+    matchmaker.remove(2)
+    matchmaker.enqueue(5, 1, 1150)
+    match = matchmaker.enqueue(6, 1, 1190)
+    print("match", match.match_id, "mode", match.match_mode, "players", match.players)
+    print("mode 2 match", matchmaker.enqueue(7, 2, 10), matchmaker.enqueue(8, 2, 20).players)
+    print("left waiting", len(matchmaker), matchmaker.waiting_by_mode())
+
+    #timing a busy queue
+    random.seed(1)
+    big_matchmaker = qgp_matchmaker()
+    formed = 0
+    start = time.perf_counter()
+    for player_id in range(100000):
+        if big_matchmaker.enqueue(player_id, random.randrange(4), random.randrange(3000)) is not None:
+            formed += 1
+    elapsed = time.perf_counter() - start
+    print(f"100000 players queued: {formed} matches formed in {elapsed * 1e3:.0f}ms, {len(big_matchmaker)} still waiting")
@@ -10,6 +10,12 @@ except:
 #defining a class for player movement
 class qgp_player_movement:
     FORMAT = "!I I I I I I I"
+    STRUCT = struct.Struct(FORMAT)
+    SIZE = STRUCT.size
+    PDU_STRUCT = qgp_header.pdu_struct(FORMAT)
+
+    #movement is the most frequent PDU so it is slotted to keep each object small
+    __slots__ = ("header", "player_id", "movement_type", "direction", "x_position", "y_position", "z_position", "speed")
 
     #defining the class variables
     def __init__(self, header, player_id, movement_type, direction, x_position, y_position, z_position, speed):
@@ -21,47 +27,55 @@ class qgp_player_movement:
         self.y_position = y_position
         self.z_position = z_position
         self.speed = speed
-        
+
+    #defining function to get the size of the packed PDU
+    def packed_size(self):
+        return self.PDU_STRUCT.size
+
+    #defining function to pack the variables into a buffer
+    def pack_into(self, buffer, offset=0):
+        #creating the headers
+        self.header.msg_len = self.PDU_STRUCT.size
+        self.header.msg_type = QGP_MSG_PLAYER_MOVEMENT
+
+        #packing the headers and payload in one call
+        self.PDU_STRUCT.pack_into(buffer, offset, self.header.version, self.header.msg_type, self.header.msg_len,
+                                  self.header.priority, self.player_id, self.movement_type, self.direction,
+                                  self.x_position, self.y_position, self.z_position, self.speed)
+        return offset + self.PDU_STRUCT.size
+
     #defining function to pack the variables
     def pack(self):
-        #packing the payload
-        payload = struct.pack(self.FORMAT, self.player_id, self.movement_type, self.direction, self.x_position, self.y_position,self.z_position, self.speed)
-        
         #creating the headers
-        self.header.msg_len = qgp_header.SIZE + len(payload)
+        self.header.msg_len = self.PDU_STRUCT.size
         self.header.msg_type = QGP_MSG_PLAYER_MOVEMENT
-        
-        
-        return self.header.pack() + payload
-    
+
+        return self.PDU_STRUCT.pack(self.header.version, self.header.msg_type, self.header.msg_len,
+                                    self.header.priority, self.player_id, self.movement_type, self.direction,
+                                    self.x_position, self.y_position, self.z_position, self.speed)
+
     #defining function to unpack the variables 
     @classmethod
     def unpack(cls, header, payload):
-        # defining the offset to know where everything is at
-        offset = 0
-
-        # getting the client id and version and updating the offset num
-        func_player_id, func_movement_type, func_direction, func_x_position, func_y_position, func_z_position, func_speed = struct.unpack_from("!I I I I I I I", payload, offset)
-        offset += struct.calcsize("!I I I I I I I")
-
-        # getting the capalities length
-        #func_cap_bytes, = struct.unpack_from("!H", payload, offset)
-        #offset += struct.calcsize("!H")
-
-        # getting the actual capabilities
-        #func_caps = payload[offset:offset + func_cap_bytes].decode("utf-8")
-        #offset += func_cap_bytes
-
         # checking the length of the message
-        if header.msg_len != qgp_header.SIZE + offset:
+        if header.msg_len != header.size + cls.SIZE or len(payload) < cls.SIZE:
             return "Length is not expected"
 
+        # getting the player movement fields
+        func_player_id, func_movement_type, func_direction, func_x_position, func_y_position, func_z_position, func_speed = cls.STRUCT.unpack_from(payload, 0)
+
         # returning the PDU values
         return cls(header, func_player_id, func_movement_type, func_direction, func_x_position, func_y_position, func_z_position, func_speed)
 
+
 #defining class to join a match
 class qgp_player_join:
     FORMAT = "!I I I"
+    STRUCT = struct.Struct(FORMAT)
+    SIZE = STRUCT.size
+    PDU_STRUCT = qgp_header.pdu_struct(FORMAT)
+
+    __slots__ = ("header", "player_id", "match_id", "player_team")
 
     #defining the class variables
     def __init__(self, header, player_id, match_id, player_team):
@@ -70,30 +84,44 @@ class qgp_player_join:
         self.match_id = match_id
         self.player_team = player_team
 
+    def packed_size(self):
+        return self.PDU_STRUCT.size
+
+    #defining the packing into a buffer class
+    def pack_into(self, buffer, offset=0):
+        self.header.msg_len = self.PDU_STRUCT.size
+        self.header.msg_type = QGP_MSG_PLAYER_JOIN
+        self.PDU_STRUCT.pack_into(buffer, offset, self.header.version, self.header.msg_type, self.header.msg_len,
+                                  self.header.priority, self.player_id, self.match_id, self.player_team)
+        return offset + self.PDU_STRUCT.size
+
     #defining the packing class
     def pack(self):
-        payload = struct.pack(self.FORMAT, self.player_id, self.match_id, self.player_team)
-        self.header.msg_len = qgp_header.SIZE + len(payload)
+        self.header.msg_len = self.PDU_STRUCT.size
         self.header.msg_type = QGP_MSG_PLAYER_JOIN
-        return self.header.pack() + payload
+        return self.PDU_STRUCT.pack(self.header.version, self.header.msg_type, self.header.msg_len,
+                                    self.header.priority, self.player_id, self.match_id, self.player_team)
 
     #defining the unpacking class
     @classmethod
     def unpack(cls, header, payload):
-        offset = 0
-        func_player_id, func_match_id, func_player_team = struct.unpack_from(cls.FORMAT, payload, offset)
-        offset += struct.calcsize(cls.FORMAT)
-
         # checking the length of the message
-        if header.msg_len != qgp_header.SIZE + offset:
+        if header.msg_len != header.size + cls.SIZE or len(payload) < cls.SIZE:
             return "Length is not expected"
 
+        func_player_id, func_match_id, func_player_team = cls.STRUCT.unpack_from(payload, 0)
+
         #returning the unpacked values
         return cls(header, func_player_id, func_match_id, func_player_team)
 
 #defining the class for player leaving
 class qgp_player_leave:
     FORMAT = "!I I I"
+    STRUCT = struct.Struct(FORMAT)
+    SIZE = STRUCT.size
+    PDU_STRUCT = qgp_header.pdu_struct(FORMAT)
+
+    __slots__ = ("header", "player_id", "match_id", "player_team")
 
     # defining the class variables
     def __init__(self, header, player_id, match_id, player_team):
@@ -102,30 +130,45 @@ class qgp_player_leave:
         self.match_id = match_id
         self.player_team = player_team
 
+    def packed_size(self):
+        return self.PDU_STRUCT.size
+
+    # defining the packing into a buffer class
+    def pack_into(self, buffer, offset=0):
+        self.header.msg_len = self.PDU_STRUCT.size
+        self.header.msg_type = QGP_MSG_PLAYER_LEAVE
+        self.PDU_STRUCT.pack_into(buffer, offset, self.header.version, self.header.msg_type, self.header.msg_len,
+                                  self.header.priority, self.player_id, self.match_id, self.player_team)
+        return offset + self.PDU_STRUCT.size
+
     # defining the packing class
     def pack(self):
-        payload = struct.pack(self.FORMAT, self.player_id, self.match_id, self.player_team)
-        self.header.msg_len = qgp_header.SIZE + len(payload)
+        self.header.msg_len = self.PDU_STRUCT.size
         self.header.msg_type = QGP_MSG_PLAYER_LEAVE
-        return self.header.pack() + payload
+        return self.PDU_STRUCT.pack(self.header.version, self.header.msg_type, self.header.msg_len,
+                                    self.header.priority, self.player_id, self.match_id, self.player_team)
 
     # defining the unpacking class
     @classmethod
     def unpack(cls, header, payload):
-        offset = 0
-        func_player_id, func_match_id, func_player_team = struct.unpack_from(cls.FORMAT, payload, offset)
-        offset += struct.calcsize(cls.FORMAT)
-
         # checking the length of the message
-        if header.msg_len != qgp_header.SIZE + offset:
+        if header.msg_len != header.size + cls.SIZE or len(payload) < cls.SIZE:
             return "Length is not expected"
 
+        func_player_id, func_match_id, func_player_team = cls.STRUCT.unpack_from(payload, 0)
+
         # returning the unpacked values
         return cls(header, func_player_id, func_match_id, func_player_team)
 
 #defining class for the player status
 class qgp_player_status:
     FORMAT = "!I I I"
+    STRUCT = struct.Struct(FORMAT)
+    SIZE = STRUCT.size
+    PDU_STRUCT = qgp_header.pdu_struct(FORMAT)
+
+    #status is sent every tick so it is slotted to keep each object small
+    __slots__ = ("header", "player_id", "player_health", "player_dmg_taken")
 
     #defining the class variables
     def __init__(self, header, player_id, player_health, player_dmg_taken):
@@ -134,26 +177,36 @@ class qgp_player_status:
         self.player_health = player_health
         self.player_dmg_taken = player_dmg_taken
 
+    def packed_size(self):
+        return self.PDU_STRUCT.size
+
+    #defining class to pack these values into a buffer
+    def pack_into(self, buffer, offset=0):
+        self.header.msg_len = self.PDU_STRUCT.size
+        self.header.msg_type = QGP_MSG_PLAYER_STATUS
+        self.PDU_STRUCT.pack_into(buffer, offset, self.header.version, self.header.msg_type, self.header.msg_len,
+                                  self.header.priority, self.player_id, self.player_health, self.player_dmg_taken)
+        return offset + self.PDU_STRUCT.size
+
     #defining class to pack these values
     def pack(self):
-        payload = struct.pack(self.FORMAT, self.player_id, self.player_health, self.player_dmg_taken)
-        self.header.msg_len = qgp_header.SIZE + len(payload)
+        self.header.msg_len = self.PDU_STRUCT.size
         self.header.msg_type = QGP_MSG_PLAYER_STATUS
-        return self.header.pack() + payload
+        return self.PDU_STRUCT.pack(self.header.version, self.header.msg_type, self.header.msg_len,
+                                    self.header.priority, self.player_id, self.player_health, self.player_dmg_taken)
 
     @classmethod
     def unpack(cls, header, payload):
-        offset = 0
-        func_player_id, func_health, func_dmg_taken = struct.unpack_from(cls.FORMAT, payload, offset)
-        offset += struct.calcsize(cls.FORMAT)
-
         #checking the length is expected
-        if header.msg_len != qgp_header.SIZE + offset:
+        if header.msg_len != header.size + cls.SIZE or len(payload) < cls.SIZE:
             return "Length is not expected"
 
+        func_player_id, func_health, func_dmg_taken = cls.STRUCT.unpack_from(payload, 0)
+
         #returning the unpacked data
         return cls(header, func_player_id, func_health, func_dmg_taken)
 
+
     
 #defining debug function
 if __name__ == "__main__":
@@ -0,0 +1,181 @@
+import struct
+#importing the libraries in a way so this file can be ran in isolation for testing
+try:
+    from pdu_constants import *
+    from qgp_header import qgp_header
+except:
+    from qgp.pdu_constants import *
+    from qgp.qgp_header import qgp_header
+
+#defining the class for a client asking to join or leave the matchmaking queue
+class qgp_queue_request:
+    FORMAT = "!I I I B"
+    STRUCT = struct.Struct(FORMAT)
+    SIZE = STRUCT.size
+    PDU_STRUCT = qgp_header.pdu_struct(FORMAT)
+
+    __slots__ = ("header", "player_id", "match_mode", "player_skill", "queue_action")
+
+    #defining the class variables
+    def __init__(self, header, player_id, match_mode, player_skill, queue_action=QGP_QUEUE_JOIN):
+        self.header = header
+        self.player_id = player_id
+        self.match_mode = match_mode
+        self.player_skill = player_skill
+        self.queue_action = queue_action
+
+    def packed_size(self):
+        return self.PDU_STRUCT.size
+
+    #defining the packing into a buffer class
+    def pack_into(self, buffer, offset=0):
+        self.header.msg_len = self.PDU_STRUCT.size
+        self.header.msg_type = QGP_MSG_Q_REQ
+        self.PDU_STRUCT.pack_into(buffer, offset, self.header.version, self.header.msg_type, self.header.msg_len,
+                                  self.header.priority, self.player_id, self.match_mode, self.player_skill,
+                                  self.queue_action)
+        return offset + self.PDU_STRUCT.size
+
+    #defining the packing class
+    def pack(self):
+        self.header.msg_len = self.PDU_STRUCT.size
+        self.header.msg_type = QGP_MSG_Q_REQ
+        return self.PDU_STRUCT.pack(self.header.version, self.header.msg_type, self.header.msg_len,
+                                    self.header.priority, self.player_id, self.match_mode, self.player_skill,
+                                    self.queue_action)
+
+    #defining the unpacking class
+    @classmethod
+    def unpack(cls, header, payload):
+        # checking the length of the message
+        if header.msg_len != header.size + cls.SIZE or len(payload) < cls.SIZE:
+            return "Length is not expected"
+
+        func_player_id, func_match_mode, func_player_skill, func_queue_action = cls.STRUCT.unpack_from(payload, 0)
+
+        #returning the unpacked values
+        return cls(header, func_player_id, func_match_mode, func_player_skill, func_queue_action)
+
+#defining the class for the server's answer to a queue request
+#players_waiting is how many players are queued for the same mode and skill
+class qgp_queue_response:
+    FORMAT = "!I I B I"
+    STRUCT = struct.Struct(FORMAT)
+    SIZE = STRUCT.size
+    PDU_STRUCT = qgp_header.pdu_struct(FORMAT)
+
+    __slots__ = ("header", "player_id", "match_mode", "queue_status", "players_waiting")
+
+    #defining the class variables
+    def __init__(self, header, player_id, match_mode, queue_status, players_waiting=0):
+        self.header = header
+        self.player_id = player_id
+        self.match_mode = match_mode
+        self.queue_status = queue_status
+        self.players_waiting = players_waiting
+
+    def packed_size(self):
+        return self.PDU_STRUCT.size
+
+    #defining the packing into a buffer class
+    def pack_into(self, buffer, offset=0):
+        self.header.msg_len = self.PDU_STRUCT.size
+        self.header.msg_type = QGP_MSG_Q_RES
+        self.PDU_STRUCT.pack_into(buffer, offset, self.header.version, self.header.msg_type, self.header.msg_len,
+                                  self.header.priority, self.player_id, self.match_mode, self.queue_status,
+                                  self.players_waiting)
+        return offset + self.PDU_STRUCT.size
+
+    #defining the packing class
+    def pack(self):
+        self.header.msg_len = self.PDU_STRUCT.size
+        self.header.msg_type = QGP_MSG_Q_RES
+        return self.PDU_STRUCT.pack(self.header.version, self.header.msg_type, self.header.msg_len,
+                                    self.header.priority, self.player_id, self.match_mode, self.queue_status,
+                                    self.players_waiting)
+
+    #defining the unpacking class
+    @classmethod
+    def unpack(cls, header, payload):
+        # checking the length of the message
+        if header.msg_len != header.size + cls.SIZE or len(payload) < cls.SIZE:
+            return "Length is not expected"
+
+        func_player_id, func_match_mode, func_queue_status, func_players_waiting = cls.STRUCT.unpack_from(payload, 0)
+
+        #returning the unpacked values
+        return cls(header, func_player_id, func_match_mode, func_queue_status, func_players_waiting)
+
+#defining the class telling a queued player which match and team it has been put in
+#the game start for the match follows it
+class qgp_match_found:
+    FORMAT = "!I I I I"
+    STRUCT = struct.Struct(FORMAT)
+    SIZE = STRUCT.size
+    PDU_STRUCT = qgp_header.pdu_struct(FORMAT)
+
+    __slots__ = ("header", "player_id", "match_id", "match_mode", "player_team")
+
+    #defining the class variables
+    def __init__(self, header, player_id, match_id, match_mode, player_team):
+        self.header = header
+        self.player_id = player_id
+        self.match_id = match_id
+        self.match_mode = match_mode
+        self.player_team = player_team
+
+    def packed_size(self):
+        return self.PDU_STRUCT.size
+
+    #defining the packing into a buffer class
+    def pack_into(self, buffer, offset=0):
+        self.header.msg_len = self.PDU_STRUCT.size
+        self.header.msg_type = QGP_MSG_MATCH
+        self.PDU_STRUCT.pack_into(buffer, offset, self.header.version, self.header.msg_type, self.header.msg_len,
+                                  self.header.priority, self.player_id, self.match_id, self.match_mode,
+                                  self.player_team)
+        return offset + self.PDU_STRUCT.size
+
+    #defining the packing class
+    def pack(self):
+        self.header.msg_len = self.PDU_STRUCT.size
+        self.header.msg_type = QGP_MSG_MATCH
+        return self.PDU_STRUCT.pack(self.header.version, self.header.msg_type, self.header.msg_len,
+                                    self.header.priority, self.player_id, self.match_id, self.match_mode,
+                                    self.player_team)
+
+    #defining the unpacking class
+    @classmethod
+    def unpack(cls, header, payload):
+        # checking the length of the message
+        if header.msg_len != header.size + cls.SIZE or len(payload) < cls.SIZE:
+            return "Length is not expected"
+
+        func_player_id, func_match_id, func_match_mode, func_player_team = cls.STRUCT.unpack_from(payload, 0)
+
+        #returning the unpacked values
+        return cls(header, func_player_id, func_match_id, func_match_mode, func_player_team)
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP QUEUE PDUS
+    ############################################################################
+    queue_header = qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+
+    packed_request = qgp_queue_request(queue_header, 12, 3, 1450).pack()
+    header, payload = qgp_header.unpack(packed_request)
+    request = qgp_queue_request.unpack(header, payload)
+    print("request", request.player_id, request.match_mode, request.player_skill, request.queue_action)
+
+    packed_response = qgp_queue_response(queue_header, 12, 3, QGP_QUEUE_JOINED, 5).pack()
+    header, payload = qgp_header.unpack(packed_response)
+    response = qgp_queue_response.unpack(header, payload)
+    print("response", response.player_id, response.queue_status, response.players_waiting)
+
+    packed_match = qgp_match_found(queue_header, 12, 65536, 3, 2).pack()
+    header, payload = qgp_header.unpack(packed_match)
+    match = qgp_match_found.unpack(header, payload)
+    print("match", match.player_id, match.match_id, match.match_mode, match.player_team)
+    print("short match", qgp_match_found.unpack(header, payload[:4]))
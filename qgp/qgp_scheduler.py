@@ -0,0 +1,251 @@
+import asyncio
+from collections import deque
+#importing the libraries in a way so this file can be ran in isolation for testing
+try:
+    from pdu_constants import *
+    from qgp_header import qgp_header
+    from qgp_logging import get_logger
+except:
+    from qgp.pdu_constants import *
+    from qgp.qgp_header import qgp_header
+    from qgp.qgp_logging import get_logger
+
+LOGGER = get_logger("scheduler")
+
+#defining the priority classes taken from the header priority byte
+#a lower value is sent first, gameplay PDUs use 0 and chat and errors use 1
+class qgp_priority:
+    GAMEPLAY = 0
+    NORMAL = 1
+    BULK = 2
+    LOWEST = 3
+
+    #priority bytes above the lowest class are treated as the lowest class
+    CLASSES = LOWEST + 1
+
+#defining function to get how many bytes the congestion controller will take right now
+#returns None when the QUIC connection doesn't expose its congestion state
+def congestion_budget(quic):
+    loss = getattr(quic, "_loss", None)
+    if loss is None:
+        return None
+
+    return loss.congestion_window - loss.bytes_in_flight
+
+#defining the per connection outbound scheduler
+#PDUs are queued by priority class and written highest priority first while the connection has room
+#when the queue is over its byte budget the lowest priority PDUs are dropped to make space
+#PDUs sent during a tick are coalesced and flushed with a single transmit() so they share QUIC packets
+class qgp_send_scheduler:
+    #the most bytes held back for one connection
+    MAX_QUEUED_BYTES = 256 * 1024
+
+    #how long PDUs are collected before they are flushed together
+    TICK_INTERVAL = 0.01
+
+    #flushing straight away once this many bytes are waiting
+    FLUSH_THRESHOLD = 16 * 1024
+
+    #how long to wait before retrying PDUs held back by congestion
+    RETRY_INTERVAL = 0.005
+
+    #message types that are never dropped because the receiver can't carry on without every one of them
+    #map chunks are written in order so a dropped chunk would stall the load, the load window bounds how many are queued
+    KEPT_MSG_TYPES = frozenset((QGP_MSG_LD_MAP_CHUNK,))
+
+    #defining the class variables
+    def __init__(self, channels, transmit, budget=None, max_queued_bytes=MAX_QUEUED_BYTES,
+                 protected_priority=qgp_priority.GAMEPLAY, tick_interval=TICK_INTERVAL,
+                 flush_threshold=FLUSH_THRESHOLD, batcher=None):
+        self.channels = channels
+        self.transmit = transmit
+        self.budget = budget
+
+        #a shared batcher flushes many connections from one timer instead of one timer each
+        self.batcher = batcher
+        self.max_queued_bytes = max_queued_bytes
+        self.tick_interval = tick_interval
+        self.flush_threshold = flush_threshold
+
+        #PDUs at or above this priority are never dropped
+        self.protected_priority = protected_priority
+
+        self.queues = [deque() for _ in range(qgp_priority.CLASSES)]
+        self.queued_bytes = 0
+        self.dropped = 0
+        self.flush_handle = None
+
+    #defining function to queue a packed PDU, returns False if it was dropped
+    def enqueue(self, packed_pdu):
+        priority = min(qgp_header.peek_priority(packed_pdu), qgp_priority.LOWEST)
+        size = len(packed_pdu)
+
+        #making room by dropping queued PDUs of a lower priority first
+        while self.queued_bytes + size > self.max_queued_bytes and self.drop_lowest(priority):
+            pass
+
+        #dropping the new PDU if it still doesn't fit and isn't protected
+        if self.queued_bytes + size > self.max_queued_bytes and priority > self.protected_priority \
+                and qgp_header.peek_msg_type(packed_pdu) not in self.KEPT_MSG_TYPES:
+            self.dropped += 1
+            return False
+
+        self.queues[priority].append(packed_pdu)
+        self.queued_bytes += size
+        return True
+
+    #defining function to queue a packed PDU and flush it with the rest of this tick
+    #returns False if it was dropped
+    def send(self, packed_pdu):
+        queued = self.enqueue(packed_pdu)
+
+        #flushing early when enough is waiting to fill several packets
+        if self.queued_bytes >= self.flush_threshold:
+            self.flush()
+        elif self.batcher is not None:
+            self.batcher.add(self)
+        elif self.flush_handle is None:
+            self.flush_handle = asyncio.get_running_loop().call_later(self.tick_interval, self.flush)
+
+        return queued
+
+    #defining function to drop the oldest PDU with a lower priority than the one given
+    #PDUs with a kept message type are skipped
+    def drop_lowest(self, priority):
+        for queue_priority in range(qgp_priority.LOWEST, max(priority, self.protected_priority), -1):
+            queue = self.queues[queue_priority]
+            for index, packed_pdu in enumerate(queue):
+                msg_type = qgp_header.peek_msg_type(packed_pdu)
+                if msg_type not in self.KEPT_MSG_TYPES:
+                    LOGGER.warning("Send queue full, dropped PDU type 0x%04x with priority %d", msg_type,
+                                   queue_priority)
+                    del queue[index]
+                    self.queued_bytes -= len(packed_pdu)
+                    self.dropped += 1
+                    return True
+
+        return False
+
+    #defining function to write the queued PDUs in priority order and transmit them
+    #returns the number of bytes written
+    def flush(self):
+        #a direct flush replaces the one waiting for the end of the tick
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+
+        budget = self.budget() if self.budget is not None else None
+        written = 0
+
+        #the first PDU always goes, a PDU bigger than the whole budget would otherwise block the connection
+        for queue in self.queues:
+            while queue and (budget is None or not written or written + len(queue[0]) <= budget):
+                packed_pdu = queue.popleft()
+                self.channels.send(packed_pdu)
+                written += len(packed_pdu)
+
+            #leaving the lower priorities queued once the congestion window is full
+            if queue:
+                break
+
+        self.queued_bytes -= written
+        if written:
+            self.transmit()
+
+        #trying again shortly for anything congestion held back
+        if self.queued_bytes:
+            self.flush_handle = asyncio.get_running_loop().call_later(self.RETRY_INTERVAL, self.flush)
+
+        return written
+
+    #defining function to forget everything still queued
+    def close(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+
+        for queue in self.queues:
+            queue.clear()
+        self.queued_bytes = 0
+
+#defining the class that flushes every scheduler with pending PDUs at the end of the tick
+#a broadcast to hundreds of connections then costs one timer and one pass over the connections
+class qgp_flush_batcher:
+    #defining the class variables
+    def __init__(self, tick_interval=qgp_send_scheduler.TICK_INTERVAL):
+        self.tick_interval = tick_interval
+
+        #using a dict keeps the flush order the same as the send order
+        self.pending = {}
+        self.flush_handle = None
+
+    #defining function to mark a scheduler as having PDUs for this tick
+    def add(self, scheduler):
+        self.pending[scheduler] = None
+        if self.flush_handle is None:
+            self.flush_handle = asyncio.get_running_loop().call_later(self.tick_interval, self.flush)
+
+    #defining function to flush every pending scheduler
+    def flush(self):
+        self.flush_handle = None
+        pending, self.pending = self.pending, {}
+        for scheduler in pending:
+            scheduler.flush()
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP SEND SCHEDULER
+    ############################################################################
+    try:
+        from qgp_player import qgp_player_movement
+        from qgp_communication import qgp_text_chat
+    except:
+        from qgp.qgp_player import qgp_player_movement
+        from qgp.qgp_communication import qgp_text_chat
+
+    #defining a stand in for the channel manager that records the order of the writes
+    class debug_channels:
+        def __init__(self):
+            self.sent = []
+
+        def send(self, packed_pdu):
+            self.sent.append(qgp_header.peek_msg_type(packed_pdu))
+
+    channels = debug_channels()
+    scheduler = qgp_send_scheduler(channels, transmit=lambda: print("transmit"), max_queued_bytes=100)
+
+    #queueing chat before movement, then overfilling the queue
+    chat_header = qgp_header(version=1, msg_type=QGP_MSG_TEXT_CHAT, msg_len=0, priority=1)
+    move_header = qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+    for i in range(3):
+        print("chat queued", scheduler.enqueue(qgp_text_chat(chat_header, 5, "hello").pack()))
+    for i in range(2):
+        print("movement queued", scheduler.enqueue(qgp_player_movement(move_header, 1, 0, 0, i, 0, 0, 1).pack()))
+
+    print("dropped", scheduler.dropped)
+    scheduler.flush()
+    print("send order", [hex(msg_type) for msg_type in channels.sent])
+
+    #sending a burst inside a running loop so it is flushed once at the end of the tick
+    async def debug_tick():
+        tick_scheduler = qgp_send_scheduler(channels, transmit=lambda: print("transmit after tick"))
+        for i in range(5):
+            tick_scheduler.send(qgp_player_movement(move_header, 1, 0, 0, i, 0, 0, 1).pack())
+        await asyncio.sleep(tick_scheduler.tick_interval * 2)
+
+    asyncio.run(debug_tick())
+
+    #sending one PDU to several connections that share a batcher
+    async def debug_batcher():
+        batcher = qgp_flush_batcher()
+        schedulers = [qgp_send_scheduler(channels, transmit=lambda: print("batched transmit"), batcher=batcher)
+                      for _ in range(3)]
+        move_packed = qgp_player_movement(move_header, 1, 0, 0, 0, 0, 0, 1).pack()
+        for scheduler in schedulers:
+            scheduler.send(move_packed)
+        print("pending schedulers", len(batcher.pending))
+        await asyncio.sleep(batcher.tick_interval * 2)
+
+    asyncio.run(debug_batcher())
@@ -2,10 +2,12 @@ import struct
 #importing the libraries in a way so this file can be ran in isolation for testing
 try:
     from pdu_constants import *
-    from qgp_header import qgp_header
+    from qgp_header import qgp_header, QGP_ENCODE_BUFFER
+    from qgp_arrays import uint32_array, pack_uint32_into, unpack_uint32_from, uint32_struct
 except:
     from qgp.pdu_constants import *
-    from qgp.qgp_header import qgp_header
+    from qgp.qgp_header import qgp_header, QGP_ENCODE_BUFFER
+    from qgp.qgp_arrays import uint32_array, pack_uint32_into, unpack_uint32_from, uint32_struct
 
 #defining class for a match starting
 class qgp_game_start:
@@ -13,13 +15,19 @@ class qgp_game_start:
     # match_id (I), match_type (I), match_duration (I), match_map (I),
     # match_mode (I), match_team (I), match_players (I)
     PAYLOAD_FIXED_PART_FORMAT = "!I I I I I I I"  # 7 unsigned ints
-    PAYLOAD_FIXED_PART_SIZE = struct.calcsize(PAYLOAD_FIXED_PART_FORMAT)
+    PAYLOAD_FIXED_PART_STRUCT = struct.Struct(PAYLOAD_FIXED_PART_FORMAT)
+    PAYLOAD_FIXED_PART_SIZE = PAYLOAD_FIXED_PART_STRUCT.size
 
     # Format for the length of the player_ids list
     PLAYER_ID_LIST_COUNT_FORMAT = "!I"  # An unsigned int for the count
-    PLAYER_ID_LIST_COUNT_SIZE = struct.calcsize(PLAYER_ID_LIST_COUNT_FORMAT)
+    PLAYER_ID_LIST_COUNT_STRUCT = struct.Struct(PLAYER_ID_LIST_COUNT_FORMAT)
+    PLAYER_ID_LIST_COUNT_SIZE = PLAYER_ID_LIST_COUNT_STRUCT.size
 
     PLAYER_ID_FORMAT = "!I"  # Each player ID is an unsigned int
+    PLAYER_ID_SIZE = struct.calcsize(PLAYER_ID_FORMAT)
+
+    # Header, fixed part and the player_ids count packed in one call
+    PDU_STRUCT = qgp_header.pdu_struct(PAYLOAD_FIXED_PART_FORMAT + " I")
 
     #defining the class variables
     def __init__(self, header, match_id, match_type, match_duration, match_map, match_mode, match_team, match_players, match_player_ids):
@@ -33,39 +41,52 @@ class qgp_game_start:
         self.match_players = match_players
         self.match_player_ids = match_player_ids
 
-    #defining the packing function
-    def pack(self):
+    #defining the function to get the size of the packed PDU
+    def packed_size(self):
+        return self.PDU_STRUCT.size + len(self.match_player_ids) * self.PLAYER_ID_SIZE
+
+    #defining the packing into a buffer function
+    def pack_into(self, buffer, offset=0):
         #getting the length of the player id list
         len_player_list = len(self.match_player_ids)
 
-        #packing the data without the list
-        payload = struct.pack("!I I I I I I I", self.match_id, self.match_type, self.match_duration, self.match_map, self.match_mode, self.match_team, self.match_players)
-
-        #packing the list
-        payload += struct.pack("!I", len_player_list)
-        int_format = "!" + (len_player_list * "I")
-
-        payload += struct.pack(int_format, *self.match_player_ids)
-
         # Update header attributes before packing the header
-        self.header.msg_len = qgp_header.SIZE + len(payload)  # Use header.message_length
+        self.header.msg_len = self.packed_size()  # Use header.message_length
         #self.header.msg_type = QGP_MSG_GAME_START
 
-        return self.header.pack() + payload
+        #packing the header and the data without the list
+        self.PDU_STRUCT.pack_into(buffer, offset, self.header.version, self.header.msg_type, self.header.msg_len,
+                                  self.header.priority, self.match_id, self.match_type, self.match_duration,
+                                  self.match_map, self.match_mode, self.match_team, self.match_players,
+                                  len_player_list)
+        offset += self.PDU_STRUCT.size
 
-    #defining function to unpack
+        #copying the player ids as one block
+        return pack_uint32_into(buffer, offset, self.match_player_ids)
+
+    #defining the packing function
+    def pack(self):
+        return QGP_ENCODE_BUFFER.encode(self)
+
+    #defining function to unpack, returns the error string like the other PDUs if the payload is malformed
     @classmethod
     def unpack(cls, header_obj, payload_bytes):
-        #if len(payload_bytes) < cls.PAYLOAD_FIXED_PART_SIZE:
-         #   raise ValueError("Payload too short for qgp_game_start fixed part.")
+        try:
+            return cls.unpack_fields(header_obj, payload_bytes)
+        except ValueError as error:
+            return str(error)
+
+    #defining function to unpack the fields, raises ValueError if the payload is malformed
+    @classmethod
+    def unpack_fields(cls, header_obj, payload_bytes):
+        if len(payload_bytes) < cls.PAYLOAD_FIXED_PART_SIZE:
+            raise ValueError("Payload too short for qgp_game_start fixed part.")
 
         offset = 0
 
         # Unpack the fixed part of the payload
         match_id, match_type, match_duration, match_map, \
-            match_mode, match_team, match_players = struct.unpack_from(
-            cls.PAYLOAD_FIXED_PART_FORMAT, payload_bytes, offset
-        )
+            match_mode, match_team, match_players = cls.PAYLOAD_FIXED_PART_STRUCT.unpack_from(payload_bytes, offset)
         offset += cls.PAYLOAD_FIXED_PART_SIZE
 
         # Check if there's enough data for the player_id list count
@@ -73,29 +94,25 @@ class qgp_game_start:
             raise ValueError("Payload too short for player_id list count.")
 
         # Unpack the count of player_ids
-        len_player_list, = struct.unpack_from(cls.PLAYER_ID_LIST_COUNT_FORMAT, payload_bytes, offset)
+        len_player_list, = cls.PLAYER_ID_LIST_COUNT_STRUCT.unpack_from(payload_bytes, offset)
         offset += cls.PLAYER_ID_LIST_COUNT_SIZE
 
-        # Unpack the player_ids themselves
-        match_player_ids = []
-        if len_player_list > 0:
-            player_ids_bytes_expected = len_player_list * struct.calcsize(cls.PLAYER_ID_FORMAT)
-            if len(payload_bytes) < offset + player_ids_bytes_expected:
-                raise ValueError("Payload too short for the declared number of player_ids.")
+        # Unpack the player_ids themselves into a uint32 array in one block
+        player_ids_bytes_expected = len_player_list * cls.PLAYER_ID_SIZE
+        if len(payload_bytes) < offset + player_ids_bytes_expected:
+            raise ValueError("Payload too short for the declared number of player_ids.")
 
-            player_ids_format = "!" + (len_player_list * "I")  # Assuming each ID is 'I'
-            unpacked_ids_tuple = struct.unpack_from(player_ids_format, payload_bytes, offset)
-            match_player_ids = list(unpacked_ids_tuple)
-            offset += player_ids_bytes_expected
+        match_player_ids = unpack_uint32_from(payload_bytes, offset, len_player_list)
+        offset += player_ids_bytes_expected
 
         # Validate total length against header.message_length
         # header_obj.message_length is the total length (header + this specific payload)
         # qgp_header.SIZE is the size of the header
         # offset is the total size of THIS PDU's specific payload that we just parsed from payload_bytes
-        if header_obj.msg_len != qgp_header.SIZE + offset:
+        if header_obj.msg_len != header_obj.size + offset:
             raise ValueError(
                 f"Length mismatch in qgp_game_start. Header declared total: {header_obj.msg_len}, "
-                f"Expected total based on parsing current PDU payload: {qgp_header.SIZE + offset}"
+                f"Expected total based on parsing current PDU payload: {header_obj.size + offset}"
             )
 
         return cls(header_obj, match_id, match_type, match_duration, match_map,
@@ -107,13 +124,19 @@ class qgp_game_end:
     # match_id (I), match_type (I), match_duration (I), match_map (I),
     # match_mode (I), match_team (I), match_players (I)
     PAYLOAD_FIXED_PART_FORMAT = "!I I I I I I I"  # 7 unsigned ints
-    PAYLOAD_FIXED_PART_SIZE = struct.calcsize(PAYLOAD_FIXED_PART_FORMAT)
+    PAYLOAD_FIXED_PART_STRUCT = struct.Struct(PAYLOAD_FIXED_PART_FORMAT)
+    PAYLOAD_FIXED_PART_SIZE = PAYLOAD_FIXED_PART_STRUCT.size
 
     # Format for the length of the player_ids list
     PLAYER_ID_LIST_COUNT_FORMAT = "!I"  # An unsigned int for the count
-    PLAYER_ID_LIST_COUNT_SIZE = struct.calcsize(PLAYER_ID_LIST_COUNT_FORMAT)
+    PLAYER_ID_LIST_COUNT_STRUCT = struct.Struct(PLAYER_ID_LIST_COUNT_FORMAT)
+    PLAYER_ID_LIST_COUNT_SIZE = PLAYER_ID_LIST_COUNT_STRUCT.size
 
     PLAYER_ID_FORMAT = "!I"  # Each player ID is an unsigned int
+    PLAYER_ID_SIZE = struct.calcsize(PLAYER_ID_FORMAT)
+
+    # Header and the fixed part packed in one call
+    PDU_STRUCT = qgp_header.pdu_struct(PAYLOAD_FIXED_PART_FORMAT)
 
     #defining the class variables
     def __init__(self, header, match_id, match_type, match_duration, match_map, match_mode, match_team, match_players, match_player_ids, match_player_kills, match_player_deaths, match_player_assists, match_player_teamkills, match_player_teamdeaths, match_player_teamassists):
@@ -133,160 +156,105 @@ class qgp_game_end:
         self.match_player_teamdeaths = match_player_teamdeaths
         self.match_player_teamassists = match_player_teamassists
 
-    #defining the packing function
-    def pack(self):
-        #getting the length of all lists
-        len_player_list = len(self.match_player_ids)
-        len_player_kills = len(self.match_player_kills)
-        len_player_deaths = len(self.match_player_deaths)
-        len_player_assists = len(self.match_player_assists)
-        len_player_teamkills = len(self.match_player_teamkills)
-        len_player_teamdeaths = len(self.match_player_teamdeaths)
-        len_player_teamassists = len(self.match_player_teamassists)
-
-        #packing the data without the list
-        payload = struct.pack("!I I I I I I I", self.match_id, self.match_type, self.match_duration, self.match_map, self.match_mode, self.match_team, self.match_players)
-
-        #packing the player id list
-        payload += struct.pack("!I", len_player_list)
-        payload += self.list_packer(len_player_list, self.match_player_ids)
-
-        #packing the player kills list
-        payload += struct.pack("!I", len_player_kills)
-        payload += self.list_packer(len_player_kills, self.match_player_kills)
+    #defining function to get the stat lists in their wire order
+    def stat_lists(self):
+        return (self.match_player_ids, self.match_player_kills, self.match_player_deaths,
+                self.match_player_assists, self.match_player_teamkills, self.match_player_teamdeaths,
+                self.match_player_teamassists)
 
-        #packing the players deaths list
-        payload += struct.pack("!I", len_player_deaths)
-        payload += self.list_packer(len_player_deaths, self.match_player_ids)
+    #defining the function to get the size of the packed PDU
+    def packed_size(self):
+        size = self.PDU_STRUCT.size
+        for main_list in self.stat_lists():
+            size += self.PLAYER_ID_LIST_COUNT_SIZE + len(main_list) * self.PLAYER_ID_SIZE
 
-        #packing the player assists
-        payload += struct.pack("!I", len_player_assists)
-        payload += self.list_packer(len_player_assists, self.match_player_assists)
+        return size
 
-        #packing the player teamkills
-        payload += struct.pack("!I", len_player_teamkills)
-        payload += self.list_packer(len_player_teamkills, self.match_player_teamkills)
+    #defining the packing into a buffer function
+    def pack_into(self, buffer, offset=0):
+        # Update header attributes before packing the header
+        self.header.msg_len = self.packed_size()  # Use header.message_length
+        self.header.msg_type = QGP_MSG_GAME_END
 
-        #packing the player teamdeaths
-        payload += struct.pack("!I", len_player_teamdeaths)
-        payload += self.list_packer(len_player_teamdeaths, self.match_player_teamdeaths)
+        #packing the header and the data without the lists
+        self.PDU_STRUCT.pack_into(buffer, offset, self.header.version, self.header.msg_type, self.header.msg_len,
+                                  self.header.priority, self.match_id, self.match_type, self.match_duration,
+                                  self.match_map, self.match_mode, self.match_team, self.match_players)
+        offset += self.PDU_STRUCT.size
 
-        #packing the player team assists
-        payload += struct.pack("!I", len_player_teamassists)
-        payload += self.list_packer(len_player_teamassists, self.match_player_teamassists)
+        #packing the ids, kills, deaths, assists, teamkills, teamdeaths and teamassists lists with their lengths
+        for main_list in self.stat_lists():
+            offset = self.list_packer_into(buffer, offset, main_list)
 
-        # Update header attributes before packing the header
-        self.header.msg_len = qgp_header.SIZE + len(payload)  # Use header.message_length
-        self.header.msg_type = QGP_MSG_GAME_END
+        return offset
 
-        return self.header.pack() + payload
+    #defining the packing function
+    def pack(self):
+        return QGP_ENCODE_BUFFER.encode(self)
 
     #defining function to package the lists
     def list_packer(self, list_len, main_list):
-        int_format = "!" + (list_len * "I")
-        packer = struct.pack(int_format, *main_list)
+        return uint32_struct(list_len).pack(*main_list)
 
-        return packer
+    #defining function to package a list and its length into a buffer
+    #the list is copied as one block so it can be an array('I') or a list
+    @classmethod
+    def list_packer_into(cls, buffer, offset, main_list):
+        cls.PLAYER_ID_LIST_COUNT_STRUCT.pack_into(buffer, offset, len(main_list))
+        return pack_uint32_into(buffer, offset + cls.PLAYER_ID_LIST_COUNT_SIZE, main_list)
 
-    #defining function to unpack
+    #defining function to unpack, returns the error string like the other PDUs if the payload is malformed
     @classmethod
     def unpack(cls, header_obj, payload_bytes):
-        #if len(payload_bytes) < cls.PAYLOAD_FIXED_PART_SIZE:
-         #   raise ValueError("Payload too short for qgp_game_start fixed part.")
+        try:
+            return cls.unpack_fields(header_obj, payload_bytes)
+        except ValueError as error:
+            return str(error)
+
+    #defining function to unpack the fields, raises ValueError if the payload is malformed
+    @classmethod
+    def unpack_fields(cls, header_obj, payload_bytes):
+        if len(payload_bytes) < cls.PAYLOAD_FIXED_PART_SIZE:
+            raise ValueError("Payload too short for qgp_game_end fixed part.")
 
         offset = 0
 
         # Unpack the fixed part of the payload
         match_id, match_type, match_duration, match_map, \
-            match_mode, match_team, match_players = struct.unpack_from(
-            cls.PAYLOAD_FIXED_PART_FORMAT, payload_bytes, offset
-        )
+            match_mode, match_team, match_players = cls.PAYLOAD_FIXED_PART_STRUCT.unpack_from(payload_bytes, offset)
         offset += cls.PAYLOAD_FIXED_PART_SIZE
 
-        # Check if there's enough data for the player_id list count
-        if len(payload_bytes) < offset + cls.PLAYER_ID_LIST_COUNT_SIZE:
-            raise ValueError("Payload too short for player_id list count.")
-
-        # Unpack the count of player_ids
-        len_player_list, = struct.unpack_from(cls.PLAYER_ID_LIST_COUNT_FORMAT, payload_bytes, offset)
-        offset += cls.PLAYER_ID_LIST_COUNT_SIZE
-
-        # # Unpack the player_ids themselves
-        # match_player_ids = []
-        # if len_player_list > 0:
-        #     player_ids_bytes_expected = len_player_list * struct.calcsize(cls.PLAYER_ID_FORMAT)
-        #     if len(payload_bytes) < offset + player_ids_bytes_expected:
-        #         raise ValueError("Payload too short for the declared number of player_ids.")
-        #
-        #     player_ids_format = "!" + (len_player_list * "I")  # Assuming each ID is 'I'
-        #     unpacked_ids_tuple = struct.unpack_from(player_ids_format, payload_bytes, offset)
-        #     match_player_ids = list(unpacked_ids_tuple)
-        #     offset += player_ids_bytes_expected
-
-        #getting the player ids
-        player_ids, offset = cls.list_unpacker(len_player_list, payload_bytes, offset, cls.PLAYER_ID_FORMAT)
-
-        #getting the player kills
-        len_kills_list, = struct.unpack_from(cls.PLAYER_ID_LIST_COUNT_FORMAT, payload_bytes, offset)
-        offset += cls.PLAYER_ID_LIST_COUNT_SIZE
-        player_kills, offset = cls.list_unpacker(len_kills_list, payload_bytes, offset, cls.PLAYER_ID_FORMAT)
-
-        # getting the player deaths
-        len_deaths_list, = struct.unpack_from(cls.PLAYER_ID_LIST_COUNT_FORMAT, payload_bytes, offset)
-        offset += cls.PLAYER_ID_LIST_COUNT_SIZE
-        player_deaths, offset = cls.list_unpacker(len_deaths_list, payload_bytes, offset, cls.PLAYER_ID_FORMAT)
-
-        # getting the player assists
-        len_assists_list, = struct.unpack_from(cls.PLAYER_ID_LIST_COUNT_FORMAT, payload_bytes, offset)
-        offset += cls.PLAYER_ID_LIST_COUNT_SIZE
-        player_assists, offset = cls.list_unpacker(len_assists_list, payload_bytes, offset, cls.PLAYER_ID_FORMAT)
-
-        # getting the player teamkills
-        len_teamkills_list, = struct.unpack_from(cls.PLAYER_ID_LIST_COUNT_FORMAT, payload_bytes, offset)
-        offset += cls.PLAYER_ID_LIST_COUNT_SIZE
-        player_teamkills, offset = cls.list_unpacker(len_teamkills_list, payload_bytes, offset, cls.PLAYER_ID_FORMAT)
-
-        # getting the player teamkills
-        len_teamdeaths_list, = struct.unpack_from(cls.PLAYER_ID_LIST_COUNT_FORMAT, payload_bytes, offset)
-        offset += cls.PLAYER_ID_LIST_COUNT_SIZE
-        player_teamdeaths, offset = cls.list_unpacker(len_teamdeaths_list, payload_bytes, offset, cls.PLAYER_ID_FORMAT)
-
-        # getting the player teamkills
-        len_teamassits_list, = struct.unpack_from(cls.PLAYER_ID_LIST_COUNT_FORMAT, payload_bytes, offset)
-        offset += cls.PLAYER_ID_LIST_COUNT_SIZE
-        player_teamassists, offset = cls.list_unpacker(len_teamassits_list, payload_bytes, offset, cls.PLAYER_ID_FORMAT)
-
+        #getting the player ids, kills, deaths, assists, teamkills, teamdeaths and teamassists
+        stat_lists = []
+        for _ in range(7):
+            if len(payload_bytes) < offset + cls.PLAYER_ID_LIST_COUNT_SIZE:
+                raise ValueError("Payload too short for player_id list count.")
+            list_len, = cls.PLAYER_ID_LIST_COUNT_STRUCT.unpack_from(payload_bytes, offset)
+            offset += cls.PLAYER_ID_LIST_COUNT_SIZE
+            main_list, offset = cls.list_unpacker(list_len, payload_bytes, offset, cls.PLAYER_ID_FORMAT)
+            stat_lists.append(main_list)
 
         # Validate total length against header.message_length
         # header_obj.message_length is the total length (header + this specific payload)
         # qgp_header.SIZE is the size of the header
         # offset is the total size of THIS PDU's specific payload that we just parsed from payload_bytes
-        if header_obj.msg_len != qgp_header.SIZE + offset:
+        if header_obj.msg_len != header_obj.size + offset:
             raise ValueError(
-                f"Length mismatch in qgp_game_start. Header declared total: {header_obj.msg_len}, "
-                f"Expected total based on parsing current PDU payload: {qgp_header.SIZE + offset}"
+                f"Length mismatch in qgp_game_end. Header declared total: {header_obj.msg_len}, "
+                f"Expected total based on parsing current PDU payload: {header_obj.size + offset}"
             )
 
         return cls(header_obj, match_id, match_type, match_duration, match_map,
-                   match_mode, match_team, match_players, player_ids, player_kills, player_deaths, player_assists, player_teamkills, player_teamdeaths, player_teamassists)
+                   match_mode, match_team, match_players, *stat_lists)
 
+    #defining function to unpack a stat list into a uint32 array in one block
     @classmethod
     def list_unpacker(cls, list_len, payload_bytes, offset, FORMAT="!I"):
-        # Unpack the player_ids themselves
-        match_player_ids = []
-        if list_len > 0:
-            bytes_expected = list_len * struct.calcsize(FORMAT)
-            if len(payload_bytes) < offset + bytes_expected:
-                raise ValueError("Payload too short for the declared number of bytes")
-
-            player_ids_format = "!" + (list_len * "I")  # Assuming each ID is 'I'
-            unpacked_ids_tuple = struct.unpack_from(player_ids_format, payload_bytes, offset)
-            returned_list = list(unpacked_ids_tuple)
-            offset += bytes_expected
-
-            return returned_list, offset
-        else:
-            return [], offset
+        bytes_expected = list_len * struct.calcsize(FORMAT)
+        if len(payload_bytes) < offset + bytes_expected:
+            raise ValueError("Payload too short for the declared number of bytes")
+
+        return unpack_uint32_from(payload_bytes, offset, list_len), offset + bytes_expected
 #defining debug function
 if __name__ == "__main__":
     ############################################################################
@@ -321,4 +289,30 @@ if __name__ == "__main__":
     print(f"[INFO] Match Mode: {game_start.match_mode}")
     print(f"[INFO] Match Team: {game_start.match_team}")
     print(f"[INFO] Match Players: {game_start.match_players}")
-    print(f"[INFO] Match Player IDs: {game_start.match_player_ids}")
\ No newline at end of file
+    print(f"[INFO] Match Player IDs: {game_start.match_player_ids}")
+    ############################################################################
+    # TIMING THE QGP END GAME LISTS
+    ############################################################################
+    import time
+
+    #a 100 player match with every stat list filled in
+    end_match_header = qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+    end_player_ids = uint32_array(range(100))
+    end_match_class = qgp_game_end(end_match_header, 100, 9000, 15, 13289, 123, 1, 100, end_player_ids,
+                                   end_player_ids, end_player_ids, end_player_ids, end_player_ids, end_player_ids,
+                                   end_player_ids)
+    end_match_packed = end_match_class.pack()
+    end_match_headers, end_match_payload = qgp_header.unpack(end_match_packed)
+    print("end game kills", list(qgp_game_end.unpack(end_match_headers, end_match_payload).match_player_kills[:5]))
+
+    rounds = 5000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        end_match_class.pack()
+    encode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        qgp_game_end.unpack(end_match_headers, end_match_payload)
+    decode_time = time.perf_counter() - start
+    print(f"100 player end game: encode {encode_time / rounds * 1e6:.1f}us, decode {decode_time / rounds * 1e6:.1f}us")
@@ -0,0 +1,153 @@
+import struct
+#importing the libraries in a way so this file can be ran in isolation for testing
+try:
+    from pdu_constants import *
+    from qgp_header import qgp_header, QGP_ENCODE_BUFFER
+    from qgp_player import qgp_player_movement
+    from qgp_arrays import uint32_array, pack_uint32_into, unpack_uint32_from, UINT32_SIZE
+except:
+    from qgp.pdu_constants import *
+    from qgp.qgp_header import qgp_header, QGP_ENCODE_BUFFER
+    from qgp.qgp_player import qgp_player_movement
+    from qgp.qgp_arrays import uint32_array, pack_uint32_into, unpack_uint32_from, UINT32_SIZE
+
+#the fields of one movement record, in the same order as qgp_player_movement
+QGP_MOVEMENT_FIELDS = ("player_id", "movement_type", "direction", "x_position", "y_position", "z_position", "speed")
+QGP_MOVEMENT_RECORD_WIDTH = len(QGP_MOVEMENT_FIELDS)
+QGP_MOVEMENT_RECORD_SIZE = QGP_MOVEMENT_RECORD_WIDTH * UINT32_SIZE
+
+#defining the class for a snapshot of many players' movement in one PDU
+#the records are kept in one flat uint32 array, record after record
+#so encoding and decoding is a single block copy however many players there are
+class qgp_player_snapshot:
+    #tick and the number of records
+    PAYLOAD_FIXED_FORMAT = "!I H"
+    PAYLOAD_FIXED_STRUCT = struct.Struct(PAYLOAD_FIXED_FORMAT)
+    PAYLOAD_FIXED_SIZE = PAYLOAD_FIXED_STRUCT.size
+    PDU_STRUCT = qgp_header.pdu_struct(PAYLOAD_FIXED_FORMAT)
+
+    #the most records the count field can hold
+    MAX_RECORDS = 0xFFFF
+
+    __slots__ = ("header", "tick", "records")
+
+    #defining the class variables
+    def __init__(self, header, tick, records):
+        self.header = header
+        self.tick = tick
+        self.records = records
+
+    #defining function to build a snapshot from movement PDUs or (player_id, ..., speed) rows
+    @classmethod
+    def from_movements(cls, header, tick, movements):
+        records = uint32_array()
+        for movement in movements:
+            if isinstance(movement, qgp_player_movement):
+                records.extend((movement.player_id, movement.movement_type, movement.direction,
+                                movement.x_position, movement.y_position, movement.z_position, movement.speed))
+            else:
+                records.extend(movement)
+
+        return cls(header, tick, records)
+
+    #defining function to get the number of players in the snapshot
+    def record_count(self):
+        return len(self.records) // QGP_MOVEMENT_RECORD_WIDTH
+
+    #defining function to get one field of every record, e.g. all the x positions
+    def column(self, field):
+        return self.records[QGP_MOVEMENT_FIELDS.index(field)::QGP_MOVEMENT_RECORD_WIDTH]
+
+    #defining function to get one record as a tuple
+    def record(self, index):
+        start = index * QGP_MOVEMENT_RECORD_WIDTH
+        return tuple(self.records[start:start + QGP_MOVEMENT_RECORD_WIDTH])
+
+    #defining function to turn the records back into movement PDUs for code that wants them
+    def movements(self):
+        for index in range(self.record_count()):
+            move_header = qgp_header(version=self.header.version, msg_type=QGP_MSG_PLAYER_MOVEMENT,
+                                     msg_len=qgp_player_movement.PDU_STRUCT.size, priority=self.header.priority)
+            yield qgp_player_movement(move_header, *self.record(index))
+
+    #defining function to get the size of the packed PDU
+    def packed_size(self):
+        return self.PDU_STRUCT.size + len(self.records) * UINT32_SIZE
+
+    #defining function to pack the snapshot into a buffer
+    def pack_into(self, buffer, offset=0):
+        record_count = self.record_count()
+        if len(self.records) != record_count * QGP_MOVEMENT_RECORD_WIDTH:
+            raise ValueError("Snapshot records are not whole movement records")
+        if record_count > self.MAX_RECORDS:
+            raise ValueError("Too many records for one snapshot")
+
+        #creating the headers
+        self.header.msg_len = self.packed_size()
+        self.header.msg_type = QGP_MSG_PLAYER_SNAPSHOT
+
+        #packing the headers and fixed fields then copying the records as one block
+        self.PDU_STRUCT.pack_into(buffer, offset, self.header.version, self.header.msg_type, self.header.msg_len,
+                                  self.header.priority, self.tick, record_count)
+        return pack_uint32_into(buffer, offset + self.PDU_STRUCT.size, self.records)
+
+    #defining function to pack the snapshot
+    def pack(self):
+        return QGP_ENCODE_BUFFER.encode(self)
+
+    #defining function to unpack the snapshot
+    @classmethod
+    def unpack(cls, header, payload):
+        #making sure the fixed fields are there
+        if len(payload) < cls.PAYLOAD_FIXED_SIZE:
+            return "Length is not expected"
+
+        func_tick, func_record_count = cls.PAYLOAD_FIXED_STRUCT.unpack_from(payload, 0)
+
+        # checking the length of the message
+        payload_len = cls.PAYLOAD_FIXED_SIZE + func_record_count * QGP_MOVEMENT_RECORD_SIZE
+        if header.msg_len != header.size + payload_len or len(payload) < payload_len:
+            return "Length is not expected"
+
+        #copying every record out as one block
+        func_records = unpack_uint32_from(payload, cls.PAYLOAD_FIXED_SIZE, func_record_count * QGP_MOVEMENT_RECORD_WIDTH)
+
+        # returning the PDU values
+        return cls(header, func_tick, func_records)
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP PLAYER SNAPSHOT
+    ############################################################################
+    import time
+
+    snapshot_header = qgp_header(version=1, msg_type=QGP_MSG_PLAYER_SNAPSHOT, msg_len=0, priority=0)
+    rows = [(player_id, 1, 90, player_id * 10, 5, 6, 7) for player_id in range(64)]
+    snapshot = qgp_player_snapshot.from_movements(snapshot_header, 42, rows)
+    packed_snapshot = snapshot.pack()
+    print("64 players in", len(packed_snapshot), "bytes")
+
+    header, payload = qgp_header.unpack(packed_snapshot)
+    decoded = qgp_player_snapshot.unpack(header, payload)
+    print("tick", decoded.tick, "players", decoded.record_count())
+    print("record 3", decoded.record(3))
+    print("x positions", list(decoded.column("x_position"))[:5])
+    print("first movement x", next(decoded.movements()).x_position)
+
+    #comparing against sending one movement PDU per player
+    move_header = qgp_header(version=1, msg_type=QGP_MSG_PLAYER_MOVEMENT, msg_len=0, priority=0)
+    movements = [qgp_player_movement(move_header, *row) for row in rows]
+
+    rounds = 2000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        [movement.pack() for movement in movements]
+    per_player_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        snapshot.pack()
+    snapshot_time = time.perf_counter() - start
+    print(f"encode 64 players: per player PDUs {per_player_time / rounds * 1e6:.1f}us, snapshot {snapshot_time / rounds * 1e6:.1f}us")
@@ -0,0 +1,212 @@
+import asyncio
+#importing the libraries in a way so this file can be ran in isolation for testing
+try:
+    from qgp_logging import get_logger
+    from qgp_world import qgp_world
+    from qgp_interest import qgp_interest_grid
+except:
+    from qgp.qgp_logging import get_logger
+    from qgp.qgp_world import qgp_world
+    from qgp.qgp_interest import qgp_interest_grid
+
+#the number of ticks per second when no rate is given
+QGP_DEFAULT_TICK_RATE = 20
+
+LOGGER = get_logger("tick")
+
+#defining the class for the tick of one match
+#movement and status PDUs are buffered as they arrive and applied once per tick
+#so however many updates a player sends, the match does one update's work per tick
+#the authoritative qgp_world is then handed to emit(match_id, tick, world) to be sent to the match
+#with a cell_size the world keeps an interest grid so each member can be sent only the players near it
+class qgp_match_tick:
+    #defining the class variables
+    def __init__(self, match_id, emit, tick_rate=QGP_DEFAULT_TICK_RATE, cell_size=None):
+        self.match_id = match_id
+        self.emit = emit
+        self.tick_interval = 1 / tick_rate
+        self.tick = 0
+
+        #the latest input of each player since the last tick, later input replaces earlier
+        self.pending_movements = {}
+        self.pending_statuses = {}
+
+        #the authoritative state of every player in the match
+        self.world = qgp_world(qgp_interest_grid(cell_size) if cell_size else None)
+
+        #the ticks dropped because the loop fell behind
+        self.skipped_ticks = 0
+
+        self.deadline = None
+        self.tick_handle = None
+
+    #defining function to buffer a movement update until the next tick
+    #the fields are copied so the PDU object isn't kept alive between ticks
+    #positions are kept as uint32 like the snapshot records, compact movement sends them signed
+    def queue_movement(self, movement):
+        self.pending_movements[movement.player_id] = (movement.player_id, movement.movement_type, movement.direction,
+                                                      movement.x_position & 0xFFFFFFFF,
+                                                      movement.y_position & 0xFFFFFFFF,
+                                                      movement.z_position & 0xFFFFFFFF, movement.speed)
+
+    #defining function to buffer a status update until the next tick
+    def queue_status(self, status):
+        self.pending_statuses[status.player_id] = (status.player_health, status.player_dmg_taken)
+
+    #defining function to add a player to the match state when it joins
+    def add_player(self, player_id, team):
+        self.world.add_player(player_id, team)
+
+    #defining function to drop a player from the match state
+    def remove_player(self, player_id):
+        self.pending_movements.pop(player_id, None)
+        self.pending_statuses.pop(player_id, None)
+        self.world.remove_player(player_id)
+
+    #defining function to run one tick
+    #returns the tick number that was run
+    def step(self):
+        #draining the buffered input into the authoritative state
+        if self.pending_movements:
+            for record in self.pending_movements.values():
+                self.world.set_movement(record)
+            self.pending_movements.clear()
+        if self.pending_statuses:
+            for player_id, (health, dmg_taken) in self.pending_statuses.items():
+                self.world.set_status(player_id, health, dmg_taken)
+            self.pending_statuses.clear()
+
+        self.tick += 1
+
+        #there is nothing to send until a player is in the match
+        if len(self.world):
+            self.emit(self.match_id, self.tick, self.world)
+
+        return self.tick
+
+    #defining function to start ticking on the running loop
+    def start(self):
+        if self.tick_handle is not None:
+            return
+
+        loop = asyncio.get_running_loop()
+        self.deadline = loop.time() + self.tick_interval
+        self.tick_handle = loop.call_at(self.deadline, self.run_tick)
+
+    #defining function to stop ticking
+    def stop(self):
+        if self.tick_handle is not None:
+            self.tick_handle.cancel()
+            self.tick_handle = None
+
+    #defining function to run a tick and schedule the next one
+    #the next deadline is worked out from the last deadline and not from now
+    #so the schedule doesn't drift by however long each tick took to run
+    def run_tick(self):
+        try:
+            self.step()
+        except Exception:
+            LOGGER.exception("Tick %d of match %d failed", self.tick, self.match_id)
+
+        loop = asyncio.get_running_loop()
+        self.deadline += self.tick_interval
+
+        #skipping the ticks that are already late instead of running them back to back
+        now = loop.time()
+        if now > self.deadline:
+            missed = int((now - self.deadline) / self.tick_interval) + 1
+            self.skipped_ticks += missed
+            self.deadline += missed * self.tick_interval
+            LOGGER.warning("Match %d is behind, skipped %d ticks", self.match_id, missed)
+
+        self.tick_handle = loop.call_at(self.deadline, self.run_tick)
+
+#defining the class that runs a qgp_match_tick for every match being played
+class qgp_tick_engine:
+    #defining the class variables
+    def __init__(self, emit, tick_rate=QGP_DEFAULT_TICK_RATE, cell_size=None):
+        self.emit = emit
+        self.tick_rate = tick_rate
+        self.cell_size = cell_size
+
+        #match_id -> qgp_match_tick
+        self.matches = {}
+
+    #defining function to get the tick of a match, starting it if it isn't running
+    def match(self, match_id):
+        match_tick = self.matches.get(match_id)
+        if match_tick is None:
+            match_tick = qgp_match_tick(match_id, self.emit, self.tick_rate, self.cell_size)
+            self.matches[match_id] = match_tick
+            match_tick.start()
+
+        return match_tick
+
+    #defining function to buffer a movement update for a match
+    def queue_movement(self, match_id, movement):
+        self.match(match_id).queue_movement(movement)
+
+    #defining function to buffer a status update for a match
+    def queue_status(self, match_id, status):
+        self.match(match_id).queue_status(status)
+
+    #defining function to add a player to a match, starting it if it isn't running
+    def add_player(self, match_id, player_id, team):
+        self.match(match_id).add_player(player_id, team)
+
+    #defining function to drop a player from a match without starting the match
+    def remove_player(self, match_id, player_id):
+        match_tick = self.matches.get(match_id)
+        if match_tick is not None:
+            match_tick.remove_player(player_id)
+
+    #defining function to stop and forget a match
+    def stop_match(self, match_id):
+        match_tick = self.matches.pop(match_id, None)
+        if match_tick is not None:
+            match_tick.stop()
+
+    #defining function to stop every match
+    def stop(self):
+        for match_id in list(self.matches):
+            self.stop_match(match_id)
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP TICK ENGINE
+    ############################################################################
+    import time
+
+    try:
+        from pdu_constants import *
+        from qgp_header import qgp_header
+        from qgp_player import qgp_player_movement, qgp_player_status
+    except:
+        from qgp.pdu_constants import *
+        from qgp.qgp_header import qgp_header
+        from qgp.qgp_player import qgp_player_movement, qgp_player_status
+
+    emitted = []
+    def emit(match_id, tick, world):
+        emitted.append((time.perf_counter(), tick, list(world.movement_records())))
+
+    async def run():
+        engine = qgp_tick_engine(emit, tick_rate=50)
+        move_header = qgp_header(version=1, msg_type=QGP_MSG_PLAYER_MOVEMENT, msg_len=0, priority=0)
+
+        #ten updates from one player before the first tick become one record
+        for x_position in range(10):
+            engine.queue_movement(7, qgp_player_movement(move_header, 1, 1, 90, x_position, 0, 0, 5))
+        engine.queue_movement(7, qgp_player_movement(move_header, 2, 1, 90, -3, 0, 0, 5))
+        engine.queue_status(7, qgp_player_status(move_header, 1, 80, 20))
+
+        await asyncio.sleep(0.5)
+        engine.stop()
+        return engine.matches
+
+    asyncio.run(run())
+    print("first tick", emitted[0][1], "records", emitted[0][2])
+    intervals = [b[0] - a[0] for a, b in zip(emitted, emitted[1:])]
+    print(f"ticks {len(emitted)}, mean interval {sum(intervals) / len(intervals) * 1000:.2f}ms")
@@ -0,0 +1,90 @@
+#defining the helpers for variable length integers
+#each byte carries 7 bits of the value and the top bit says if another byte follows
+#small values such as a speed of 7 or a direction of 90 then take one byte instead of four
+
+#the longest varint accepted when decoding, enough for a 64 bit value
+MAX_VARINT_BYTES = 10
+
+#defining function to map a signed value to an unsigned one so small negatives stay small
+#0 -> 0, -1 -> 1, 1 -> 2, -2 -> 3 ...
+def zigzag_encode(value):
+    return (value << 1) if value >= 0 else ((-value << 1) - 1)
+
+#defining function to undo the zig-zag mapping
+def zigzag_decode(value):
+    return (value >> 1) ^ -(value & 1)
+
+#defining function to append an unsigned varint to a bytearray
+def write_uvarint(buffer, value):
+    if value < 0:
+        raise ValueError("Varint values can't be negative")
+
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+#defining function to append a signed varint to a bytearray
+def write_svarint(buffer, value):
+    write_uvarint(buffer, zigzag_encode(value))
+
+#defining function to read an unsigned varint, returns the value and the offset after it
+def read_uvarint(data, offset):
+    byte = data[offset]
+
+    #most values fit in one byte
+    if byte < 0x80:
+        return byte, offset + 1
+
+    result = byte & 0x7F
+    shift = 7
+    for index in range(offset + 1, offset + MAX_VARINT_BYTES):
+        byte = data[index]
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, index + 1
+        shift += 7
+
+    raise ValueError("Varint is too long")
+
+#defining function to read a signed varint, returns the value and the offset after it
+def read_svarint(data, offset):
+    value, offset = read_uvarint(data, offset)
+    return zigzag_decode(value), offset
+
+#defining function to get how many bytes a value takes as an unsigned varint
+def uvarint_size(value):
+    size = 1
+    while value > 0x7F:
+        value >>= 7
+        size += 1
+    return size
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP VARINT HELPERS
+    ############################################################################
+    buffer = bytearray()
+    for value in (0, 1, 127, 128, 300, 0xFFFFFFFF):
+        write_uvarint(buffer, value)
+    print("unsigned bytes", buffer.hex())
+
+    offset = 0
+    values = []
+    while offset < len(buffer):
+        value, offset = read_uvarint(buffer, offset)
+        values.append(value)
+    print("unsigned values", values)
+
+    signed = bytearray()
+    for value in (0, -1, 1, -64, 64, -2 ** 31):
+        write_svarint(signed, value)
+
+    offset = 0
+    values = []
+    while offset < len(signed):
+        value, offset = read_svarint(signed, offset)
+        values.append(value)
+    print("signed values", values, "in", len(signed), "bytes")
@@ -0,0 +1,166 @@
+import struct
+#importing the libraries in a way so this file can be ran in isolation for testing
+try:
+    from pdu_constants import *
+    from qgp_header import qgp_header
+    from qgp_player import qgp_player_movement, qgp_player_status, qgp_player_join, qgp_player_leave
+    from qgp_session_mgmt import qgp_game_start, qgp_game_end
+    from qgp_delta import qgp_snapshot_ack
+except:
+    from qgp.pdu_constants import *
+    from qgp.qgp_header import qgp_header
+    from qgp.qgp_player import qgp_player_movement, qgp_player_status, qgp_player_join, qgp_player_leave
+    from qgp.qgp_session_mgmt import qgp_game_start, qgp_game_end
+    from qgp.qgp_delta import qgp_snapshot_ack
+
+#defining the base class for a lazy view of a received PDU
+#the view keeps the header and the payload bytes and only decodes a field when it is read
+#anything without an accessor is read from the full PDU, which is unpacked once on first use
+class qgp_pdu_view:
+    #the PDU class used when the whole PDU is needed
+    PDU_CLASS = None
+
+    #the size of the payload the accessors read, checked when the view is made
+    FIXED_SIZE = 0
+
+    #True when the payload is exactly FIXED_SIZE bytes, False when it only starts with them
+    EXACT_SIZE = True
+
+    __slots__ = ("header", "payload", "decoded")
+
+    #defining the class variables
+    def __init__(self, header, payload):
+        self.header = header
+        self.payload = payload
+        self.decoded = None
+
+    #defining function to make a view, returns the error string like unpack if the length is wrong
+    @classmethod
+    def wrap(cls, header, payload):
+        payload_len = header.msg_len - header.size
+        if cls.EXACT_SIZE and payload_len != cls.FIXED_SIZE:
+            return "Length is not expected"
+        if payload_len < cls.FIXED_SIZE or len(payload) < cls.FIXED_SIZE:
+            return "Length is not expected"
+
+        return cls(header, payload)
+
+    #defining function to get the fully decoded PDU
+    def pdu(self):
+        if self.decoded is None:
+            self.decoded = self.PDU_CLASS.unpack(self.header, self.payload)
+
+        return self.decoded
+
+    #defining function to get the PDU bytes with a v1 header so it can be forwarded without decoding
+    def packed(self):
+        payload = bytes(self.payload)
+        return qgp_header.STRUCT.pack(QGP_VERSION, self.header.msg_type, qgp_header.SIZE + len(payload),
+                                      self.header.priority) + payload
+
+    #reading fields that have no accessor from the decoded PDU
+    def __getattr__(self, name):
+        return getattr(self.pdu(), name)
+
+#defining function to make the accessor for one field at a fixed payload offset
+def fixed_field(field_struct, offset):
+    def getter(self):
+        return field_struct.unpack_from(self.payload, offset)[0]
+
+    return property(getter)
+
+#defining function to make a view class with an accessor for each field of a fixed payload format
+#the format is written like the PDU formats, e.g. "!I I I", with one name per field
+def fixed_view_class(name, pdu_class, payload_format, fields, exact_size=True):
+    codes = payload_format.lstrip("!").split()
+    if len(codes) != len(fields):
+        raise ValueError("Every field in the format needs a name")
+
+    attributes = {"PDU_CLASS": pdu_class, "FIXED_SIZE": struct.calcsize(payload_format),
+                  "EXACT_SIZE": exact_size, "__slots__": ()}
+
+    #working out the offset of each field from the formats before it
+    offset = 0
+    for code, field in zip(codes, fields):
+        field_struct = struct.Struct("!" + code)
+        attributes[field] = fixed_field(field_struct, offset)
+        offset += field_struct.size
+
+    return type(name, (qgp_pdu_view,), attributes)
+
+#the match fields at the start of the game start and game end payloads
+QGP_MATCH_FIELDS = ("match_id", "match_type", "match_duration", "match_map", "match_mode", "match_team", "match_players")
+
+#defining the views for the fixed layout PDUs
+qgp_player_movement_view = fixed_view_class("qgp_player_movement_view", qgp_player_movement, qgp_player_movement.FORMAT,
+                                            ("player_id", "movement_type", "direction", "x_position", "y_position",
+                                             "z_position", "speed"))
+qgp_player_status_view = fixed_view_class("qgp_player_status_view", qgp_player_status, qgp_player_status.FORMAT,
+                                          ("player_id", "player_health", "player_dmg_taken"))
+qgp_player_join_view = fixed_view_class("qgp_player_join_view", qgp_player_join, qgp_player_join.FORMAT,
+                                        ("player_id", "match_id", "player_team"))
+qgp_player_leave_view = fixed_view_class("qgp_player_leave_view", qgp_player_leave, qgp_player_leave.FORMAT,
+                                         ("player_id", "match_id", "player_team"))
+qgp_snapshot_ack_view = fixed_view_class("qgp_snapshot_ack_view", qgp_snapshot_ack, qgp_snapshot_ack.FORMAT, ("tick",))
+
+#defining the views that only read the fixed start of a variable length PDU
+#the lists are only decoded if they are read
+qgp_game_start_view = fixed_view_class("qgp_game_start_view", qgp_game_start, qgp_game_start.PAYLOAD_FIXED_PART_FORMAT,
+                                       QGP_MATCH_FIELDS, exact_size=False)
+qgp_game_end_view = fixed_view_class("qgp_game_end_view", qgp_game_end, qgp_game_end.PAYLOAD_FIXED_PART_FORMAT,
+                                     QGP_MATCH_FIELDS, exact_size=False)
+
+#mapping each message type to its view class
+QGP_PDU_VIEWS = {
+    QGP_MSG_PLAYER_MOVEMENT: qgp_player_movement_view,
+    QGP_MSG_PLAYER_STATUS: qgp_player_status_view,
+    QGP_MSG_PLAYER_JOIN: qgp_player_join_view,
+    QGP_MSG_PLAYER_LEAVE: qgp_player_leave_view,
+    QGP_MSG_SNAPSHOT_ACK: qgp_snapshot_ack_view,
+    QGP_MSG_GAME_START: qgp_game_start_view,
+    QGP_MSG_GAME_END: qgp_game_end_view,
+}
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP PDU VIEWS
+    ############################################################################
+    import time
+
+    end_header = qgp_header(version=1, msg_type=QGP_MSG_GAME_END, msg_len=0, priority=2)
+    player_ids = list(range(64))
+    game_end = qgp_game_end(end_header, 56, 1, 1500, 151, 0, 2, 64, player_ids, player_ids, player_ids,
+                            player_ids, player_ids, player_ids, player_ids)
+    packed_end = game_end.pack()
+    header = qgp_header.unpack_from(packed_end)
+    payload = memoryview(packed_end)[header.size:]
+
+    #reading only the match id without decoding the lists
+    end_view = qgp_game_end_view.wrap(header, payload)
+    print("match id", end_view.match_id, "decoded", end_view.decoded is not None)
+
+    #reading a list decodes the whole PDU once
+    print("kills", end_view.match_player_kills[:5], "decoded", end_view.decoded is not None)
+    print("forwarded bytes match", end_view.packed() == packed_end)
+
+    move_header = qgp_header(version=1, msg_type=QGP_MSG_PLAYER_MOVEMENT, msg_len=0, priority=0)
+    packed_move = qgp_player_movement(move_header, 3, 1, 90, 10, 20, 30, 7).pack()
+    move_header = qgp_header.unpack_from(packed_move)
+    move_view = qgp_player_movement_view.wrap(move_header, memoryview(packed_move)[move_header.size:])
+    print("movement", move_view.player_id, move_view.x_position, move_view.speed)
+    print("short movement", qgp_player_movement_view.wrap(move_header, memoryview(packed_move)[8:12]))
+
+    #timing the match id of a game end against a full decode
+    rounds = 20000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        qgp_game_end.unpack(header, payload).match_id
+    full_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        qgp_game_end_view.wrap(header, payload).match_id
+    view_time = time.perf_counter() - start
+    print(f"game end match id: full decode {full_time / rounds * 1e6:.2f}us, view {view_time / rounds * 1e6:.2f}us")
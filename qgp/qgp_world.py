@@ -0,0 +1,208 @@
+#importing the libraries in a way so this file can be ran in isolation for testing
+try:
+    from qgp_arrays import uint32_array
+    from qgp_snapshot import QGP_MOVEMENT_FIELDS, QGP_MOVEMENT_RECORD_WIDTH
+except:
+    from qgp.qgp_arrays import uint32_array
+    from qgp.qgp_snapshot import QGP_MOVEMENT_FIELDS, QGP_MOVEMENT_RECORD_WIDTH
+
+#the columns of the world, the movement fields first so records can be built from them in order
+QGP_WORLD_COLUMNS = QGP_MOVEMENT_FIELDS + ("player_health", "player_dmg_taken", "player_team")
+
+#defining the class for the state of every player in a match
+#each field is one uint32 array column and each player has a slot, the same index in every column
+#so building a snapshot or checking every position works on whole columns instead of per player objects
+#removing a player moves the last slot into the gap so the columns stay packed
+#an optional qgp_interest_grid is kept up to date with the positions so each client can be sent only what is near it
+class qgp_world:
+    #defining the class variables
+    def __init__(self, interest=None):
+        self.columns = {name: uint32_array() for name in QGP_WORLD_COLUMNS}
+        self.interest = interest
+
+        #player_id -> slot
+        self.slots = {}
+
+        #the columns as attributes for the code that reads them every tick
+        self.player_ids = self.columns["player_id"]
+        self.x_positions = self.columns["x_position"]
+        self.y_positions = self.columns["y_position"]
+        self.z_positions = self.columns["z_position"]
+        self.speeds = self.columns["speed"]
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, player_id):
+        return player_id in self.slots
+
+    #defining function to get the slot of a player, or None if the player isn't in the world
+    def slot_of(self, player_id):
+        return self.slots.get(player_id)
+
+    #defining function to get the slot of a player, adding the player if it isn't in the world
+    def add_player(self, player_id, team=0):
+        slot = self.slots.get(player_id)
+        if slot is None:
+            slot = len(self.slots)
+            self.slots[player_id] = slot
+            for column in self.columns.values():
+                column.append(0)
+            self.player_ids[slot] = player_id
+
+            #a new player starts at the origin until it moves
+            if self.interest is not None:
+                self.interest.update(player_id, 0, 0, 0)
+
+        if team:
+            self.columns["player_team"][slot] = team
+
+        return slot
+
+    #defining function to remove a player
+    #returns True if the player was in the world
+    def remove_player(self, player_id):
+        slot = self.slots.pop(player_id, None)
+        if slot is None:
+            return False
+
+        #moving the last player into the freed slot
+        last_slot = len(self.slots)
+        if slot != last_slot:
+            for column in self.columns.values():
+                column[slot] = column[last_slot]
+            self.slots[self.player_ids[slot]] = slot
+
+        for column in self.columns.values():
+            del column[last_slot]
+
+        if self.interest is not None:
+            self.interest.remove(player_id)
+
+        return True
+
+    #defining function to write a movement record (player_id, movement_type, ..., speed) into the world
+    def set_movement(self, record):
+        slot = self.add_player(record[0])
+        for name, value in zip(QGP_MOVEMENT_FIELDS[1:], record[1:]):
+            self.columns[name][slot] = value
+
+        if self.interest is not None:
+            self.interest.update(record[0], self.x_positions[slot], self.y_positions[slot], self.z_positions[slot])
+
+    #defining function to write a player's status into the world
+    def set_status(self, player_id, health, dmg_taken):
+        slot = self.add_player(player_id)
+        self.columns["player_health"][slot] = health
+        self.columns["player_dmg_taken"][slot] = dmg_taken
+
+    #defining function to get one column, e.g. every x position
+    def column(self, name):
+        return self.columns[name]
+
+    #defining function to get one player's fields as a dict
+    def player(self, player_id):
+        slot = self.slots[player_id]
+        return {name: column[slot] for name, column in self.columns.items()}
+
+    #defining function to get the movement records of every player as one flat array
+    #the records are in the qgp_player_snapshot layout, each column is copied in with one strided slice
+    def movement_records(self):
+        records = uint32_array(bytes(len(self.slots) * QGP_MOVEMENT_RECORD_WIDTH * self.player_ids.itemsize))
+        for index, name in enumerate(QGP_MOVEMENT_FIELDS):
+            records[index::QGP_MOVEMENT_RECORD_WIDTH] = self.columns[name]
+
+        return records
+
+    #defining function to get the movement record of one slot as a tuple
+    def movement_record(self, slot):
+        return tuple(self.columns[name][slot] for name in QGP_MOVEMENT_FIELDS)
+
+    #defining function to get the players that some players can see between them
+    #returns None when everything should be sent, because there is no grid or none of the players are in the world
+    def visible_players(self, player_ids):
+        if self.interest is None:
+            return None
+
+        visible = set()
+        in_world = False
+        for player_id in player_ids:
+            if player_id in self.slots:
+                in_world = True
+                visible |= self.interest.nearby(player_id)
+
+        return visible if in_world else None
+
+    #defining function to get the movement records of some slots as one flat array
+    def movement_records_for(self, slots):
+        records = uint32_array()
+        movement_columns = [self.columns[name] for name in QGP_MOVEMENT_FIELDS]
+        for slot in slots:
+            records.extend([column[slot] for column in movement_columns])
+
+        return records
+
+
+#defining debug function
+if __name__ == "__main__":
+    ############################################################################
+    # TESTING THE QGP WORLD
+    ############################################################################
+    import time
+
+    try:
+        from qgp_snapshot import qgp_player_snapshot
+        from qgp_header import qgp_header
+    except:
+        from qgp.qgp_snapshot import qgp_player_snapshot
+        from qgp.qgp_header import qgp_header
+
+    world = qgp_world()
+    for player_id in range(1, 6):
+        world.add_player(player_id, team=player_id % 2 + 1)
+        world.set_movement((player_id, 1, 90, player_id * 10, 5, 6, 7))
+    world.set_status(3, 80, 20)
+
+    #removing a player moves the last one into its slot
+    world.remove_player(2)
+    print("players", len(world), "slot of 5", world.slot_of(5), "ids", list(world.player_ids))
+    print("player 3", world.player(3))
+    print("x positions", list(world.column("x_position")))
+
+    #a world with a grid only shows the nearby players
+    try:
+        from qgp_interest import qgp_interest_grid
+    except:
+        from qgp.qgp_interest import qgp_interest_grid
+
+    grid_world = qgp_world(qgp_interest_grid(cell_size=100))
+    grid_world.set_movement((1, 1, 90, 10, 10, 0, 7))
+    grid_world.set_movement((2, 1, 90, 150, 10, 0, 7))
+    grid_world.set_movement((3, 1, 90, 900, 10, 0, 7))
+    visible = grid_world.visible_players((1,))
+    print("visible to 1", sorted(visible), "records", list(grid_world.movement_records_for(sorted(grid_world.slot_of(player_id) for player_id in visible))))
+    grid_world.remove_player(2)
+    print("visible to 1 after 2 left", sorted(grid_world.visible_players((1,))), "unknown player", grid_world.visible_players((9,)))
+
+    #checking the records match the snapshot built from rows
+    rows = [tuple(world.player(player_id)[name] for name in QGP_MOVEMENT_FIELDS) for player_id in world.player_ids]
+    snapshot_header = qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+    print("records match", world.movement_records() == qgp_player_snapshot.from_movements(snapshot_header, 1, rows).records)
+
+    #timing the records of a 1000 player world against building them from rows
+    big_world = qgp_world()
+    for player_id in range(1000):
+        big_world.set_movement((player_id, 1, 90, player_id, 5, 6, 7))
+    big_rows = [(player_id, 1, 90, player_id, 5, 6, 7) for player_id in range(1000)]
+
+    rounds = 500
+    start = time.perf_counter()
+    for _ in range(rounds):
+        qgp_player_snapshot.from_movements(snapshot_header, 1, big_rows)
+    rows_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        big_world.movement_records()
+    columns_time = time.perf_counter() - start
+    print(f"1000 player records: from rows {rows_time / rounds * 1e6:.0f}us, from columns {columns_time / rounds * 1e6:.0f}us")
@@ -1,10 +1,27 @@
 #importing the custom libraires
 from aioquic.quic import events
 
-from qgp.pdu_constants import QGP_MSG_CLIENT_ERROR, QGP_MSG_CLIENT_HELLO, QGP_MSG_SERVER_HELLO
-from qgp.qgp_hello import qgp_client_hello, qgp_server_hello
+from qgp.pdu_constants import QGP_MSG_CLIENT_ERROR, QGP_MSG_CLIENT_HELLO, QGP_MSG_SERVER_HELLO, QGP_MSG_TEXT_CHAT, QGP_MSG_PLAYER_SNAPSHOT, QGP_MSG_SNAPSHOT_ACK, QGP_CAP_DATAGRAM, QGP_CAP_COMPACT_MOVEMENT, QGP_CAP_HEADER_V2, QGP_MAX_DATAGRAM_FRAME_SIZE, QGP_ERROR_KICKED, QGP_ERROR_PLAYER_ID_TAKEN, QGP_ERROR_INVALID_PDU, QGP_MSG_Q_REQ, QGP_MSG_Q_RES, QGP_MSG_MATCH, QGP_QUEUE_LEAVE, QGP_QUEUE_LEFT, QGP_QUEUE_JOINED, QGP_QUEUE_REJECTED, QGP_MSG_LD_MATCH_START, QGP_MSG_LD_MAP_CHUNK, QGP_MSG_LD_PROGRESS, QGP_MSG_LD_MATCH_END, QGP_LOAD_FAILED
+from qgp.qgp_hello import qgp_client_hello, qgp_server_hello, parse_capabilities, format_capabilities
 from qgp.qgp_header import qgp_header
 from qgp.qgp_communication import qgp_text_chat
+from qgp.qgp_snapshot import qgp_player_snapshot
+from qgp.qgp_delta import qgp_delta_encoder
+from qgp.qgp_dispatch import qgp_dispatcher
+from qgp.qgp_framing import qgp_stream_reassembler
+from qgp.qgp_channels import qgp_channel, qgp_channel_manager
+from qgp.qgp_scheduler import qgp_send_scheduler, qgp_flush_batcher, congestion_budget, qgp_priority
+from qgp.qgp_match import qgp_match_registry
+from qgp.qgp_directory import qgp_player_directory
+from qgp.qgp_logging import get_logger, log_pdu, start_logging
+from qgp.qgp_tick import qgp_tick_engine
+from qgp.qgp_lod import qgp_lod_selector, QGP_DEFAULT_LOD_BUDGET
+from qgp.qgp_queue import qgp_queue_response, qgp_match_found
+from qgp.qgp_session_mgmt import qgp_game_start
+from qgp.qgp_matchmaking import qgp_matchmaker
+from qgp.qgp_loading import qgp_load_start, qgp_map_chunk
+from qgp.qgp_map_loader import qgp_load_manager
+from qgp.qgp_asset_cache import parse_asset_capabilities
 
 #importing the cli library
 from cli_funcs.cli_cmds import *
@@ -16,11 +33,47 @@ from typing import Dict, Optional, Set
 
 from aioquic.asyncio import QuicConnectionProtocol, serve
 from aioquic.quic.configuration import QuicConfiguration
-from aioquic.quic.events import QuicEvent, StreamDataReceived, HandshakeCompleted, ConnectionTerminated
+from aioquic.quic.events import QuicEvent, StreamDataReceived, DatagramFrameReceived, HandshakeCompleted, ConnectionTerminated
 
 #tracking the connected clients
 ACTIVE_CLIENTS: Set[QuicConnectionProtocol] = set()
 
+#flushing every client with queued PDUs from one timer per tick
+SERVER_FLUSH_BATCHER = qgp_flush_batcher()
+
+#tracking which clients are in which match and team
+MATCH_REGISTRY = qgp_match_registry()
+
+#finding the connection of a player id without scanning every client
+#an id can only be taken over from a connection that has been lost
+PLAYER_DIRECTORY = qgp_player_directory(is_connected=lambda connection: connection in ACTIVE_CLIENTS)
+
+#how long a kicked client has to receive its error before the connection is closed
+KICK_CLOSE_DELAY = 0.1
+
+#how many times a second each match applies its input and sends its state
+SERVER_TICK_RATE = 20
+
+#the grid cell size used to work out which players are near each other
+#each client is sent the players within one cell of its own, None sends everyone to everyone
+SERVER_INTEREST_CELL_SIZE = 256
+
+#the bytes of player updates each client can be sent per tick
+#near and fast players are sent more often than distant ones to stay inside it, None sends every change
+SERVER_LOD_BUDGET = QGP_DEFAULT_LOD_BUDGET
+
+#the number of players the matchmaker puts in a match, and the map and duration of the games it starts
+SERVER_MATCH_SIZE = 2
+SERVER_MATCHMADE_MAP = 1
+SERVER_MATCHMADE_DURATION = 600
+
+#grouping queued players into matches, skipping ids that are already being played
+MATCHMAKER = qgp_matchmaker(match_size=SERVER_MATCH_SIZE,
+                            match_id_in_use=lambda match_id: bool(MATCH_REGISTRY.match_members(match_id)))
+
+#the per PDU output goes through logging so it can be turned down and never blocks the event loop
+LOGGER = get_logger("server")
+
 #defining a temporary DFA
 class server_client_dfa:
     AWAITING_CLIENT_HELLO = 1
@@ -42,16 +95,38 @@ class qgp_server(QuicConnectionProtocol):
         #this is initialized to wait for the hello as no connections available when server first boots
         self.current_dfa_state = server_client_dfa.AWAITING_CLIENT_HELLO
 
+        #the client id is set from the hello
+        self.client_qgp_id = None
+
+        #buffering partial PDUs per stream
+        self.stream_reassembler = qgp_stream_reassembler()
+
+        #opening a small fixed set of persistent streams instead of one per PDU
+        self.channels = qgp_channel_manager(self._quic)
+
+        #sending movement as deltas against the last snapshot this client acknowledged
+        self.delta_encoder = qgp_delta_encoder()
+
+        #choosing which players fit in this client's byte budget each tick
+        self.lod = qgp_lod_selector(SERVER_LOD_BUDGET) if SERVER_LOD_BUDGET else None
+
+        #the sha256 of every asset the client has cached, maps it has are never sent to it
+        self.cached_assets = set()
+
+        #queueing outbound PDUs by the header priority and sending while the congestion window has room
+        self.scheduler = qgp_send_scheduler(self.channels, self.transmit, budget=lambda: congestion_budget(self._quic),
+                                            batcher=SERVER_FLUSH_BATCHER)
+
     def connection_made(self, transport):
         super().connection_made(transport)
 
         peername = transport.get_extra_info('peername')
         if peername:
             self.resolved_peer_address = peername
-            print(f"[Server] New connection from: {self.resolved_peer_address}")
+            LOGGER.info("New connection from %s", self.resolved_peer_address)
         else:
             self.resolved_peer_address = None  # Should ideally not happen
-            print("[Server] New connection, but peer address not available from transport.")
+            LOGGER.info("New connection, but peer address not available from transport")
 
         ACTIVE_CLIENTS.add(self)
 
@@ -59,166 +134,375 @@ class qgp_server(QuicConnectionProtocol):
         super().connection_lost(exc)
         # Use the stored resolved_peer_address for logging if available
         peer_display = self.resolved_peer_address if self.resolved_peer_address else "Unknown Peer"
-        print(f"[Server] Connection lost from: {peer_display}")
+        LOGGER.info("Connection lost from %s", peer_display)
         ACTIVE_CLIENTS.discard(self)
+        self.leave_match(PLAYER_DIRECTORY.ids_for(self))
+        for player_id in PLAYER_DIRECTORY.ids_for(self):
+            MATCHMAKER.remove(player_id)
+        PLAYER_DIRECTORY.remove(self)
+
+        #dropping anything still waiting to be sent
+        self.scheduler.close()
 
     #defining function to handle the incoming QUIC requests
     def quic_event_received(self, event: QuicEvent):
-        #letting quic do its normal handshake
-        if isinstance(event, HandshakeCompleted):
-            print("HandshakeCompleted")
-        elif isinstance(event, StreamDataReceived):
-            print("StreamDataReceived")
-
-            #saving the stream_id and data
-            stream_id = event.stream_id
-            data = event.data
-
-            #upacking the headers and payload from
-            headers, payload = qgp_header.unpack(data)
-
-            if headers.msg_type == QGP_MSG_CLIENT_ERROR:
-                print("Error received")
-                error = qgp_errors.unpack(headers, payload)
-
-                print("Error code:", error.error_code)
-                print("Error length:", error.error_length)
-                print("Error message:", error.error_message)
-                print("Error severity:", error.severity)
-            else:
+        #routing the event by its type instead of walking isinstance checks
+        event_handler = SERVER_EVENT_HANDLERS.get(type(event))
+        if event_handler is not None:
+            event_handler(self, event)
+
+    #letting quic do its normal handshake
+    def handle_handshake_completed(self, event):
+        LOGGER.debug("Handshake completed")
+
+    def handle_stream_data(self, event):
+        #cutting every complete PDU out of the stream data
+        try:
+            frames = self.stream_reassembler.feed(event.stream_id, event.data, event.end_stream)
+        except ValueError as e:
+            LOGGER.warning("Dropping stream %d: %s", event.stream_id, e)
+            return
+
+        #routing each PDU through the registry keyed by (dfa state, message type)
+        for headers, payload in frames:
+            SERVER_DISPATCHER.dispatch(self, headers, payload, event.stream_id)
+
+    def handle_datagram(self, event):
+        #unwrapping the datagram, stale updates come back as None
+        frame = self.channels.datagrams.receive(event.data)
+        if frame is not None:
+            headers, payload = frame
+            SERVER_DISPATCHER.dispatch(self, headers, payload, None)
+
+    def handle_connection_terminated(self, event):
+        LOGGER.debug("Connection terminated")
+        self.current_dfa_state = server_client_dfa.AWAITING_CLIENT_HELLO
 
-                #checking the header message type
-                if headers.msg_type == QGP_MSG_CLIENT_HELLO:
-                    print("Hello packet received")
-
-                    #unpacking the client hello
-                    client_hello = qgp_client_hello.unpack(headers, payload)
-                    #getting the client information
-                    print("Client id", client_hello.client_id)
-                    print("Client version", client_hello.client_version)
-                    print("Client capabilities", client_hello.capabilities)
-
-                    #packing the server hello message
-                    server_hello_header = qgp_header(version=1, msg_type=QGP_MSG_SERVER_HELLO, msg_len=0, priority=0)
-                    server_hello_payload = qgp_server_hello(header= server_hello_header, server_id=1, server_software_version=1, capabilities_str=client_hello.capabilities)
-                    server_hello_packed = server_hello_payload.pack()
-
-                    #sending the packed response to the client
-                    print("Hello stream id", stream_id)
-                    self._quic.send_stream_data(stream_id, server_hello_packed, end_stream=False)
-                    print("Sent response")
-
-                    #updating the DFA
-                    self.current_dfa_state = server_client_dfa.AWAITING_FURTHER_CLIENT_ACTION
-                    print("Updated current dfa_state")
-
-                #setting the DFA check for when the client queues
-                elif self.current_dfa_state == server_client_dfa.CLIENT_IN_QUEUE:
-                    print("Client in queue")
-
-                #setting the DFA check for the client going into a match
-                elif self.current_dfa_state == server_client_dfa.CLIENT_IN_GAME:
-                    #checking what message was received
-                    if headers.msg_type == QGP_MSG_PLAYER_MOVEMENT:
-                        #unpacking the player movement
-                        player_move = qgp_player_movement.unpack(headers, payload)
-
-                        #outputting the player movement
-                        print(f"[INFO] Player ID: {player_move.player_id}")
-                        print(f"[INFO] Player Move Type: {player_move.movement_type}")
-                        print(f"[INFO] Player Direction: {player_move.direction}")
-                        print(f"[INFO] Player X Position: {player_move.x_position}")
-                        print(f"[INFO] Player Y Position: {player_move.y_position}")
-                        print(f"[INFO] Player Z Position: {player_move.z_position}")
-                        print(f"[INFO] Player Speed: {player_move.speed}")
-
-                    elif headers.msg_type == QGP_MSG_PLAYER_STATUS:
-                        #unpacking the player status
-                        player_status = qgp_player_status.unpack(headers, payload)
-
-                        #outputting the player status
-                        print(f"[INFO] Player ID: {player_status.player_id}")
-                        print(f"[INFO] Player Health: {player_status.player_health}")
-                        print(f"[INFO] Player Damage: {player_status.player_dmg_taken}")
-
-                    elif headers.msg_type == QGP_MSG_PLAYER_LEAVE:
-                        #unpacking the leave
-                        player_leave = qgp_player_leave.unpack(headers, payload)
-
-                        #outtputting the leave details
-                        print(f"[INFO] Player ID: {player_leave.player_id}")
-                        print(f"[INFO] Match ID: {player_leave.match_id}")
-                        print(f"[INFO] Player Team: {player_leave.player_team}")
-
-                        self.current_dfa_state = server_client_dfa.CLIENT_CONNECTED_IDLE
-
-                    elif headers.msg_type == QGP_MSG_TEXT_CHAT:
-                        #unpacking the payload
-                        chat_payload = qgp_text_chat.unpack(headers, payload)
-
-                        #printing the message
-                        print(f"[INFO] Message Text: {chat_payload.text}")
-                        print(f"[INFO] Message Text Length: {chat_payload.text_length}")
-
-                    else:
-                        print("Client sent a packet outside of valid headers")
-                        print("Sending a server error")
-                        args = ["8", "0", "Client sent a packet outside of valid headers"]
-                        packaged_pdu = server_error_sender(args)
-                        # checking a pdu package was returned and if so sending it
-                        if packaged_pdu is None:
-                            print("Invalid arguments provided")
-                        else:
-                            sender(packaged_pdu)
-
-                        self.current_dfa_state = server_client_dfa.CLIENT_CONNECTED_IDLE
-
-
-                #checking the DFA for connected IDLE or after handshake
-                elif self.current_dfa_state == server_client_dfa.AWAITING_FURTHER_CLIENT_ACTION or self.current_dfa_state == server_client_dfa.CLIENT_CONNECTED_IDLE:
-                    #checking the message type of player joining
-                    if headers.msg_type == QGP_MSG_PLAYER_JOIN:
-                        #unpacking the details
-                        player_join = qgp_player_join.unpack(headers, payload)
-
-                        #outputting the details
-                        print(f"[INFO] Player ID: {player_join.player_id}")
-                        print(f"[INFO] Match ID: {player_join.match_id}")
-                        print(f"[INFO] Player Team: {player_join.player_team}")
-
-                        self.current_dfa_state = server_client_dfa.CLIENT_IN_GAME
-
-                    else:
-                        print("Client sent a packet outside of valid headers")
-                        print("Sending a server error")
-                        args = ["8", "0", "Client sent a packet outside of valid headers"]
-                        packaged_pdu = server_error_sender(args)
-                        # checking a pdu package was returned and if so sending it
-                        if packaged_pdu is None:
-                            print("Invalid arguments provided")
-                        else:
-                            sender(packaged_pdu)
-
-                        self.current_dfa_state = server_client_dfa.CLIENT_CONNECTED_IDLE
+    #errors can happen in any state
+    def handle_client_error(self, headers, error, stream_id):
+        if isinstance(error, str):
+            LOGGER.warning("Invalid client error: %s", error)
+            return
+
+        log_pdu(LOGGER, headers.msg_type, "Client error %d severity %d: %s", error.error_code, error.severity,
+                error.error_message)
+
+    def handle_client_hello(self, headers, client_hello, stream_id):
+        #getting the client information
+        log_pdu(LOGGER, headers.msg_type, "Client hello from client %d version %d capabilities %s",
+                client_hello.client_id, client_hello.client_version, client_hello.capabilities)
+
+        #making the client reachable by its id, unless another connected client already has it
+        id_taken = not PLAYER_DIRECTORY.add(client_hello.client_id, self)
+        if not id_taken:
+            self.client_qgp_id = client_hello.client_id
+
+        #replying with the capabilities both sides support
+        client_capabilities = parse_capabilities(client_hello.capabilities)
+        negotiated_capabilities = client_capabilities & self.local_capabilities()
+        self.cached_assets = parse_asset_capabilities(client_capabilities)
+
+        #packing the server hello message
+        server_hello_header = qgp_header(version=1, msg_type=QGP_MSG_SERVER_HELLO, msg_len=0, priority=0)
+        server_hello_payload = qgp_server_hello(header= server_hello_header, server_id=1, server_software_version=1, capabilities_str=format_capabilities(negotiated_capabilities))
+        server_hello_packed = server_hello_payload.pack()
+
+        #the stream the client said hello on becomes the control channel
+        LOGGER.debug("Hello stream id %d", stream_id)
+        self.channels.adopt(qgp_channel.CONTROL, stream_id)
+
+        #sending the packed response to the client
+        self.channels.send(server_hello_packed, qgp_channel.CONTROL)
+
+        #switching movement to datagrams if the client asked for them
+        if QGP_CAP_DATAGRAM in negotiated_capabilities:
+            self.channels.enable_datagrams()
+
+        #the hello itself went out with a v1 header, everything after it uses v2
+        if QGP_CAP_HEADER_V2 in negotiated_capabilities:
+            self.channels.enable_header_v2()
+        LOGGER.debug("Sent server hello")
+
+        #the handshake still completes but the client isn't reachable by an id it doesn't own
+        if id_taken:
+            LOGGER.warning("Client id %d is used by another connection", client_hello.client_id)
+            self.send_player_id_taken(client_hello.client_id)
+
+        #updating the DFA
+        self.current_dfa_state = server_client_dfa.AWAITING_FURTHER_CLIENT_ACTION
+
+    #defining function to get the capabilities this connection can offer
+    def local_capabilities(self):
+        capabilities = {QGP_CAP_COMPACT_MOVEMENT, QGP_CAP_HEADER_V2}
+
+        #datagrams need the QUIC DATAGRAM extension turned on in the configuration
+        if self._quic.configuration.max_datagram_frame_size:
+            capabilities.add(QGP_CAP_DATAGRAM)
+
+        return capabilities
+
+    #setting the DFA check for when the client queues
+    def handle_client_in_queue(self, headers, payload, stream_id):
+        log_pdu(LOGGER, headers.msg_type, "Client in queue sent message type 0x%04x", headers.msg_type)
+
+    def handle_player_movement(self, headers, player_move, stream_id):
+        if isinstance(player_move, str):
+            LOGGER.warning("Invalid movement: %s", player_move)
+            return
+
+        #logging the player movement
+        log_pdu(LOGGER, headers.msg_type, "Player %d movement type %d direction %d position (%d, %d, %d) speed %d",
+                player_move.player_id, player_move.movement_type, player_move.direction, player_move.x_position,
+                player_move.y_position, player_move.z_position, player_move.speed)
+
+        #applying the movement to the match on its next tick
+        match_id = self.input_match_id(player_move.player_id)
+        if match_id is not None:
+            TICK_ENGINE.queue_movement(match_id, player_move)
+
+    def handle_player_movement_compact(self, headers, compact_move, stream_id):
+        if isinstance(compact_move, str):
+            LOGGER.warning("Invalid compact movement: %s", compact_move)
+            return
+
+        #the compact PDU has the same fields so it is handled as a normal movement update
+        self.handle_player_movement(headers, compact_move, stream_id)
+
+    def handle_player_status(self, headers, player_status, stream_id):
+        if isinstance(player_status, str):
+            LOGGER.warning("Invalid status: %s", player_status)
+            return
+
+        #logging the player status
+        log_pdu(LOGGER, headers.msg_type, "Player %d health %d damage taken %d",
+                player_status.player_id, player_status.player_health, player_status.player_dmg_taken)
+
+        #applying the status to the match on its next tick
+        match_id = self.input_match_id(player_status.player_id)
+        if match_id is not None:
+            TICK_ENGINE.queue_status(match_id, player_status)
+
+    #defining function to get the match a player's input should be applied to
+    #the server is authoritative so a client can only send input for its own players
+    #returns None if the input should be dropped
+    def input_match_id(self, player_id):
+        membership = MATCH_REGISTRY.membership(self)
+        if membership is None:
+            return None
+
+        if player_id not in PLAYER_DIRECTORY.ids_for(self):
+            LOGGER.warning("Dropping input for player %d from a connection that isn't playing it", player_id)
+            return None
+
+        return membership[0]
+
+    #defining function to take this client's players out of its match
+    #the match stops ticking once nobody is left in it
+    def leave_match(self, player_ids):
+        MAP_LOADER.remove(self)
+        membership = MATCH_REGISTRY.leave(self)
+        if membership is None:
+            return
+
+        match_id = membership[0]
+        for player_id in player_ids:
+            TICK_ENGINE.remove_player(match_id, player_id)
+
+        if not MATCH_REGISTRY.match_members(match_id):
+            TICK_ENGINE.stop_match(match_id)
+
+    def handle_player_leave(self, headers, player_leave, stream_id):
+        if isinstance(player_leave, str):
+            LOGGER.warning("Invalid player leave: %s", player_leave)
+            self.send_invalid_pdu("leave", player_leave)
+            return
+
+        #logging the leave details
+        log_pdu(LOGGER, headers.msg_type, "Player %d leaving match %d team %d", player_leave.player_id,
+                player_leave.match_id, player_leave.player_team)
+
+        #a client can only take its own players out of a match
+        player_ids = PLAYER_DIRECTORY.ids_for(self)
+        if player_leave.player_id not in player_ids:
+            LOGGER.warning("Dropping leave for player %d from a connection that isn't playing it", player_leave.player_id)
+            return
+
+        #removing the client from its match group and all of its players from the match state
+        self.leave_match(player_ids)
+
+        self.current_dfa_state = server_client_dfa.CLIENT_CONNECTED_IDLE
+
+    def handle_text_chat(self, headers, chat_payload, stream_id):
+        if isinstance(chat_payload, str):
+            LOGGER.warning("Invalid text chat: %s", chat_payload)
+            return
+
+        #logging the message
+        log_pdu(LOGGER, headers.msg_type, "Chat message (%d characters): %s", chat_payload.text_length,
+                chat_payload.text)
+
+    def handle_player_join(self, headers, player_join, stream_id):
+        if isinstance(player_join, str):
+            LOGGER.warning("Invalid player join: %s", player_join)
+            self.send_invalid_pdu("join", player_join)
+            return
+
+        #logging the join details
+        log_pdu(LOGGER, headers.msg_type, "Player %d joining match %d team %d", player_join.player_id,
+                player_join.match_id, player_join.player_team)
+
+        if not self.enter_match(player_join.player_id, player_join.match_id, player_join.player_team):
+            LOGGER.warning("Player %d is played by another connection", player_join.player_id)
+            self.send_player_id_taken(player_join.player_id)
+
+    #defining function to tell this client a PDU it sent couldn't be decoded
+    def send_invalid_pdu(self, pdu_name, reason):
+        self.queue_qgp_pdu(server_error_sender([str(QGP_ERROR_INVALID_PDU), "1", "Invalid", pdu_name + ":"] + reason.split()))
+
+    #defining function to tell this client a player id belongs to another connection
+    def send_player_id_taken(self, player_id):
+        self.queue_qgp_pdu(server_error_sender([str(QGP_ERROR_PLAYER_ID_TAKEN), "1", "Player", "id", str(player_id), "is", "in", "use"]))
+
+    #defining function to put one of this client's players into a match
+    #returns False if another connected client is playing the player id
+    def enter_match(self, player_id, match_id, team, dfa_status=server_client_dfa.CLIENT_IN_GAME):
+        if not PLAYER_DIRECTORY.available(player_id, self):
+            return False
+
+        #leaving any old match first so the player isn't left in its state
+        self.leave_match(PLAYER_DIRECTORY.ids_for(self))
+        MATCHMAKER.remove(player_id)
+
+        #adding the client to the match group so match and team sends reach it
+        MATCH_REGISTRY.join(self, match_id, team)
+
+        #the baselines of the old match mean nothing in the new one
+        self.delta_encoder.reset()
+        if self.lod is not None:
+            self.lod.reset()
+        PLAYER_DIRECTORY.add(player_id, self)
+
+        #adding the player to the match state, which starts the match ticking
+        TICK_ENGINE.add_player(match_id, player_id, team)
+
+        self.current_dfa_state = dfa_status
+        return True
+
+    def handle_queue_request(self, headers, queue_request, stream_id):
+        if isinstance(queue_request, str):
+            LOGGER.warning("Invalid queue request: %s", queue_request)
+            return
+
+        #a player id can only be queued or taken out of the queue by the connection playing it
+        player_id = queue_request.player_id
+        if not PLAYER_DIRECTORY.available(player_id, self):
+            self.send_queue_response(queue_request, QGP_QUEUE_REJECTED)
+            return
+
+        if queue_request.queue_action == QGP_QUEUE_LEAVE:
+            MATCHMAKER.remove(player_id)
+            self.send_queue_response(queue_request, QGP_QUEUE_LEFT, server_client_dfa.CLIENT_CONNECTED_IDLE)
+            return
+
+        PLAYER_DIRECTORY.add(player_id, self)
+        formed_match = MATCHMAKER.enqueue(player_id, queue_request.match_mode, queue_request.player_skill)
+        self.send_queue_response(queue_request, QGP_QUEUE_JOINED, server_client_dfa.CLIENT_IN_QUEUE,
+                                 MATCHMAKER.waiting(queue_request.match_mode, queue_request.player_skill))
+
+        if formed_match is not None:
+            start_matchmade_game(formed_match)
+
+    #defining function to answer a queue request
+    def send_queue_response(self, queue_request, queue_status, dfa_status=None, players_waiting=0):
+        response_header = qgp_header(version=1, msg_type=QGP_MSG_Q_RES, msg_len=0, priority=0)
+        response = qgp_queue_response(response_header, queue_request.player_id, queue_request.match_mode,
+                                      queue_status, players_waiting)
+        self.queue_qgp_pdu(response.pack(), dfa_status)
+
+    def handle_snapshot_ack(self, headers, snapshot_ack, stream_id):
+        if isinstance(snapshot_ack, str):
+            LOGGER.warning("Invalid snapshot ack: %s", snapshot_ack)
+            return
+
+        #later snapshots are sent as deltas against this one
+        self.delta_encoder.ack(snapshot_ack.tick)
+
+    def handle_load_progress(self, headers, load_progress, stream_id):
+        if isinstance(load_progress, str):
+            LOGGER.warning("Invalid load progress: %s", load_progress)
+            return
+
+        #the progress lets the next chunks of the map be sent
+        log_pdu(LOGGER, headers.msg_type, "Match %d load progress %d chunks", load_progress.match_id, load_progress.chunks_received)
+        MAP_LOADER.progress(self, load_progress.chunks_received)
+
+    def handle_load_end(self, headers, load_end, stream_id):
+        if isinstance(load_end, str):
+            LOGGER.warning("Invalid load end: %s", load_end)
+            return
+
+        if load_end.load_status == QGP_LOAD_FAILED:
+            LOGGER.warning("Client failed to load map %d for match %d", load_end.match_map, load_end.match_id)
+        else:
+            LOGGER.info("Client loaded map %d for match %d", load_end.match_map, load_end.match_id)
+
+            #the client caches the map so it is never sent to it again
+            #only a map this server is loading for the client is recorded, the id in the PDU is never looked up
+            digest = MAP_LOADER.digest_for(self, load_end.match_map)
+            if digest is not None:
+                self.cached_assets.add(digest)
+
+        #the match starts once every player has loaded
+        MAP_LOADER.loaded(self)
+
+    #the ack is for a match the client is no longer in so it is dropped
+    def handle_late_snapshot_ack(self, headers, snapshot_ack, stream_id):
+        log_pdu(LOGGER, headers.msg_type, "Dropping snapshot ack after the match ended")
+
+    #the state is valid but the message type isn't expected in it
+    def handle_invalid_header(self, headers, payload, stream_id):
+        LOGGER.warning("Client sent message type 0x%04x outside of valid headers, sending a server error",
+                       headers.msg_type)
+        self.send_state_error(["8", "0", "Client sent a packet outside of valid headers"])
+
+    #the message arrived in a state that doesn't accept any messages
+    def handle_invalid_state(self, headers, payload, stream_id):
+        LOGGER.warning("Client sent message type 0x%04x outside of next expected state, sending a server error",
+                       headers.msg_type)
+        self.send_state_error(["9", "0", "Received packet outside of next expected state"])
+
+    #defining function to send an error to this client and drop it back to idle
+    def send_state_error(self, args):
+        packaged_pdu = server_error_sender(args)
+        # checking a pdu package was returned and if so sending it
+        if packaged_pdu is None:
+            LOGGER.warning("Invalid arguments provided for a server error")
+        else:
+            self.queue_qgp_pdu(packaged_pdu)
 
-                else:
-                    print("Client sent a packet outside of next expected state")
-                    print("Sending a server error")
-                    args = ["9", "0", "Received packet outside of next expected state"]
-                    packaged_pdu = server_error_sender(args)
-                    # checking a pdu package was returned and if so sending it
-                    if packaged_pdu is None:
-                        print("Invalid arguments provided")
-                    else:
-                        sender(packaged_pdu)
+        self.current_dfa_state = server_client_dfa.CLIENT_CONNECTED_IDLE
+
+    #defining function to queue an already packed PDU for this client without creating a task
+    #the PDU is flushed with everything else queued this tick
+    def queue_qgp_pdu(self, packed_pdu, dfa_status=None):
+        #changing the DFA if needed
+        if dfa_status is not None:
+            self.current_dfa_state = dfa_status
 
-                    self.current_dfa_state = server_client_dfa.CLIENT_CONNECTED_IDLE
+        if not self.scheduler.send(packed_pdu):
+            LOGGER.warning("Send queue full, dropped low priority PDU")
 
+    #defining function to send an error to this client and then close its connection
+    #the error is flushed straight away and the close waits so it can arrive first
+    def kick(self, reason):
+        packaged_pdu = server_error_sender([str(QGP_ERROR_KICKED), "2"] + reason.split())
+        self.queue_qgp_pdu(packaged_pdu, server_client_dfa.CLIENT_TERMINATING)
+        self.scheduler.flush()
 
+        #the match stops sending its state to the kicked client straight away
+        self.leave_match(PLAYER_DIRECTORY.ids_for(self))
 
-        elif isinstance(event, ConnectionTerminated):
-            print("ConnectionTerminated")
-            self.current_dfa_state = server_client_dfa.AWAITING_CLIENT_HELLO
+        asyncio.get_running_loop().call_later(KICK_CLOSE_DELAY, self.close)
 
     # Helper method to pack and send a QGP PDU.
     async def send_qgp_pdu(self, pdu_instance, dfa_status, stream_id_to_use: Optional[int] = None, end_stream=False):
@@ -227,22 +511,65 @@ class qgp_server(QuicConnectionProtocol):
         #wsetting the packed PDU
         packed_pdu = pdu_instance
 
-        #changing the DFA if needed
-        if dfa_status is not None:
-            self.current_dfa_state = dfa_status
-
-        #setting the stream is to use
+        #queueing the packet for its persistent channel unless a stream was asked for
+        #everything queued this tick is flushed together with one transmit()
         if stream_id_to_use is None:
-           stream_id = self._quic.get_next_available_stream_id(
-                    is_unidirectional=False)  # Or True for one-way broadcast
+            self.queue_qgp_pdu(packed_pdu, dfa_status)
         else:
-            stream_id = stream_id_to_use
-        print("Stream id", stream_id)
-
-        #sending the packet to the client
-        self._quic.send_stream_data(stream_id, packed_pdu, end_stream=True)
-        self.transmit()
-        print("Sent response")
+            #changing the DFA if needed
+            if dfa_status is not None:
+                self.current_dfa_state = dfa_status
+
+            self._quic.send_stream_data(stream_id_to_use, packed_pdu, end_stream=end_stream)
+            self.transmit()
+
+        LOGGER.debug("Sent message type 0x%04x to %s", qgp_header.peek_msg_type(packed_pdu), peer_display)
+
+
+
+#routing the QUIC events by their type
+SERVER_EVENT_HANDLERS = {
+    HandshakeCompleted: qgp_server.handle_handshake_completed,
+    StreamDataReceived: qgp_server.handle_stream_data,
+    DatagramFrameReceived: qgp_server.handle_datagram,
+    ConnectionTerminated: qgp_server.handle_connection_terminated,
+}
+
+#building the PDU routing table once so the hot path is a dict lookup
+SERVER_DISPATCHER = qgp_dispatcher(default_handler=qgp_server.handle_invalid_state)
+SERVER_DISPATCHER.register(qgp_dispatcher.ANY_STATE, QGP_MSG_CLIENT_ERROR, qgp_server.handle_client_error)
+SERVER_DISPATCHER.register(qgp_dispatcher.ANY_STATE, QGP_MSG_CLIENT_HELLO, qgp_server.handle_client_hello)
+SERVER_DISPATCHER.register_state_default(server_client_dfa.CLIENT_IN_QUEUE, qgp_server.handle_client_in_queue)
+
+SERVER_DISPATCHER.register(server_client_dfa.CLIENT_IN_GAME, QGP_MSG_PLAYER_MOVEMENT, qgp_server.handle_player_movement)
+SERVER_DISPATCHER.register(server_client_dfa.CLIENT_IN_GAME, QGP_MSG_PLAYER_MOVEMENT_COMPACT, qgp_server.handle_player_movement_compact)
+SERVER_DISPATCHER.register(server_client_dfa.CLIENT_IN_GAME, QGP_MSG_PLAYER_STATUS, qgp_server.handle_player_status)
+SERVER_DISPATCHER.register(server_client_dfa.CLIENT_IN_GAME, QGP_MSG_TEXT_CHAT, qgp_server.handle_text_chat)
+#acks and leaves only read a few fixed fields so they are read straight from the payload
+SERVER_DISPATCHER.register(server_client_dfa.CLIENT_IN_GAME, QGP_MSG_SNAPSHOT_ACK, qgp_server.handle_snapshot_ack, lazy=True)
+SERVER_DISPATCHER.register(server_client_dfa.CLIENT_IN_GAME, QGP_MSG_PLAYER_LEAVE, qgp_server.handle_player_leave, lazy=True)
+#acks for the last ticks can still be in flight after the client leaves or the game ends
+SERVER_DISPATCHER.register((server_client_dfa.CLIENT_CONNECTED_IDLE, server_client_dfa.CLIENT_GAME_ENDING,
+                            server_client_dfa.CLIENT_TERMINATING),
+                           QGP_MSG_SNAPSHOT_ACK, qgp_server.handle_late_snapshot_ack, lazy=True)
+
+SERVER_DISPATCHER.register((server_client_dfa.AWAITING_FURTHER_CLIENT_ACTION, server_client_dfa.CLIENT_CONNECTED_IDLE),
+                           QGP_MSG_PLAYER_JOIN, qgp_server.handle_player_join)
+#players still loading when the match starts report their progress from in game
+SERVER_DISPATCHER.register((server_client_dfa.CLIENT_LOADING_MAP, server_client_dfa.CLIENT_IN_GAME),
+                           QGP_MSG_LD_PROGRESS, qgp_server.handle_load_progress)
+SERVER_DISPATCHER.register((server_client_dfa.CLIENT_LOADING_MAP, server_client_dfa.CLIENT_IN_GAME),
+                           QGP_MSG_LD_MATCH_END, qgp_server.handle_load_end)
+SERVER_DISPATCHER.register(server_client_dfa.CLIENT_LOADING_MAP, QGP_MSG_PLAYER_LEAVE, qgp_server.handle_player_leave, lazy=True)
+#players can queue once connected or when their game is over, and leave while queued
+SERVER_DISPATCHER.register((server_client_dfa.AWAITING_FURTHER_CLIENT_ACTION, server_client_dfa.CLIENT_CONNECTED_IDLE,
+                            server_client_dfa.CLIENT_IN_QUEUE, server_client_dfa.CLIENT_GAME_ENDING),
+                           QGP_MSG_Q_REQ, qgp_server.handle_queue_request)
+SERVER_DISPATCHER.register_state_default((server_client_dfa.CLIENT_IN_GAME,
+                                          server_client_dfa.CLIENT_LOADING_MAP,
+                                          server_client_dfa.AWAITING_FURTHER_CLIENT_ACTION,
+                                          server_client_dfa.CLIENT_CONNECTED_IDLE),
+                                         qgp_server.handle_invalid_header)
 
 
 
@@ -272,24 +599,14 @@ async def process_commands(command_queue: asyncio.Queue, loop: asyncio.AbstractE
                 print(f"[Server CLI] Broadcasting chat: '{message_text}'")
                 chat_header = qgp_header(
                     version= 1,
-                    msg_type=0,
+                    msg_type=QGP_MSG_TEXT_CHAT,
                     msg_len=0,
                     priority=1
                 )
                 chat_pdu = qgp_text_chat(chat_header, text_length= len(message_text), text=message_text)
 
-                clients_to_send_snapshot = list(ACTIVE_CLIENTS)
-                if not clients_to_send_snapshot:
-                    print("[Server CLI] No active clients to broadcast to.")
-                for client_protocol in clients_to_send_snapshot:
-                    if hasattr(client_protocol, 'send_qgp_pdu') and client_protocol._quic is not None:
-                        # Use asyncio.create_task for safety from within another coroutine
-                        asyncio.create_task(client_protocol.send_qgp_pdu(chat_pdu, stream_id_to_use=None))
-                    else:
-                        peer_addr_display = client_protocol.resolved_peer_address if hasattr(client_protocol,
-                                                                                             'resolved_peer_address') and client_protocol.resolved_peer_address else "Unknown Client"
-                        print(
-                            f"[Server CLI] Cannot send to client {peer_addr_display}: missing send_qgp_pdu or not fully connected.")
+                #packing the chat once and sending the same bytes to every client
+                sender(chat_pdu.pack())
             else:
                 print("[Server CLI] Usage: broadcast_chat <message>")
 
@@ -313,6 +630,26 @@ async def process_commands(command_queue: asyncio.Queue, loop: asyncio.AbstractE
             else:
                 sender(packaged_pdu)
 
+        #sending a chat to one match
+        elif cmd == "match_chat":
+            packaged_pdu = client_chat(args[1:]) if args and args[0].isdigit() else None
+
+            # checking a pdu package was returned and if so sending it
+            if packaged_pdu is None:
+                print("[Server CLI] Usage: match_chat <match_id> <message>")
+            else:
+                send_to_match(packaged_pdu, int(args[0]))
+
+        #sending a chat to one team in a match
+        elif cmd == "team_chat":
+            packaged_pdu = client_chat(args[2:]) if len(args) > 1 and args[0].isdigit() and args[1].isdigit() else None
+
+            # checking a pdu package was returned and if so sending it
+            if packaged_pdu is None:
+                print("[Server CLI] Usage: team_chat <match_id> <team> <message>")
+            else:
+                send_to_team(packaged_pdu, int(args[0]), int(args[1]))
+
         # sending the start_game command
         elif cmd == "start_game":
             packaged_pdu = start_game(args)
@@ -322,7 +659,7 @@ async def process_commands(command_queue: asyncio.Queue, loop: asyncio.AbstractE
             if packaged_pdu is None:
                 print("Invalid arguments provided")
             else:
-                sender(packaged_pdu, dfa)
+                send_to_match(packaged_pdu, int(args[0]), dfa, fallback_to_all=True)
 
         # sending the player_move command
         elif cmd == "end_game":
@@ -333,7 +670,54 @@ async def process_commands(command_queue: asyncio.Queue, loop: asyncio.AbstractE
             if packaged_pdu is None:
                 print("Invalid arguments provided")
             else:
-                sender(packaged_pdu)
+                send_to_match(packaged_pdu, int(args[0]), fallback_to_all=True)
+
+                #the match state stops being sent once the game is over
+                TICK_ENGINE.stop_match(int(args[0]))
+                MAP_LOADER.cancel(int(args[0]))
+
+        #sending a chat to one player
+        elif cmd == "whisper":
+            packaged_pdu = client_chat(args[1:]) if args and args[0].isdigit() else None
+
+            # checking a pdu package was returned and if so sending it
+            if packaged_pdu is None:
+                print("[Server CLI] Usage: whisper <player_id> <message>")
+            else:
+                send_to_player(packaged_pdu, int(args[0]))
+
+        #sending an error to one player and disconnecting it
+        elif cmd == "kick":
+            if not args or not args[0].isdigit():
+                print("[Server CLI] Usage: kick <player_id> [reason]")
+            else:
+                connection = PLAYER_DIRECTORY.lookup(int(args[0]))
+                if connection is None:
+                    print(f"[Server CLI] Player {args[0]} is not connected.")
+                else:
+                    print(f"[Server CLI] Kicking player {args[0]}")
+                    connection.kick(" ".join(args[1:]) or "Kicked by the server")
+
+        #listing the matches and how many clients are in each team
+        elif cmd == "list_matches":
+            match_ids = MATCH_REGISTRY.match_ids()
+            if not match_ids:
+                print("[Server CLI] No matches have players.")
+            else:
+                print("[Server CLI] Active matches:")
+                for match_id in match_ids:
+                    teams = MATCH_REGISTRY.teams[match_id]
+                    team_sizes = ", ".join(f"team {team}: {len(members)}" for team, members in teams.items())
+                    print(f"  Match {match_id}: {len(MATCH_REGISTRY.match_members(match_id))} players ({team_sizes})")
+
+        elif cmd == "list_queues":
+            waiting = MATCHMAKER.waiting_by_mode()
+            if not waiting:
+                print("[Server CLI] No players are queued.")
+            else:
+                print("[Server CLI] Queued players:")
+                for match_mode, count in sorted(waiting.items()):
+                    print(f"  Mode {match_mode}: {count} waiting, {MATCHMAKER.size_for(match_mode)} per match")
 
         elif cmd == "list_clients":
             if not ACTIVE_CLIENTS:
@@ -395,25 +779,200 @@ def cli_input_loop(loop: asyncio.AbstractEventLoop, command_queue: asyncio.Queue
     finally:
         print("[Server CLI] Input loop ended.")
 
-#defining function to send the package pdu
-def sender(packaged_pdu, dfa_status = None):
-    #getting the active clients
-    clients_to_send_snapshot = list(ACTIVE_CLIENTS)
-    if not clients_to_send_snapshot:
-        print("[Server CLI] No active clients to broadcast to.")
-
-    #looping through the active clients and sending the error
-    print(clients_to_send_snapshot)
-    for client_protocol in clients_to_send_snapshot:
-        if hasattr(client_protocol, 'send_qgp_pdu') and client_protocol._quic is not None:
-            # Use asyncio.create_task for safety from within another coroutine
-            asyncio.create_task(client_protocol.send_qgp_pdu(packaged_pdu, dfa_status=dfa_status, stream_id_to_use=None))
-
+#defining function to send one packed PDU to many clients
+#the PDU is encoded once and the same bytes are queued on every target in a single pass
+#no task is created per client, the flushes are batched by SERVER_FLUSH_BATCHER
+def broadcast(packaged_pdu, targets, dfa_status = None):
+    sent = 0
+    for client_protocol in targets:
+        if client_protocol._quic is not None:
+            client_protocol.queue_qgp_pdu(packaged_pdu, dfa_status)
+            sent += 1
         else:
             peer_addr_display = client_protocol.resolved_peer_address if hasattr(client_protocol,
                                                                                  'resolved_peer_address') and client_protocol.resolved_peer_address else "Unknown Client"
             print(
-                f"[Server CLI] Cannot send to client {peer_addr_display}: missing send_qgp_pdu or not fully connected.")
+                f"[Server CLI] Cannot send to client {peer_addr_display}: not fully connected.")
+
+    return sent
+
+#defining function to send a packed PDU to every client in a match
+#with fallback_to_all a match nobody has joined yet goes to every client like before
+def send_to_match(packaged_pdu, match_id, dfa_status = None, fallback_to_all = False):
+    members = MATCH_REGISTRY.match_members(match_id)
+    if not members:
+        if fallback_to_all:
+            print(f"[Server CLI] No clients in match {match_id}, sending to all clients.")
+            return sender(packaged_pdu, dfa_status)
+
+        print(f"[Server CLI] No clients in match {match_id}.")
+        return 0
+
+    return broadcast(bytes(packaged_pdu), tuple(members), dfa_status)
+
+#defining function to send the movement of many players to a match
+#each member gets a delta against the snapshot it last acknowledged, or a full snapshot if it has none
+#members with the same baseline share one encoded PDU
+def send_snapshot_to_match(match_id, tick, movements):
+    members = MATCH_REGISTRY.match_members(match_id)
+    if not members:
+        print(f"[Server CLI] No clients in match {match_id}.")
+        return 0
+
+    snapshot_header = qgp_header(version=1, msg_type=QGP_MSG_PLAYER_SNAPSHOT, msg_len=0, priority=0)
+    records = qgp_player_snapshot.from_movements(snapshot_header, tick, movements).records
+    return send_records_to_match(match_id, tick, records)
+
+#defining function to send flat snapshot records to every member of a match
+#each client gets a delta against its own acked snapshot, clients with the same baseline share the encoding
+def send_records_to_match(match_id, tick, records):
+    members = MATCH_REGISTRY.match_members(match_id)
+    encoded = {}
+    sent = 0
+    for client_protocol in tuple(members):
+        if client_protocol._quic is not None:
+            client_protocol.queue_qgp_pdu(client_protocol.delta_encoder.encode(tick, records, cache=encoded))
+            sent += 1
+
+    return sent
+
+#defining function to send the state of a match at the end of a tick
+#each member is only sent the players near its own, picked by priority to fit its byte budget
+#without a budget, members that see the same players share the records and encoding
+def send_match_state(match_id, tick, world):
+    members = MATCH_REGISTRY.match_members(match_id)
+
+    #stopping matches that everyone has left
+    if not members:
+        TICK_ENGINE.stop_match(match_id)
+        return 0
+
+    #visible players -> (records, encoded PDUs by baseline)
+    groups = {}
+    sent = 0
+    for client_protocol in tuple(members):
+        #clients loading the map are sent the match state once the game starts
+        if client_protocol._quic is None or client_protocol.current_dfa_state == server_client_dfa.CLIENT_LOADING_MAP:
+            continue
+
+        player_ids = PLAYER_DIRECTORY.ids_for(client_protocol)
+        visible = world.visible_players(player_ids)
+        if client_protocol.lod is not None:
+            #the records are different for every client so there is nothing to share
+            #they are costed against the baseline the delta will be made from so the budget holds while acks are late
+            records = client_protocol.lod.select(world, player_ids, visible, client_protocol.delta_encoder.baseline_records())
+            encoded = None
+        else:
+            key = None if visible is None else frozenset(visible)
+            group = groups.get(key)
+            if group is None:
+                if visible is None:
+                    records = world.movement_records()
+                else:
+                    records = world.movement_records_for(sorted(world.slot_of(player_id) for player_id in visible))
+                group = groups[key] = (records, {})
+
+            records, encoded = group
+
+        client_protocol.queue_qgp_pdu(client_protocol.delta_encoder.encode(tick, records, cache=encoded))
+        sent += 1
+
+    return sent
+
+#running a tick for every match with players in it
+TICK_ENGINE = qgp_tick_engine(send_match_state, SERVER_TICK_RATE, SERVER_INTEREST_CELL_SIZE)
+
+#defining function to start a game for a match the matchmaker formed
+#each player is put in the match and told its team, then the match loads its map before the game start
+def start_matchmade_game(formed_match):
+    match_id = formed_match.match_id
+    connections = []
+    for player_id, team in formed_match.players:
+        connection = PLAYER_DIRECTORY.lookup(player_id)
+        if connection is None or connection._quic is None:
+            continue
+
+        connection.enter_match(player_id, match_id, team, server_client_dfa.CLIENT_LOADING_MAP)
+        match_header = qgp_header(version=1, msg_type=QGP_MSG_MATCH, msg_len=0, priority=0)
+        connection.queue_qgp_pdu(qgp_match_found(match_header, player_id, match_id, formed_match.match_mode, team).pack())
+        connections.append(connection)
+
+    start_header = qgp_header(version=1, msg_type=QGP_MSG_GAME_START, msg_len=0, priority=0)
+    player_ids = formed_match.player_ids()
+    game_start = qgp_game_start(start_header, match_id, formed_match.match_mode, SERVER_MATCHMADE_DURATION,
+                                SERVER_MATCHMADE_MAP, formed_match.match_mode, 0, len(player_ids), player_ids)
+    LOGGER.info("Formed match %d for mode %d with players %s", match_id, formed_match.match_mode, player_ids)
+    return load_match(match_id, SERVER_MATCHMADE_MAP, connections, game_start.pack())
+
+#defining function to send a match's map to its players, the game start is sent once they have it
+#the chunks are skipped for clients that said in their hello they have the map cached
+def load_match(match_id, match_map, connections, packed_game_start):
+    load = MAP_LOADER.start(match_id, match_map, connections, packed_game_start,
+                            has_map=lambda connection, digest: digest in connection.cached_assets)
+
+    #the load start is sent on the bulk channel ahead of the chunks
+    load_header = qgp_header(version=1, msg_type=QGP_MSG_LD_MATCH_START, msg_len=0, priority=qgp_priority.NORMAL)
+    packed_load_start = qgp_load_start(load_header, match_id, match_map, len(load.data), load.chunk_size,
+                                       load.chunk_count, load.digest).pack()
+    for connection in connections:
+        connection.queue_qgp_pdu(packed_load_start)
+
+    cached = sum(1 for connection in connections if connection not in MAP_LOADER.transfers)
+    LOGGER.info("Loading map %d for match %d, %d of %d players have it cached", match_map, match_id, cached, len(connections))
+    return len(connections)
+
+#defining function to send one chunk of a map
+#chunks are the lowest priority PDUs so a loading client's gameplay and control PDUs always go first
+def send_map_chunk(connection, transfer, chunk_index, data):
+    if connection._quic is None:
+        return
+
+    chunk_header = qgp_header(version=1, msg_type=QGP_MSG_LD_MAP_CHUNK, msg_len=0, priority=qgp_priority.BULK)
+    connection.queue_qgp_pdu(qgp_map_chunk(chunk_header, transfer.match_map, chunk_index, data).pack())
+
+#defining function to start a match once its players have loaded
+def start_loaded_game(match_id, packed_game_start, still_loading):
+    if still_loading:
+        LOGGER.warning("Starting match %d without %d players that are still loading", match_id, len(still_loading))
+
+    send_to_match(packed_game_start, match_id, server_client_dfa.CLIENT_IN_GAME)
+
+#sending the maps of the matches that are loading
+MAP_LOADER = qgp_load_manager(send_map_chunk, start_loaded_game)
+
+#defining function to send a packed PDU to one team in a match
+def send_to_team(packaged_pdu, match_id, team, dfa_status = None):
+    members = MATCH_REGISTRY.team_members(match_id, team)
+    if not members:
+        print(f"[Server CLI] No clients in match {match_id} team {team}.")
+        return 0
+
+    return broadcast(bytes(packaged_pdu), tuple(members), dfa_status)
+
+#defining function to send a packed PDU to one player
+#returns 1 if the player is connected and 0 if not
+def send_to_player(packaged_pdu, player_id, dfa_status = None):
+    connection = PLAYER_DIRECTORY.lookup(player_id)
+    if connection is None:
+        print(f"[Server CLI] Player {player_id} is not connected.")
+        return 0
+
+    return broadcast(packaged_pdu, (connection,), dfa_status)
+
+#defining function to send a packed PDU to a list of players
+#each connection gets the PDU once even if several of the ids point at it
+def send_to_players(packaged_pdu, player_ids, dfa_status = None):
+    return broadcast(bytes(packaged_pdu), PLAYER_DIRECTORY.lookup_many(player_ids), dfa_status)
+
+#defining function to send the package pdu to every client
+def sender(packaged_pdu, dfa_status = None):
+    #getting the active clients
+    if not ACTIVE_CLIENTS:
+        print("[Server CLI] No active clients to broadcast to.")
+        return 0
+
+    #snapshotting the clients so a disconnect can't change the set mid send
+    return broadcast(bytes(packaged_pdu), tuple(ACTIVE_CLIENTS), dfa_status)
 
 
 #defining the main function that does not have the CLI
@@ -423,9 +982,15 @@ async def main():
         is_client=False,
     )
 
+    #allowing movement updates to use QUIC datagrams
+    config.max_datagram_frame_size = QGP_MAX_DATAGRAM_FRAME_SIZE
+
     #defining the ssl cert and key
     config.load_cert_chain(certfile='test_cert.pem', keyfile='test_private_key.pem')
 
+    #writing the logs from a background thread
+    start_logging()
+
     #starting the server
     print("Server starting")
     await serve(
@@ -456,9 +1021,15 @@ async def main_server_with_cli():
     #setting the idle timeout
     configuration.idle_timeout = 1200
 
+    #allowing movement updates to use QUIC datagrams
+    configuration.max_datagram_frame_size = QGP_MAX_DATAGRAM_FRAME_SIZE
+
     # Ensure paths to cert and key are correct
     configuration.load_cert_chain(certfile='test_cert.pem', keyfile='test_private_key.pem')
 
+    #writing the logs from a background thread
+    start_logging()
+
     command_queue = asyncio.Queue()
     loop = asyncio.get_running_loop()
 
@@ -0,0 +1,67 @@
+import pytest
+
+from qgp.pdu_constants import QGP_MSG_PLAYER_MOVEMENT_COMPACT
+from qgp.qgp_compact import qgp_player_movement_compact, compact_movement, to_signed32
+from qgp.qgp_header import qgp_header
+from qgp.qgp_player import qgp_player_movement
+from qgp.qgp_varint import write_uvarint, read_uvarint, write_svarint, read_svarint, uvarint_size
+
+FIELDS = ("player_id", "movement_type", "direction", "x_position", "y_position", "z_position", "speed")
+
+
+def move_header():
+    return qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+
+
+def unpack_compact(packed_pdu):
+    header, payload = qgp_header.unpack(packed_pdu)
+    assert header.msg_type == QGP_MSG_PLAYER_MOVEMENT_COMPACT
+    return qgp_player_movement_compact.unpack(header, payload)
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 0xFFFFFFFF, 1 << 63])
+def test_uvarint_round_trip(value):
+    buffer = bytearray()
+    write_uvarint(buffer, value)
+    assert len(buffer) == uvarint_size(value)
+    assert read_uvarint(buffer, 0) == (value, len(buffer))
+
+
+@pytest.mark.parametrize("value", [0, -1, 1, -64, 64, -(1 << 31), (1 << 31) - 1])
+def test_svarint_round_trip(value):
+    buffer = bytearray()
+    write_svarint(buffer, value)
+    assert read_svarint(buffer, 0) == (value, len(buffer))
+
+
+def test_compact_movement_round_trip_with_negative_positions():
+    compact = qgp_player_movement_compact(move_header(), 70000, 3, 270, -1, -(1 << 31), (1 << 31) - 1, 12)
+    unpacked = unpack_compact(compact.pack())
+
+    assert [getattr(unpacked, field) for field in FIELDS] == [70000, 3, 270, -1, -(1 << 31), (1 << 31) - 1, 12]
+
+
+def test_movement_converts_to_compact_and_back():
+    movement = qgp_player_movement(move_header(), 1, 2, 90, 0xFFFFFFFF, 5, 0x80000000, 7)
+    packed_compact = compact_movement(movement.pack())
+    assert len(packed_compact) < len(movement.pack())
+
+    restored = unpack_compact(packed_compact).to_movement()
+    assert [getattr(restored, field) for field in FIELDS] == [getattr(movement, field) for field in FIELDS]
+    assert to_signed32(movement.x_position) == -1
+
+
+def test_compact_movement_cut_short_is_rejected():
+    header, payload = qgp_header.unpack(qgp_player_movement_compact(move_header(), 1, 0, 0, 300, 0, 0, 1).pack())
+    for cut in range(1, len(payload) + 1):
+        assert qgp_player_movement_compact.unpack(header, payload[:-cut]) == "Length is not expected"
+
+
+def test_movement_type_that_doesnt_fit_a_byte_is_refused():
+    with pytest.raises(ValueError):
+        qgp_player_movement_compact(move_header(), 1, 256, 0, 0, 0, 0, 0).pack()
+
+
+def test_movement_that_doesnt_fit_is_sent_in_the_standard_format():
+    packed_movement = qgp_player_movement(move_header(), 1, 256, 90, 5, 6, 7, 8).pack()
+    assert compact_movement(packed_movement) == packed_movement
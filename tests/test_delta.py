@@ -0,0 +1,89 @@
+from qgp.pdu_constants import QGP_MSG_PLAYER_DELTA, QGP_MSG_PLAYER_SNAPSHOT
+from qgp.qgp_arrays import uint32_array
+from qgp.qgp_delta import (qgp_delta_encoder, qgp_delta_decoder, qgp_player_delta, qgp_snapshot_ack,
+                           records_by_player, diff_records, apply_entries, QGP_DELTA_ALL_FIELDS, QGP_DELTA_REMOVED)
+from qgp.qgp_header import qgp_header
+from qgp.qgp_snapshot import qgp_player_snapshot
+
+
+def flat(rows):
+    records = uint32_array()
+    for row in rows:
+        records.extend(row)
+    return records
+
+
+#defining function to unpack an encoded PDU and apply it on the client side
+def decode(decoder, packed_pdu):
+    header, payload = qgp_header.unpack(packed_pdu)
+    if header.msg_type == QGP_MSG_PLAYER_SNAPSHOT:
+        return decoder.apply_snapshot(qgp_player_snapshot.unpack(header, payload))
+
+    assert header.msg_type == QGP_MSG_PLAYER_DELTA
+    return decoder.apply_delta(qgp_player_delta.unpack(header, payload))
+
+
+def test_delta_pdu_round_trip():
+    entries = [(1, QGP_DELTA_ALL_FIELDS, (1, 2, 3, 4, 5, 6)), (2, 0b000100, (99,)), (3, QGP_DELTA_REMOVED, ())]
+    header = qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+    header, payload = qgp_header.unpack(qgp_player_delta(header, 20, 17, entries).pack())
+    delta = qgp_player_delta.unpack(header, payload)
+
+    assert (delta.tick, delta.baseline_tick) == (20, 17)
+    assert delta.entries == entries
+
+
+def test_diff_then_apply_gives_back_the_new_records():
+    baseline = {1: (1, 0, 0, 10, 10, 10, 1), 2: (2, 0, 0, 20, 20, 20, 1), 3: (3, 0, 0, 30, 30, 30, 1)}
+    rows = [(1, 0, 0, 10, 10, 10, 1), (2, 0, 5, 21, 20, 20, 1), (4, 1, 1, 1, 1, 1, 1)]
+    entries = diff_records(baseline, flat(rows))
+
+    #the unchanged player isn't sent and the player that left is removed
+    assert [player_id for player_id, _, _ in entries] == [2, 4, 3]
+    assert apply_entries(baseline, entries) == records_by_player(flat(rows))
+
+
+def test_encoder_and_decoder_stay_in_step_with_acks():
+    encoder = qgp_delta_encoder()
+    decoder = qgp_delta_decoder()
+    rows = [(player_id, 0, 0, 0, 0, 0, 1) for player_id in range(1, 6)]
+
+    for tick in range(10):
+        rows = [(player_id, 0, 0, tick * player_id, 0, 0, 1) for player_id, *_ in rows]
+        if tick == 6:
+            rows = rows[1:]
+
+        decoded = decode(decoder, encoder.encode(tick, flat(rows)))
+        assert decoded == records_by_player(flat(rows))
+
+        #acking every other tick so some deltas are against older baselines
+        if tick % 2 == 0:
+            assert encoder.ack(tick)
+
+    assert encoder.keyframes == 1
+    assert encoder.deltas == 9
+
+
+def test_encoder_sends_a_keyframe_until_something_is_acked():
+    encoder = qgp_delta_encoder()
+    for tick in range(3):
+        packed_pdu = encoder.encode(tick, flat([(1, 0, 0, tick, 0, 0, 0)]))
+        assert qgp_header.peek_msg_type(packed_pdu) == QGP_MSG_PLAYER_SNAPSHOT
+
+    #an ack for a tick that was never sent is ignored
+    assert not encoder.ack(99)
+    assert encoder.ack(2)
+    assert qgp_header.peek_msg_type(encoder.encode(3, flat([(1, 0, 0, 3, 0, 0, 0)]))) == QGP_MSG_PLAYER_DELTA
+
+
+def test_snapshot_ack_round_trip():
+    header = qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+    header, payload = qgp_header.unpack(qgp_snapshot_ack(header, 4096).pack())
+    assert qgp_snapshot_ack.unpack(header, payload).tick == 4096
+
+
+def test_delta_cut_short_is_rejected():
+    header = qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+    packed_pdu = qgp_player_delta(header, 2, 1, [(1, QGP_DELTA_ALL_FIELDS, (1, 2, 3, 4, 5, 6))]).pack()
+    header, payload = qgp_header.unpack(packed_pdu)
+    assert qgp_player_delta.unpack(header, payload[:-4]) == "Length is not expected"
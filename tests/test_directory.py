@@ -0,0 +1,37 @@
+from qgp.qgp_directory import qgp_player_directory
+
+
+def directory_with_closed(closed):
+    return qgp_player_directory(is_connected=lambda connection: connection not in closed)
+
+
+def test_open_connection_keeps_its_player_id():
+    directory = directory_with_closed(set())
+    assert directory.add(1, "client_a")
+
+    assert not directory.add(1, "client_b")
+    assert directory.lookup(1) == "client_a"
+    assert directory.ids_for("client_b") == set()
+
+
+def test_closed_connection_hands_its_player_id_over():
+    closed = set()
+    directory = directory_with_closed(closed)
+    directory.add(1, "client_a")
+    closed.add("client_a")
+
+    assert directory.add(1, "client_b")
+    assert directory.lookup(1) == "client_b"
+    assert directory.ids_for("client_a") == set()
+
+    #removing the old connection afterwards leaves the new one in place
+    directory.remove("client_a")
+    assert directory.lookup(1) == "client_b"
+
+
+def test_adding_an_owned_or_free_id_is_allowed():
+    directory = directory_with_closed(set())
+    assert directory.add(1, "client_a")
+    assert directory.add(1, "client_a")
+    assert directory.add(2, "client_a")
+    assert directory.ids_for("client_a") == {1, 2}
@@ -0,0 +1,98 @@
+from qgp.pdu_constants import QGP_MSG_PLAYER_MOVEMENT, QGP_MSG_PLAYER_STATUS, QGP_MSG_SERVER_ERROR, QGP_ERROR_INVALID_PDU
+from qgp.qgp_errors import qgp_errors
+from qgp.qgp_header import qgp_header
+from qgp.qgp_player import qgp_player_movement, qgp_player_status, qgp_player_join, qgp_player_leave
+from qgp.qgp_session_mgmt import qgp_game_start, qgp_game_end
+
+import client
+import server
+
+
+#defining a stand in for a server connection that is in a game
+#it records the PDUs the handlers queue for the client
+class in_game_protocol:
+    current_dfa_state = server.server_client_dfa.CLIENT_IN_GAME
+    send_invalid_pdu = server.qgp_server.send_invalid_pdu
+
+    def __init__(self):
+        self.queued = []
+
+    def queue_qgp_pdu(self, packed_pdu, dfa_status=None):
+        self.queued.append(packed_pdu)
+
+
+def truncated(packed_pdu, cut=4):
+    headers, payload = qgp_header.unpack(packed_pdu)
+    return headers, payload[:-cut]
+
+
+#defining function to give a PDU more payload than its fields take
+def overlong(packed_pdu, extra=4):
+    headers, payload = qgp_header.unpack(packed_pdu + bytes(extra))
+    headers.msg_len += extra
+    return headers, payload
+
+
+def test_short_movement_and_status_unpack_to_the_error_string():
+    header = qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+    headers, payload = truncated(qgp_player_movement(header, 1, 0, 0, 1, 2, 3, 4).pack())
+    assert qgp_player_movement.unpack(headers, payload) == "Length is not expected"
+
+    headers, payload = truncated(qgp_player_status(header, 1, 90, 10).pack())
+    assert qgp_player_status.unpack(headers, payload) == "Length is not expected"
+
+
+def test_short_join_leave_and_game_pdus_unpack_to_a_string():
+    header = qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+    for pdu_class in (qgp_player_join, qgp_player_leave):
+        headers, payload = truncated(pdu_class(header, 1, 7, 2).pack())
+        assert pdu_class.unpack(headers, payload) == "Length is not expected"
+
+    start = qgp_game_start(header, 7, 1, 300, 2, 1, 0, 2, [1, 2]).pack()
+    end = qgp_game_end(header, 7, 1, 300, 2, 1, 0, 2, [1, 2], [3, 0], [0, 3], [1, 1], [3], [3], [2]).pack()
+    for pdu_class, packed_pdu in ((qgp_game_start, start), (qgp_game_end, end)):
+        for cut in (4, len(packed_pdu) - qgp_header.SIZE - 2):
+            headers, payload = truncated(packed_pdu, cut)
+            assert isinstance(pdu_class.unpack(headers, payload), str)
+
+    headers, payload = overlong(end)
+    assert "qgp_game_end" in qgp_game_end.unpack(headers, payload)
+
+
+def test_client_ignores_a_short_game_start():
+    header = qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+    headers, payload = truncated(qgp_game_start(header, 7, 1, 300, 2, 1, 0, 2, [1, 2]).pack())
+
+    class idle_client:
+        current_dfa_state = client.client_dfa_state.HANDSHAKE_COMPLETED
+
+    protocol = idle_client()
+    client.CLIENT_DISPATCHER.dispatch(protocol, headers, payload, 0)
+    assert protocol.current_dfa_state == client.client_dfa_state.HANDSHAKE_COMPLETED
+
+
+def test_server_drops_short_gameplay_pdus():
+    header = qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+    for packed_pdu, msg_type in ((qgp_player_movement(header, 1, 0, 0, 1, 2, 3, 4).pack(), QGP_MSG_PLAYER_MOVEMENT),
+                                 (qgp_player_status(header, 1, 90, 10).pack(), QGP_MSG_PLAYER_STATUS)):
+        headers, payload = truncated(packed_pdu)
+        assert headers.msg_type == msg_type
+        assert server.SERVER_DISPATCHER.dispatch(in_game_protocol(), headers, payload, 0) is None
+
+
+def test_server_answers_bad_join_and_leave_with_an_error():
+    header = qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+    join_headers, join_payload = overlong(qgp_player_join(header, 1, 7, 2).pack())
+    leave_headers, leave_payload = overlong(qgp_player_leave(header, 1, 7, 2).pack())
+
+    idle = in_game_protocol()
+    idle.current_dfa_state = server.server_client_dfa.CLIENT_CONNECTED_IDLE
+    in_game = in_game_protocol()
+    server.SERVER_DISPATCHER.dispatch(idle, join_headers, join_payload, 0)
+    server.SERVER_DISPATCHER.dispatch(in_game, leave_headers, leave_payload, 0)
+
+    for protocol in (idle, in_game):
+        assert len(protocol.queued) == 1
+        header, payload = qgp_header.unpack(protocol.queued[0])
+        assert header.msg_type == QGP_MSG_SERVER_ERROR
+        assert qgp_errors.unpack(header, payload).error_code == QGP_ERROR_INVALID_PDU
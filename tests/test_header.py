@@ -0,0 +1,88 @@
+import pytest
+
+from qgp.pdu_constants import QGP_MSG_PLAYER_STATUS, QGP_MSG_TEXT_CHAT, QGP_MSG_CLIENT_HELLO
+from qgp.qgp_communication import qgp_text_chat
+from qgp.qgp_delta import qgp_player_delta, QGP_DELTA_ALL_FIELDS
+from qgp.qgp_framing import qgp_frame_decoder
+from qgp.qgp_header import qgp_header
+from qgp.qgp_player import qgp_player_status
+
+
+def status_pdu(player_id=1, priority=0):
+    header = qgp_header(version=1, msg_type=0, msg_len=0, priority=priority)
+    return qgp_player_status(header, player_id, 90, 10).pack()
+
+
+def test_v1_header_round_trip():
+    packed_header = qgp_header(version=1, msg_type=QGP_MSG_TEXT_CHAT, msg_len=20, priority=3).pack()
+    header = qgp_header.unpack_from(packed_header)
+
+    assert (header.version, header.msg_type, header.msg_len, header.priority, header.size) == \
+           (1, QGP_MSG_TEXT_CHAT, 20, 3, qgp_header.SIZE)
+    assert qgp_header.peek_msg_type(packed_header) == QGP_MSG_TEXT_CHAT
+    assert qgp_header.peek_priority(packed_header) == 3
+
+
+def test_common_message_type_takes_a_3_byte_v2_header():
+    packed_v1 = status_pdu(priority=2)
+    packed_v2 = qgp_header.to_v2(packed_v1)
+    assert len(packed_v2) == len(packed_v1) - qgp_header.SIZE + 3
+
+    header, payload = qgp_header.unpack(packed_v2)
+    assert (header.version, header.msg_type, header.priority, header.size) == \
+           (qgp_header.V2_VERSION, QGP_MSG_PLAYER_STATUS, 2, 3)
+
+    #msg_len covers the header and payload like a v1 header, so the PDU unpacks the same way
+    assert header.msg_len == len(packed_v2)
+    status = qgp_player_status.unpack(header, payload)
+    assert (status.player_id, status.player_health, status.player_dmg_taken) == (1, 90, 10)
+
+
+def test_uncommon_message_type_is_escaped():
+    packed_v2 = qgp_header.pack_v2(QGP_MSG_CLIENT_HELLO, 0, 1)
+    header = qgp_header.unpack_from(packed_v2)
+
+    assert header.msg_type == QGP_MSG_CLIENT_HELLO
+    assert header.size == len(packed_v2) == 5
+
+
+def test_long_payload_uses_a_longer_length_varint():
+    header = qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+    entries = [(player_id, QGP_DELTA_ALL_FIELDS, (1, 2, 3, 4, 5, 6)) for player_id in range(100)]
+    packed_v1 = qgp_player_delta(header, 1, 0, entries).pack()
+
+    header, payload = qgp_header.unpack(qgp_header.to_v2(packed_v1))
+    assert header.size == 4
+    assert bytes(payload) == packed_v1[qgp_header.SIZE:]
+    assert qgp_player_delta.unpack(header, payload).entries == entries
+
+
+def test_priority_above_the_v2_range_is_capped():
+    header = qgp_header.unpack_from(qgp_header.pack_v2(QGP_MSG_TEXT_CHAT, 0, 200))
+    assert header.priority == qgp_header.V2_PRIORITY_MASK
+
+
+def test_unknown_v2_type_code_is_refused():
+    packed_v2 = bytearray(qgp_header.pack_v2(QGP_MSG_PLAYER_STATUS, 0, 0))
+    packed_v2[1] = 0xF0
+    with pytest.raises(ValueError):
+        qgp_header.unpack_from(packed_v2)
+
+
+def test_v1_and_v2_pdus_are_framed_from_one_stream():
+    chat_header = qgp_header(version=1, msg_type=0, msg_len=0, priority=1)
+    pdus = [status_pdu(1), qgp_header.to_v2(status_pdu(2)), qgp_header.to_v2(qgp_text_chat(chat_header, 5, "hello").pack()),
+            status_pdu(3)]
+    stream_bytes = b"".join(pdus)
+
+    #feeding one byte at a time so every header is split
+    decoder = qgp_frame_decoder()
+    frames = []
+    for index in range(len(stream_bytes)):
+        frames += [(header, bytes(payload)) for header, payload in decoder.feed(stream_bytes[index:index + 1])]
+
+    assert [header.version for header, _ in frames] == [1, 2, 2, 1]
+    assert [qgp_player_status.unpack(header, payload).player_id for header, payload in frames if
+            header.msg_type == QGP_MSG_PLAYER_STATUS] == [1, 2, 3]
+    assert qgp_text_chat.unpack(*frames[2]).text == "hello"
+    assert decoder.pending() == 0
@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from qgp.pdu_constants import QGP_MSG_PLAYER_SNAPSHOT
+from qgp.qgp_delta import qgp_delta_encoder, qgp_delta_decoder, qgp_player_delta
+from qgp.qgp_header import qgp_header
+from qgp.qgp_lod import qgp_lod_selector
+from qgp.qgp_snapshot import qgp_player_snapshot
+from qgp.qgp_world import qgp_world
+
+BUDGET = 300
+
+#the most a PDU can be over the budget, its header and fixed fields
+OVERHEAD = max(qgp_player_delta.PDU_STRUCT.size, qgp_player_snapshot.PDU_STRUCT.size)
+
+
+#defining function to move every player somewhere new each tick
+def move_everyone(world, tick, rng):
+    for player_id in range(1, 101):
+        world.set_movement((player_id, 1, rng.randrange(8), rng.randrange(4000), tick, rng.randrange(4000),
+                            rng.randrange(10)))
+
+
+#defining function to run a client whose acks arrive ack_lag ticks late
+#returns the size of every PDU and the snapshots the client decoded
+def run_match(ack_lag, ticks=60):
+    rng = random.Random(ack_lag)
+    world = qgp_world()
+    selector = qgp_lod_selector(budget=BUDGET)
+    encoder = qgp_delta_encoder()
+    decoder = qgp_delta_decoder()
+    sizes = []
+    decoded = []
+
+    for tick in range(ticks):
+        move_everyone(world, tick, rng)
+        records = selector.select(world, (1,), baseline=encoder.baseline_records())
+        packed_pdu = encoder.encode(tick, records)
+        sizes.append(len(packed_pdu))
+
+        header, payload = qgp_header.unpack(packed_pdu)
+        if header.msg_type == QGP_MSG_PLAYER_SNAPSHOT:
+            decoded.append(decoder.apply_snapshot(qgp_player_snapshot.unpack(header, payload)))
+        else:
+            decoded.append(decoder.apply_delta(qgp_player_delta.unpack(header, payload)))
+
+        if tick >= ack_lag:
+            encoder.ack(tick - ack_lag)
+
+    return sizes, decoded
+
+
+@pytest.mark.parametrize("ack_lag", [0, 1, 3, 6])
+def test_encoded_size_stays_within_the_budget_while_acks_are_late(ack_lag):
+    sizes, _ = run_match(ack_lag)
+    assert max(sizes) <= BUDGET + OVERHEAD
+
+
+@pytest.mark.parametrize("ack_lag", [0, 3])
+def test_players_never_go_back_to_an_older_tick(ack_lag):
+    _, decoded = run_match(ack_lag)
+
+    #the y position is the tick the player was moved on
+    last_seen = {}
+    for records in decoded:
+        for player_id, record in records.items():
+            assert record[4] >= last_seen.get(player_id, 0)
+            last_seen[player_id] = record[4]
+
+    #every player has been sent at least once
+    assert len(last_seen) == 100
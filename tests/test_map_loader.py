@@ -0,0 +1,104 @@
+import asyncio
+
+from qgp.pdu_constants import QGP_LOAD_DONE, QGP_MSG_LD_MAP_CHUNK, QGP_MSG_TEXT_CHAT
+from qgp.qgp_communication import qgp_text_chat
+from qgp.qgp_header import qgp_header
+from qgp.qgp_loading import qgp_load_end, qgp_map_chunk
+from qgp.qgp_map_loader import qgp_load_manager, qgp_map_store, qgp_map_download
+from qgp.qgp_scheduler import qgp_send_scheduler, qgp_priority
+
+import server
+
+
+#defining a load manager with a small generated map that records the chunks it sends
+def recording_loader():
+    sent = []
+    loader = qgp_load_manager(lambda member, transfer, chunk_index, data: sent.append((member, chunk_index)),
+                              lambda match_id, game, still_loading: None,
+                              store=qgp_map_store(directory="no_such_directory", generated_size=4096), chunk_size=512)
+    return loader, sent
+
+
+def test_digest_is_only_given_for_the_map_being_loaded():
+    async def run():
+        loader, _ = recording_loader()
+        loader.start(1, 5, ["a"])
+        digests = (loader.digest_for("a", 5), loader.digest_for("a", 999), loader.digest_for("b", 5))
+        loader.stop()
+        return loader, digests
+
+    loader, (digest, other_map, other_member) = asyncio.run(run())
+    assert digest == loader.store.digest(5)
+    assert other_map is None and other_member is None
+    assert list(loader.store.maps) == [5]
+
+
+#defining a stand in for a server connection that isn't loading anything
+class idle_connection:
+    handle_load_end = server.qgp_server.handle_load_end
+
+    def __init__(self):
+        self.cached_assets = set()
+
+
+def test_load_end_for_an_unknown_map_caches_nothing():
+    header = qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+    headers, payload = qgp_header.unpack(qgp_load_end(header, 1, 123456789, QGP_LOAD_DONE).pack())
+    maps_before = len(server.MAP_LOADER.store.maps)
+
+    connection = idle_connection()
+    connection.handle_load_end(headers, qgp_load_end.unpack(headers, payload), 0)
+
+    assert connection.cached_assets == set()
+    assert len(server.MAP_LOADER.store.maps) == maps_before
+
+
+#defining a stand in for the channel manager that hands the chunks it is sent to a download
+class download_channels:
+    def __init__(self, loader, download):
+        self.loader = loader
+        self.download = download
+
+    def send(self, packed_pdu):
+        header, payload = qgp_header.unpack(packed_pdu)
+        if header.msg_type != QGP_MSG_LD_MAP_CHUNK:
+            return
+
+        chunk = qgp_map_chunk.unpack(header, payload)
+        if self.download.add(chunk.chunk_index, chunk.data):
+            self.loader.progress("a", self.download.received)
+
+
+def test_map_chunks_are_not_dropped_when_the_queue_is_full():
+    chat_header = qgp_header(version=1, msg_type=QGP_MSG_TEXT_CHAT, msg_len=0, priority=qgp_priority.NORMAL)
+    packed_chat = qgp_text_chat(chat_header, 400, "x" * 400).pack()
+
+    async def run():
+        loader, _ = recording_loader()
+        scheduler = None
+
+        #every chunk is followed by chat that would push it out of a queue this small
+        def send_chunk(member, transfer, chunk_index, data):
+            chunk_header = qgp_header(version=1, msg_type=0, msg_len=0, priority=qgp_priority.BULK)
+            scheduler.enqueue(qgp_map_chunk(chunk_header, transfer.match_map, chunk_index, data).pack())
+            scheduler.enqueue(packed_chat)
+            scheduler.enqueue(packed_chat)
+
+        loader.send_chunk = send_chunk
+        load = loader.start(1, 5, ["a"])
+        download = qgp_map_download(1, 5, load.digest, len(load.data), load.chunk_size, load.chunk_count,
+                                    progress_every=1)
+        scheduler = qgp_send_scheduler(download_channels(loader, download), transmit=lambda: None,
+                                       max_queued_bytes=1024)
+
+        for _ in range(4 * load.chunk_count):
+            loader.pump()
+            scheduler.flush()
+        dropped = scheduler.dropped
+        scheduler.close()
+        loader.stop()
+        return download, dropped
+
+    download, dropped = asyncio.run(run())
+    assert dropped > 0
+    assert download.verified()
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+
+from qgp.pdu_constants import QGP_MSG_TEXT_CHAT
+from qgp.qgp_header import qgp_header
+from qgp.qgp_communication import qgp_text_chat
+from qgp.qgp_player import qgp_player_movement
+from qgp.qgp_scheduler import qgp_send_scheduler
+
+
+#defining a stand in for the channel manager that records the writes
+class recording_channels:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, packed_pdu):
+        self.sent.append(packed_pdu)
+
+
+def chat_pdu(length, priority=1):
+    header = qgp_header(version=1, msg_type=QGP_MSG_TEXT_CHAT, msg_len=0, priority=priority)
+    return qgp_text_chat(header, length, "x" * length).pack()
+
+
+def movement_pdu(x_position=0):
+    header = qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+    return qgp_player_movement(header, 1, 0, 0, x_position, 0, 0, 1).pack()
+
+
+def flush_with_budget(pdus, budget):
+    async def run():
+        channels = recording_channels()
+        scheduler = qgp_send_scheduler(channels, transmit=lambda: None, budget=lambda: budget)
+        for packed_pdu in pdus:
+            scheduler.enqueue(packed_pdu)
+        written = scheduler.flush()
+        queued = scheduler.queued_bytes
+        scheduler.close()
+        return channels.sent, written, queued
+
+    return asyncio.run(run())
+
+
+def test_pdu_bigger_than_the_budget_is_still_sent():
+    big = chat_pdu(3000)
+    sent, written, queued = flush_with_budget([big], budget=2400)
+
+    assert sent == [big]
+    assert written == len(big)
+    assert queued == 0
+
+
+def test_pdu_bigger_than_the_budget_does_not_block_the_ones_behind_it():
+    big = chat_pdu(3000)
+    small = chat_pdu(10)
+
+    #the first flush sends the big PDU alone, the next one gets the rest
+    sent, written, queued = flush_with_budget([big, small], budget=2400)
+    assert sent == [big]
+    assert queued == len(small)
+
+
+def test_budget_still_limits_the_flush_after_the_first_pdu():
+    movements = [movement_pdu(x_position) for x_position in range(10)]
+    budget = 3 * len(movements[0])
+    sent, written, queued = flush_with_budget(movements, budget)
+
+    assert sent == movements[:3]
+    assert written == budget
+    assert queued == 7 * len(movements[0])
+
+
+def test_higher_priority_is_flushed_first():
+    chat = chat_pdu(10)
+    movement = movement_pdu()
+    sent, written, queued = flush_with_budget([chat, movement], budget=None)
+
+    assert sent == [movement, chat]
+
+
+def test_every_dropped_pdu_is_logged_with_its_type_and_priority(caplog):
+    scheduler = qgp_send_scheduler(recording_channels(), transmit=lambda: None, max_queued_bytes=90)
+    chat = chat_pdu(20, priority=2)
+    with caplog.at_level(logging.WARNING, logger="qgp.scheduler"):
+        scheduler.enqueue(chat)
+        scheduler.enqueue(chat)
+        scheduler.enqueue(movement_pdu())
+        scheduler.enqueue(movement_pdu())
+
+    assert scheduler.dropped == 2
+    assert [record.getMessage() for record in caplog.records] == \
+        [f"Send queue full, dropped PDU type 0x{QGP_MSG_TEXT_CHAT:04x} with priority 2"] * 2
@@ -0,0 +1,46 @@
+from qgp.pdu_constants import QGP_MSG_PLAYER_SNAPSHOT
+from qgp.qgp_header import qgp_header
+from qgp.qgp_player import qgp_player_movement
+from qgp.qgp_snapshot import qgp_player_snapshot, QGP_MOVEMENT_RECORD_SIZE
+
+
+def snapshot_header():
+    return qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+
+
+def round_trip(snapshot):
+    header, payload = qgp_header.unpack(snapshot.pack())
+    assert header.msg_type == QGP_MSG_PLAYER_SNAPSHOT
+    return qgp_player_snapshot.unpack(header, payload)
+
+
+def test_snapshot_round_trip():
+    rows = [(player_id, 1, 2, 0xFFFFFFFF, player_id * 10, 0, 7) for player_id in range(1, 51)]
+    snapshot = qgp_player_snapshot.from_movements(snapshot_header(), 1234, rows)
+    unpacked = round_trip(snapshot)
+
+    assert unpacked.tick == 1234
+    assert unpacked.record_count() == 50
+    assert [unpacked.record(index) for index in range(50)] == rows
+    assert list(unpacked.column("y_position")) == [player_id * 10 for player_id in range(1, 51)]
+
+
+def test_snapshot_from_movement_pdus_round_trips_back_to_movements():
+    move_header = qgp_header(version=1, msg_type=0, msg_len=0, priority=0)
+    movements = [qgp_player_movement(move_header, player_id, 3, 4, 5, 6, 7, 8) for player_id in (1, 2)]
+    unpacked = round_trip(qgp_player_snapshot.from_movements(snapshot_header(), 9, movements))
+
+    fields = ("player_id", "movement_type", "direction", "x_position", "y_position", "z_position", "speed")
+    assert [[getattr(movement, field) for field in fields] for movement in unpacked.movements()] == \
+           [[getattr(movement, field) for field in fields] for movement in movements]
+
+
+def test_empty_snapshot_round_trip():
+    unpacked = round_trip(qgp_player_snapshot.from_movements(snapshot_header(), 0, []))
+    assert unpacked.record_count() == 0
+
+
+def test_snapshot_with_a_missing_record_is_rejected():
+    packed_pdu = qgp_player_snapshot.from_movements(snapshot_header(), 1, [(1, 0, 0, 0, 0, 0, 0)] * 3).pack()
+    header, payload = qgp_header.unpack(packed_pdu)
+    assert qgp_player_snapshot.unpack(header, payload[:-QGP_MOVEMENT_RECORD_SIZE]) == "Length is not expected"